@@ -2,10 +2,11 @@
 """
 Batch search and download missing items
 """
-import requests
 import json
-import os
-import time
+
+from codex_client import fetch, print_throughput
+from codex_search import SearchResolver
+from icon_store import get_icon_store
 
 # List of missing items from the check
 MISSING_ITEMS = [
@@ -57,111 +58,44 @@ MISSING_ITEMS = [
     "Warlord's Glowy Bauble"
 ]
 
-def search_with_variants(item_name):
-    """Search for item with multiple variants"""
-    headers = {
-        'content-type': 'application/json',
-        'origin': 'https://ashescodex.com',
-        'referer': 'https://ashescodex.com/',
-        'user-agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'
-    }
-    
-    # Create search variants
-    variants = [
-        item_name,  # Full name
-        item_name.replace("'", ""),  # No apostrophes
-        item_name.replace("'", " "),  # Apostrophes as spaces
-        " ".join(item_name.split()[:2]),  # First 2 words
-        " ".join(item_name.split()[:3]),  # First 3 words
-        item_name.split("'s")[0] if "'s" in item_name else item_name,  # Remove possessive
-    ]
-    
-    for variant in variants:
-        try:
-            data = {"query": variant, "resultType": None}
-            response = requests.post('https://api.ashescodex.com/search', 
-                                   headers=headers, json=data, timeout=10)
-            
-            if response.status_code == 200:
-                results = response.json()
-                
-                # Look for exact match
-                for result in results:
-                    if (result.get('item', {}).get('type') == 'item'):
-                        found_name = result.get('item', {}).get('itemName', '')
-                        if found_name == item_name:
-                            icon_path = result.get('item', {}).get('icon', '')
-                            if icon_path and icon_path != "None":
-                                return convert_to_cdn_url(icon_path), variant, found_name
-                
-                # Look for close matches
-                for result in results:
-                    if (result.get('item', {}).get('type') == 'item'):
-                        found_name = result.get('item', {}).get('itemName', '')
-                        if (item_name.lower().replace("'", "") in found_name.lower().replace("'", "") or
-                            found_name.lower().replace("'", "") in item_name.lower().replace("'", "")):
-                            icon_path = result.get('item', {}).get('icon', '')
-                            if icon_path and icon_path != "None":
-                                return convert_to_cdn_url(icon_path), variant, found_name
-                            
-        except Exception as e:
-            continue
-    
-    return None, None, None
-
-def convert_to_cdn_url(icon_path):
-    """Convert game path to CDN URL"""
-    if "/Game/UI/Icons/Items/" in icon_path:
-        path_part = icon_path.split("/Game/UI/Icons/Items/")[1]
-        icon_name = path_part.split("/")[-1]
-        if "." in icon_name:
-            icon_name = icon_name.split(".")[0]
-        
-        path_parts = path_part.split("/")[:-1]
-        cdn_path = "/".join(path_parts)
-        
-        return f"https://cdn.ashescodex.com/UI/Icons/Items/{cdn_path}/{icon_name}_64.webp"
-    return None
-
-def download_icon(url, filepath):
-    """Download icon"""
+def download_icon(url):
+    """Download icon; returns its bytes or None"""
     try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200 and len(response.content) > 100:
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
-            return True
-        return False
+        response = fetch(url, timeout=10)
+        if response is not None and response.status == 200 and len(response.content) > 100:
+            return response.content
+        return None
     except:
-        return False
+        return None
 
 def batch_search_and_download():
     """Search and download missing items in batches"""
     print("🔍 Batch searching for missing items...")
     
-    icons_dir = "app/frontend-built/assets/icons/items/"
-    dev_icons_dir = "app/frontend-dev/src/assets/icons/items/"
+    store = get_icon_store()
     downloaded = 0
     not_found = []
     
+    # Resolve every item the store lacks in one batch of de-duplicated search queries
+    wanted = [name for name in MISSING_ITEMS if not store.has(name)]
+    resolver = SearchResolver(require_icon=True)
+    matches = resolver.resolve(wanted)
+    print(f"🔎 Resolved {sum(1 for m in matches.values() if m)}/{len(wanted)} items "
+          f"with {resolver.requests} search requests")
+    
     for i, item_name in enumerate(MISSING_ITEMS):
         print(f"📥 [{i+1}/{len(MISSING_ITEMS)}] {item_name}")
         
-        # Check if already exists
-        safe_name = item_name.lower().replace(' ', '_').replace("'", '').replace('-', '_')
-        safe_name = ''.join(c for c in safe_name if c.isalnum() or c == '_').strip('_')
-        
-        icon_path = os.path.join(icons_dir, f"{safe_name}.webp")
-        dev_icon_path = os.path.join(dev_icons_dir, f"{safe_name}.webp")
-        
-        if os.path.exists(icon_path):
+        # Check if already stored
+        if item_name not in matches:
             print(f"    ✅ Already exists")
             continue
         
-        # Search for the item
-        cdn_url, variant_used, found_name = search_with_variants(item_name)
+        match = matches[item_name]
+        cdn_url = match.cdn_url if match else None
         
         if cdn_url:
+            variant_used, found_name = match.query, match.name
             if found_name != item_name:
                 print(f"    📝 Found close match: '{found_name}' via '{variant_used}'")
             else:
@@ -169,24 +103,20 @@ def batch_search_and_download():
             
             print(f"    🔗 {cdn_url}")
             
-            if download_icon(cdn_url, icon_path):
+            content = download_icon(cdn_url)
+            if content is not None:
                 try:
-                    with open(icon_path, 'rb') as src:
-                        with open(dev_icon_path, 'wb') as dst:
-                            dst.write(src.read())
-                    print(f"    ✅ Downloaded and copied")
-                    downloaded += 1
-                except Exception as e:
-                    print(f"    ⚠️  Downloaded but copy failed: {e}")
-                    downloaded += 1
+                    store.add(item_name, content, cdn_url)
+                    print(f"    ✅ Downloaded and published")
+                except OSError as e:
+                    print(f"    ⚠️  Downloaded but publish failed: {e}")
+                downloaded += 1
             else:
                 print(f"    ❌ Download failed")
                 not_found.append(item_name)
         else:
             print(f"    ❌ Not found with any variant")
             not_found.append(item_name)
-        
-        time.sleep(1)  # Be nice to the API
     
     print(f"\n📊 BATCH RESULTS:")
     print(f"✅ Downloaded: {downloaded}")
@@ -196,6 +126,7 @@ def batch_search_and_download():
         print(f"\n📝 Items still missing:")
         for item in not_found:
             print(f"  • {item}")
+    print_throughput()
 
 if __name__ == "__main__":
     batch_search_and_download()
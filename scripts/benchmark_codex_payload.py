@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Codex loot-payload parser over recorded mob pages
+Pages come from a directory of saved .html files (--pages) or, by default,
+from the mob pages already stored in the HTTP cache by codex_client.py.
+Reports pages/s and MB/s for the shared parser with each available JSON
+backend, next to the old regex + str.replace extraction as a baseline.
+
+Usage:
+    python3 scripts/benchmark_codex_payload.py
+    python3 scripts/benchmark_codex_payload.py --pages data/cache/pages --repeat 5
+    python3 scripts/benchmark_codex_payload.py --save data/cache/pages   # freeze the cached pages to disk
+    python3 scripts/benchmark_codex_payload.py --json                   # machine-readable, for tracking
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import zlib
+
+import codex_payload
+from codex_cache import DEFAULT_CACHE_PATH
+
+
+def load_pages_from_dir(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+
+def load_pages_from_cache(path):
+    if not os.path.exists(path):
+        return []
+    conn = sqlite3.connect(path)
+    rows = conn.execute("""
+        SELECT url, body FROM http_cache
+        WHERE url LIKE '%/db/mob/%' AND status = 200
+        ORDER BY url
+    """).fetchall()
+    conn.close()
+    return [(url, zlib.decompress(body).decode('utf-8', errors='replace')) for url, body in rows]
+
+
+def legacy_parse(content):
+    """The extraction every script used before codex_payload (baseline only)"""
+    json_match = re.search(r'"body":"({.*?})"', content)
+    if not json_match:
+        return 0
+    json_str = json_match.group(1).replace('\\"', '"').replace('\\\\', '\\')
+    try:
+        data = json.loads(json_str)
+    except ValueError:
+        return 0
+    count = 0
+    for loot_table in data.get('data', {}).get('_loot', []):
+        if '_Named' in loot_table.get('name', ''):
+            for container in loot_table.get('rewardDefContainers', []):
+                for reward in container.get('rewards', []):
+                    for item_reward in reward.get('itemRewards', []):
+                        if item_reward.get('item'):
+                            count += 1
+    return count
+
+
+def payload_parse(content):
+    return sum(len(rewards) for _, rewards in
+               codex_payload.named_loot_tables(codex_payload.parse_page(content)))
+
+
+def run(name, parse, pages, repeat):
+    total_bytes = sum(len(content.encode('utf-8')) for _, content in pages)
+    items = sum(parse(content) for _, content in pages)  # warm-up, and item count
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _, content in pages:
+            parse(content)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    best = max(best, 1e-9)
+    return {
+        'parser': name,
+        'pages': len(pages),
+        'items': items,
+        'mb': round(total_bytes / 2**20, 3),
+        'seconds': round(best, 4),
+        'pages_per_s': round(len(pages) / best, 1),
+        'mb_per_s': round(total_bytes / 2**20 / best, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Codex loot-payload parser')
+    parser.add_argument('--pages', help='Directory of recorded mob pages (*.html)')
+    parser.add_argument('--cache', default=os.environ.get('CODEX_CACHE_PATH', DEFAULT_CACHE_PATH),
+                        help='HTTP cache database to read mob pages from')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed passes (best one is reported)')
+    parser.add_argument('--save', metavar='DIR', help='Write the loaded pages to DIR as .html and exit')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    pages = load_pages_from_dir(args.pages) if args.pages else load_pages_from_cache(args.cache)
+    if not pages:
+        print("❌ No recorded mob pages found (run a crawl first or pass --pages DIR)")
+        sys.exit(1)
+
+    if args.save:
+        os.makedirs(args.save, exist_ok=True)
+        for source, content in pages:
+            slug = source.rstrip('/').split('/')[-1].split('?')[0]
+            name = slug if slug.endswith('.html') else f"{slug}.html"
+            with open(os.path.join(args.save, name), 'w', encoding='utf-8') as f:
+                f.write(content)
+        print(f"💾 Saved {len(pages)} pages to {args.save}")
+        return
+
+    backends = ['json'] + (['orjson'] if codex_payload.orjson is not None else [])
+    original_backend = codex_payload.JSON_BACKEND
+    results = [run('legacy-regex', legacy_parse, pages, args.repeat)]
+    for backend in backends:
+        codex_payload.set_backend(backend)
+        results.append(run(f'codex_payload[{backend}]', payload_parse, pages, args.repeat))
+    codex_payload.set_backend(original_backend)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"📊 Parsed {results[0]['pages']} pages ({results[0]['mb']} MB), best of {args.repeat}:")
+    for result in results:
+        print(f"  - {result['parser']:<24} {result['pages_per_s']:>9} pages/s "
+              f"{result['mb_per_s']:>8} MB/s  {result['items']} _Named items")
+    if codex_payload.orjson is None:
+        print("  (install orjson to benchmark the faster backend)")
+
+
+if __name__ == "__main__":
+    main()
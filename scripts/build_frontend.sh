@@ -6,6 +6,15 @@ set -e  # Exit on any error
 echo "🔨 Building Angular Frontend"
 echo "=" * 40
 
+# Pack icons into hashed sprite sheets (src/assets/atlas, copied with the assets)
+echo "🧩 Building icon atlas..."
+python3 scripts/build_icon_atlas.py --icons-dir app/frontend-dev/src/assets/icons \
+    || echo "⚠️  Icon atlas skipped (see message above)"
+
+# Smaller icon variants for lists and popups (only changed icons are transcoded)
+echo "🖼️  Transcoding icon variants..."
+python3 scripts/transcode_icons.py || echo "⚠️  Icon variants skipped (see message above)"
+
 # Navigate to Angular project
 cd app/frontend-dev
 
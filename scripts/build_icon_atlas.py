@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Icon sprite-atlas build stage for the map frontend
+Packs every icon family under assets/icons (items, monsters, ressources, ...)
+into sprite sheets per size class, so the map loads a handful of sheets instead
+of one request per icon. Each icon sits in a fixed-size cell of its class
+(16/32/64/128/256 px, centered, never rescaled); a sheet holds at most
+MAX_SHEET_SIZE px in each direction and overflows into further sheets.
+
+Sheet file names carry a content hash (ressources-64.3f2a9c1e.webp), so they
+can be served with a long-lived cache header; an unchanged icon set produces
+byte-identical sheets and the same names. The JSON index (icon-atlas.json,
+not hashed so the frontend can always find it) maps "family/name" to its
+sheet and pixel rectangle:
+
+    {"version": 1,
+     "sheets": {"ressources-64.3f2a9c1e.webp": {"family": "ressources", "cell": 64,
+                                                "width": 2048, "height": 192}},
+     "icons": {"ressources/acacia": {"sheet": "ressources-64.3f2a9c1e.webp",
+                                     "x": 0, "y": 0, "w": 64, "h": 64}}}
+
+Requires Pillow (pip install pillow).
+
+Usage:
+    python3 scripts/build_icon_atlas.py
+    python3 scripts/build_icon_atlas.py --icons-dir app/frontend-dev/src/assets/icons
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+from typing import Dict, List, Tuple
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DEFAULT_ICONS_DIR = 'app/frontend-src/assets/icons'
+INDEX_NAME = 'icon-atlas.json'
+SIZE_CLASSES = (16, 32, 64, 128, 256)
+MAX_SHEET_SIZE = 2048
+IMAGE_EXTENSIONS = ('.webp', '.png', '.jpg', '.jpeg', '.gif')
+SHEET_NAME_RE = re.compile(r'^[\w-]+-\d+\.[0-9a-f]{8}\.(webp|png)$')
+
+
+def size_class(width: int, height: int) -> int:
+    """Smallest cell an icon fits in; oversized icons get a cell of their own size"""
+    side = max(width, height)
+    for cell in SIZE_CLASSES:
+        if side <= cell:
+            return cell
+    return side
+
+
+def load_family(directory: str) -> Dict[int, List[Tuple[str, 'Image.Image']]]:
+    """Icons of one family grouped by size class, in file-name order"""
+    classes: Dict[int, List[Tuple[str, 'Image.Image']]] = {}
+    for filename in sorted(os.listdir(directory)):
+        name, ext = os.path.splitext(filename)
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            continue
+        with Image.open(os.path.join(directory, filename)) as image:
+            image = image.convert('RGBA')
+        classes.setdefault(size_class(*image.size), []).append((name, image))
+    return classes
+
+
+def pack_sheets(icons: List[Tuple[str, 'Image.Image']], cell: int):
+    """Yield (sheet image, [(name, x, y, w, h)]) grids of `cell`-sized slots"""
+    columns = max(1, min(len(icons), MAX_SHEET_SIZE // cell))
+    rows_per_sheet = max(1, MAX_SHEET_SIZE // cell)
+    per_sheet = columns * rows_per_sheet
+    for start in range(0, len(icons), per_sheet):
+        chunk = icons[start:start + per_sheet]
+        rows = (len(chunk) + columns - 1) // columns
+        sheet = Image.new('RGBA', (columns * cell, rows * cell), (0, 0, 0, 0))
+        placements = []
+        for i, (name, image) in enumerate(chunk):
+            width, height = image.size
+            x = (i % columns) * cell + (cell - width) // 2
+            y = (i // columns) * cell + (cell - height) // 2
+            sheet.paste(image, (x, y))
+            placements.append((name, x, y, width, height))
+        yield sheet, placements
+
+
+def encode_sheet(sheet: 'Image.Image', image_format: str) -> bytes:
+    buffer = io.BytesIO()
+    if image_format == 'webp':
+        sheet.save(buffer, 'WEBP', lossless=True, quality=100, method=6)
+    else:
+        sheet.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def build_atlas(icons_dir: str, out_dir: str, image_format: str = 'webp') -> dict:
+    index = {'version': 1, 'sheets': {}, 'icons': {}}
+    os.makedirs(out_dir, exist_ok=True)
+    families = sorted(entry for entry in os.listdir(icons_dir)
+                      if os.path.isdir(os.path.join(icons_dir, entry)))
+    for family in families:
+        classes = load_family(os.path.join(icons_dir, family))
+        for cell in sorted(classes):
+            for sheet, placements in pack_sheets(classes[cell], cell):
+                content = encode_sheet(sheet, image_format)
+                digest = hashlib.sha256(content).hexdigest()[:8]
+                sheet_name = f"{family}-{cell}.{digest}.{image_format}"
+                sheet_path = os.path.join(out_dir, sheet_name)
+                if not os.path.exists(sheet_path):
+                    with open(sheet_path, 'wb') as f:
+                        f.write(content)
+                index['sheets'][sheet_name] = {'family': family, 'cell': cell,
+                                               'width': sheet.width, 'height': sheet.height}
+                for name, x, y, width, height in placements:
+                    index['icons'][f"{family}/{name}"] = {'sheet': sheet_name, 'x': x, 'y': y,
+                                                         'w': width, 'h': height}
+
+    with open(os.path.join(out_dir, INDEX_NAME), 'w') as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+
+    # Sheets of earlier builds are no longer referenced
+    for filename in os.listdir(out_dir):
+        if SHEET_NAME_RE.match(filename) and filename not in index['sheets']:
+            os.remove(os.path.join(out_dir, filename))
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack frontend icons into hashed sprite sheets')
+    parser.add_argument('--icons-dir', default=DEFAULT_ICONS_DIR,
+                        help='Directory holding one sub-directory per icon family')
+    parser.add_argument('--out-dir', help='Output directory (default: <icons-dir>/../atlas)')
+    parser.add_argument('--format', choices=('webp', 'png'), default='webp', help='Sheet image format')
+    args = parser.parse_args()
+
+    if Image is None:
+        print("❌ Pillow is required for the atlas build (pip install pillow)")
+        sys.exit(1)
+    if not os.path.isdir(args.icons_dir):
+        print(f"❌ Icons directory not found: {args.icons_dir}")
+        sys.exit(1)
+
+    out_dir = args.out_dir or os.path.join(os.path.dirname(os.path.normpath(args.icons_dir)), 'atlas')
+    print(f"🧩 Packing icons from {args.icons_dir} into {out_dir}...")
+    index = build_atlas(args.icons_dir, out_dir, args.format)
+
+    total_bytes = sum(os.path.getsize(os.path.join(out_dir, name)) for name in index['sheets'])
+    print(f"✅ {len(index['icons'])} icons -> {len(index['sheets'])} sheets ({total_bytes / 1024:.0f} KB)")
+    for name, sheet in sorted(index['sheets'].items()):
+        print(f"  - {name}: {sheet['width']}x{sheet['height']}")
+
+
+if __name__ == "__main__":
+    main()
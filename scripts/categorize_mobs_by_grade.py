@@ -8,44 +8,13 @@ Categorize named mobs by their grade tier based on special drops
 """
 
 import sqlite3
-import subprocess
 import json
-import re
-import time
 
-def get_item_grade_from_codex(item_url):
-    """Get item grade from Codex item page"""
-    try:
-        # Extract item code from URL
-        if '/db/item/' in item_url:
-            item_code = item_url.split('/db/item/')[-1]
-            
-            # Fetch item page
-            result = subprocess.run(['curl', '-s', f"https://ashescodex.com/db/item/{item_code}"], 
-                                  capture_output=True, text=True, timeout=10)
-            if result.returncode != 0:
-                return "Unknown"
-                
-            content = result.stdout
-            
-            # Look for grade information
-            grade_patterns = [
-                r'Grade:\s*([A-Z]+)',
-                r'"grade":"([A-Z]+)"',
-                r'grade.*?([A-Z]{1,2})'
-            ]
-            
-            for pattern in grade_patterns:
-                match = re.search(pattern, content, re.IGNORECASE)
-                if match:
-                    grade = match.group(1).upper()
-                    if grade in ['NG', 'D', 'C', 'B', 'A', 'S']:
-                        return grade
-            
-            return "Unknown"
-            
-    except Exception as e:
-        return "Unknown"
+from item_grades import GradeResolver, code_from_url
+
+# Grade hierarchy: NG < D < C < B < A < S, and the Codex tiers Initiate < Adept < Radiant
+GRADE_ORDER = {'NG': 0, 'D': 1, 'C': 2, 'B': 3, 'A': 4, 'S': 5, 'Unknown': 0,
+               'Initiate': 1, 'Adept': 2, 'Radiant': 4}
 
 def categorize_all_mobs():
     """Categorize all mobs based on their level and special drop grades"""
@@ -56,7 +25,6 @@ def categorize_all_mobs():
     # Get all mobs with their items
     cursor.execute("""
         SELECT nm.id, nm.name, nm.level, 
-               GROUP_CONCAT(nmi.item_url) as item_urls,
                COUNT(nmi.id) as item_count
         FROM named_mobs nm 
         LEFT JOIN named_mob_items nmi ON nm.id = nmi.named_mob_id 
@@ -69,6 +37,21 @@ def categorize_all_mobs():
     
     print(f"🏷️ Categorizing {len(mobs)} mobs by grade tier...")
     
+    # Grade every linked item at once: cached payloads first, then a search by
+    # item name, and only then the item page of what is still unknown
+    cursor.execute("""
+        SELECT nmi.named_mob_id, nmi.item_name, nmi.item_url
+        FROM named_mob_items nmi
+        JOIN named_mobs nm ON nm.id = nmi.named_mob_id
+        WHERE nm.special_drop_category IS NULL
+        ORDER BY nmi.named_mob_id, nmi.drop_order
+    """)
+    items_by_mob = {}
+    for mob_id, item_name, item_url in cursor.fetchall():
+        items_by_mob.setdefault(mob_id, []).append((item_name or '', code_from_url(item_url)))
+    resolver = GradeResolver()
+    grades = resolver.resolve(entry for items in items_by_mob.values() for entry in items if any(entry))
+    
     categories = {
         'initiate': 0,
         'adept': 0, 
@@ -76,7 +59,7 @@ def categorize_all_mobs():
     }
     
     for mob in mobs:
-        mob_id, name, level, item_urls, item_count = mob
+        mob_id, name, level, item_count = mob
         
         print(f"\n📍 {name} (Level: {level}, Items: {item_count})")
         
@@ -92,27 +75,23 @@ def categorize_all_mobs():
             category = 'radiant'
         
         # If mob has special items, check their grades to potentially upgrade category
-        if item_count > 0 and item_urls:
+        if item_count > 0:
             highest_grade = 'NG'  # No Grade
-            urls = item_urls.split(',') if item_urls else []
             
-            for url in urls[:3]:  # Check first 3 items to avoid too many requests
-                if url and url.strip():
-                    grade = get_item_grade_from_codex(url.strip())
+            # Graded in one batch above, so every item counts
+            for item_name, item_code in items_by_mob.get(mob_id, ()):
+                info = grades.get(item_code or item_name)
+                if info is not None:
+                    grade = info.grade or "Unknown"
                     print(f"    🔍 Item grade: {grade}")
                     
-                    # Grade hierarchy: NG < D < C < B < A < S
-                    grade_order = {'NG': 0, 'D': 1, 'C': 2, 'B': 3, 'A': 4, 'S': 5, 'Unknown': 0}
-                    if grade_order.get(grade, 0) > grade_order.get(highest_grade, 0):
+                    if GRADE_ORDER.get(grade, 0) > GRADE_ORDER.get(highest_grade, 0):
                         highest_grade = grade
-                
-                # Rate limiting
-                time.sleep(0.5)
             
             # Upgrade category based on highest item grade found
-            if highest_grade in ['B', 'A', 'S']:  # High grades = radiant tier
+            if highest_grade in ['B', 'A', 'S', 'Radiant']:  # High grades = radiant tier
                 category = 'radiant'
-            elif highest_grade in ['C']:  # Medium grade = adept tier
+            elif highest_grade in ['C', 'Adept']:  # Medium grade = adept tier
                 if category == 'initiate':  # Only upgrade from initiate
                     category = 'adept'
             # D and NG grades don't change the level-based category
@@ -132,6 +111,7 @@ def categorize_all_mobs():
     print(f"  - Initiate (0-9): {categories['initiate']} mobs")
     print(f"  - Adept (10-19): {categories['adept']} mobs") 
     print(f"  - Radiant (20+): {categories['radiant']} mobs")
+    print(f"🔎 {resolver.summary()}")
 
 def show_category_summary():
     """Show summary of all categories"""
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk cache for Ashes Codex responses (mob/item pages and search POSTs)
+Entries are keyed by URL (or URL + request body for POSTs), keep the ETag and
+Last-Modified validators, and are revalidated with conditional requests once
+their TTL has expired. Size-based eviction drops the least recently used bodies.
+
+Reads stay read-only: a hit only notes its access time in memory, and the
+touches are written in batches (with the next put, or every TOUCH_BATCH hits /
+TOUCH_INTERVAL seconds). The size budget is tracked as a running total, so the
+full eviction scan only runs when the total crosses it or every EVICT_EVERY
+puts (which also picks up growth from other processes).
+
+Configuration (environment):
+    CODEX_CACHE=0               disable the cache
+    CODEX_CACHE_PATH=...        cache database (default data/cache/codex_cache.sqlite)
+    CODEX_CACHE_TTL=...         seconds an entry is served without revalidation
+    CODEX_CACHE_MAX_MB=...      size budget before LRU eviction
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+DEFAULT_CACHE_PATH = 'data/cache/codex_cache.sqlite'
+DEFAULT_TTL = 6 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Entries not revalidated for this long are dropped during eviction
+MAX_STALE_AGE = 30 * 24 * 3600
+# Pending accessed_at touches are flushed after this many hits or seconds
+TOUCH_BATCH = 64
+TOUCH_INTERVAL = 30.0
+# Puts between full eviction scans while under the size budget
+EVICT_EVERY = 64
+
+
+def cache_key(method: str, url: str, body: Optional[bytes] = None) -> str:
+    """URL for GETs, method + URL + body hash for anything with a payload"""
+    if method == 'GET' and not body:
+        return url
+    digest = hashlib.sha256(body or b'').hexdigest()
+    return f"{method} {url} {digest}"
+
+
+class CacheEntry:
+    def __init__(self, key: str, url: str, status: int, headers: Dict[str, str], body: bytes,
+                 etag: Optional[str], last_modified: Optional[str], fetched_at: float):
+        self.key = key
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.fetched_at < ttl
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidation"""
+        headers = {}
+        if self.etag:
+            headers['if-none-match'] = self.etag
+        if self.last_modified:
+            headers['if-modified-since'] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """SQLite-backed response cache, safe to share between threads and processes"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> access time not yet written, and when the last flush happened
+        self._touched: Dict[str, float] = {}
+        self._flushed_at = time.monotonic()
+        self._puts = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS http_cache (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_accessed ON http_cache(accessed_at)")
+        self.conn.commit()
+        self._total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+
+    def _write_touches(self):
+        """Write pending accessed_at touches (lock held; the caller commits)"""
+        if self._touched:
+            self.conn.executemany("UPDATE http_cache SET accessed_at = ? WHERE key = ?",
+                                  [(accessed, key) for key, accessed in self._touched.items()])
+            self._touched.clear()
+        self._flushed_at = time.monotonic()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self.conn.execute("""
+                SELECT url, status, headers, body, etag, last_modified, fetched_at
+                FROM http_cache WHERE key = ?
+            """, (key,)).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = time.time()
+            if (len(self._touched) >= TOUCH_BATCH or
+                    time.monotonic() - self._flushed_at >= TOUCH_INTERVAL):
+                self._write_touches()
+                self.conn.commit()
+
+        url, status, headers, body, etag, last_modified, fetched_at = row
+        return CacheEntry(key, url, status, json.loads(headers), zlib.decompress(body),
+                          etag, last_modified, fetched_at)
+
+    def put(self, key: str, url: str, status: int, headers: Dict[str, str], body: bytes):
+        compressed = zlib.compress(body, 6)
+        now = time.time()
+        with self._lock:
+            self._touched.pop(key, None)
+            self._write_touches()
+            old = self.conn.execute("SELECT size FROM http_cache WHERE key = ?", (key,)).fetchone()
+            self.conn.execute("""
+                INSERT OR REPLACE INTO http_cache
+                (key, url, status, headers, body, etag, last_modified, fetched_at, accessed_at, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (key, url, status, json.dumps(headers), compressed, headers.get('etag'),
+                  headers.get('last-modified'), now, now, len(compressed)))
+            self.conn.commit()
+            self._total += len(compressed) - (old[0] if old else 0)
+            self._puts += 1
+            due = self._total > self.max_bytes or self._puts >= EVICT_EVERY
+        if due:
+            self.evict()
+
+    def mark_revalidated(self, key: str):
+        """Server answered 304 - the stored body is current again"""
+        now = time.time()
+        with self._lock:
+            self._touched.pop(key, None)
+            self.conn.execute("UPDATE http_cache SET fetched_at = ?, accessed_at = ? WHERE key = ?",
+                              (now, now, key))
+            self.conn.commit()
+
+    def evict(self):
+        """Drop long-stale entries, then least recently used ones until under the size budget"""
+        with self._lock:
+            # LRU order needs the pending touches; the scan also resyncs the running total
+            self._write_touches()
+            self._puts = 0
+            self.conn.execute("DELETE FROM http_cache WHERE fetched_at < ?", (time.time() - MAX_STALE_AGE,))
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+            if total > self.max_bytes:
+                rows = self.conn.execute("SELECT key, size FROM http_cache ORDER BY accessed_at").fetchall()
+                doomed = []
+                for key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    doomed.append((key,))
+                    total -= size
+                self.conn.executemany("DELETE FROM http_cache WHERE key = ?", doomed)
+            self._total = total
+            self.conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            self.conn.execute("DELETE FROM http_cache")
+            self.conn.commit()
+            self._total = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM http_cache").fetchone()
+        return {
+            'entries': entries,
+            'bytes': size,
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+        }
+
+    def flush(self):
+        """Write pending accessed_at touches now"""
+        with self._lock:
+            self._write_touches()
+            self.conn.commit()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self.conn.close()
+
+
+_default_cache: Optional[HttpCache] = None
+_default_lock = threading.Lock()
+_disabled = os.environ.get('CODEX_CACHE', '1') == '0'
+
+
+def get_cache() -> Optional[HttpCache]:
+    """Process-wide cache built from the environment, or None when disabled"""
+    global _default_cache
+    if _disabled:
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = HttpCache(
+                path=os.environ.get('CODEX_CACHE_PATH', DEFAULT_CACHE_PATH),
+                ttl=float(os.environ.get('CODEX_CACHE_TTL', DEFAULT_TTL)),
+                max_bytes=int(float(os.environ.get('CODEX_CACHE_MAX_MB', DEFAULT_MAX_BYTES / 2**20)) * 2**20),
+            )
+            # Hits only note their access time; write the last ones on exit
+            atexit.register(_default_cache.flush)
+        return _default_cache
+
+
+def set_cache(cache: Optional[HttpCache]):
+    """Override the process-wide cache (None disables caching)"""
+    global _default_cache, _disabled
+    with _default_lock:
+        _default_cache = cache
+        _disabled = cache is None
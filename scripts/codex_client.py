@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for all Ashes Codex traffic (pages, search API, CDN icons)
+Keeps keep-alive connections per host and runs requests concurrently on an
+asyncio front-end, instead of spawning one curl process per page.
+
+Sync usage (one-off lookups):
+    from codex_client import fetch_text, search_codex
+    html = fetch_text(mob_url('the-crier'))
+
+Streaming crawl usage (pages fetched concurrently while the caller parses):
+    for url, response in iter_fetch(urls, concurrency=4):
+        ...
+
+Page GETs and search POSTs go through the persistent cache in codex_cache.py,
+so re-runs only transfer pages that changed since the last crawl. Every request
+that does go out draws from the per-host token buckets in codex_ratelimit.py,
+which are shared by all scripts running at the same time.
+"""
+
+import asyncio
+import gzip
+import http.client
+import json
+import threading
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from codex_cache import cache_key, get_cache
+from codex_ratelimit import RateLimiter, get_limiter, is_throttle_status
+
+CODEX_BASE = "https://ashescodex.com"
+CODEX_API = "https://api.ashescodex.com"
+CODEX_CDN = "https://cdn.ashescodex.com"
+SEARCH_URL = f"{CODEX_API}/search"
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 15
+# Extra attempts after a 429/5xx, each one waiting out the limiter's backoff
+MAX_THROTTLE_RETRIES = 2
+
+DEFAULT_HEADERS = {
+    'accept': '*/*',
+    'accept-encoding': 'gzip, deflate',
+    'user-agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36',
+}
+
+API_HEADERS = {
+    'content-type': 'application/json',
+    'origin': CODEX_BASE,
+    'referer': f"{CODEX_BASE}/",
+}
+
+# Hosts whose responses go through the persistent cache (CDN icons are stored on disk anyway)
+CACHEABLE_HOSTS = {'ashescodex.com', 'api.ashescodex.com'}
+# Transport headers that no longer describe a decoded, cached body
+_UNCACHED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'connection')
+
+# Errors raised by http.client when a kept-alive socket was closed by the server
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+def mob_url(slug: str) -> str:
+    """Codex page URL for a mob slug"""
+    return f"{CODEX_BASE}/db/mob/{slug}"
+
+
+def item_url(item_code: str) -> str:
+    """Codex page URL for an item code"""
+    return f"{CODEX_BASE}/db/item/{item_code}"
+
+
+class CodexResponse:
+    """Minimal response object returned by the pool and the async client"""
+
+    def __init__(self, url: str, status: int, headers: Dict[str, str], body: bytes,
+                 from_cache: bool = False):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.content = body
+        self.from_cache = from_cache
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def __repr__(self):
+        return f"<CodexResponse {self.status} {self.url} ({len(self.content)} bytes)>"
+
+
+def _decode_body(body: bytes, encoding: str) -> bytes:
+    if not body:
+        return body
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    if encoding == 'deflate':
+        # "deflate" is meant to be zlib-wrapped, but some servers send raw deflate
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+
+class ConnectionPool:
+    """Thread-safe pool of keep-alive HTTP(S) connections, one idle list per host"""
+
+    def __init__(self, max_per_host: int = 8, timeout: float = DEFAULT_TIMEOUT):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._idle: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, key: Tuple[str, str], timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        """Return (connection, reused) - an idle connection if one exists, else a new one"""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+
+        scheme, host = key
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, timeout=timeout), False
+        return http.client.HTTPConnection(host, timeout=timeout), False
+
+    def _release(self, key: Tuple[str, str], conn: http.client.HTTPConnection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, method: str, url: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None,
+                timeout: Optional[float] = None) -> CodexResponse:
+        """Send one request over a pooled connection, retrying once on a stale socket"""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = parts.path or '/'
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        request_headers = dict(DEFAULT_HEADERS)
+        if headers:
+            request_headers.update(headers)
+
+        timeout = timeout or self.timeout
+        for attempt in range(2):
+            conn, reused = self._acquire(key, timeout)
+            try:
+                conn.request(method, path, body=body, headers=request_headers)
+                raw = conn.getresponse()
+                payload = raw.read()
+            except _STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            response_headers = {k.lower(): v for k, v in raw.getheaders()}
+            if raw.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+
+            payload = _decode_body(payload, response_headers.get('content-encoding', ''))
+            return CodexResponse(url, raw.status, response_headers, payload)
+
+        raise http.client.HTTPException(f"Could not send request to {url}")
+
+    def close(self):
+        with self._lock:
+            connections = [conn for idle in self._idle.values() for conn in idle]
+            self._idle.clear()
+        for conn in connections:
+            conn.close()
+
+
+def _is_cacheable(method: str, url: str) -> bool:
+    if method == 'POST':
+        return url == SEARCH_URL
+    return method == 'GET' and urlsplit(url).hostname in CACHEABLE_HOSTS
+
+
+def send_request(pool: ConnectionPool, method: str, url: str, body: Optional[bytes] = None,
+                 headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+                 use_cache: bool = True,
+                 limiter: Optional[RateLimiter] = None) -> CodexResponse:
+    """Serve fresh entries from the cache, otherwise go out through the shared rate limiter
+
+    Stale cache entries are revalidated with a conditional request and new 200s are
+    stored. Cache hits never wait on the limiter; 429/5xx answers are reported to
+    it (blocking the host for every process) and retried after the backoff.
+    """
+    cache = get_cache() if use_cache and _is_cacheable(method, url) else None
+    limiter = limiter or get_limiter()
+    host = urlsplit(url).hostname or ''
+    entry = None
+    request_headers = dict(headers or {})
+
+    if cache is not None:
+        key = cache_key(method, url, body)
+        entry = cache.get(key)
+        if entry is not None and entry.is_fresh(cache.ttl):
+            cache.hits += 1
+            return CodexResponse(url, entry.status, entry.headers, entry.body, from_cache=True)
+        if entry is not None:
+            request_headers.update(entry.validators())
+
+    for attempt in range(MAX_THROTTLE_RETRIES + 1):
+        limiter.acquire(host)
+        response = pool.request(method, url, body=body, headers=request_headers, timeout=timeout)
+        limiter.report(host, response.status, response.headers.get('retry-after'))
+        if not is_throttle_status(response.status):
+            break
+
+    if cache is not None:
+        if response.status == 304 and entry is not None:
+            cache.revalidated += 1
+            cache.mark_revalidated(key)
+            return CodexResponse(url, entry.status, entry.headers, entry.body, from_cache=True)
+        cache.misses += 1
+        if response.status == 200:
+            stored_headers = {k: v for k, v in response.headers.items() if k not in _UNCACHED_HEADERS}
+            cache.put(key, url, response.status, stored_headers, response.content)
+    return response
+
+
+class CodexClient:
+    """Asyncio client over a shared keep-alive pool with a concurrency limit
+
+    Blocking socket I/O runs on a thread pool of `concurrency` workers so that
+    many pages are in flight at once while callers await results. Pacing comes
+    from the cross-process limiter in codex_ratelimit.py.
+    """
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT,
+                 pool: Optional[ConnectionPool] = None, use_cache: bool = True,
+                 limiter: Optional[RateLimiter] = None):
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.use_cache = use_cache
+        self.limiter = limiter or get_limiter()
+        self.pool = pool or ConnectionPool(max_per_host=self.concurrency, timeout=timeout)
+        self._owns_pool = pool is None
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                            thread_name_prefix='codex-http')
+        self.errors = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _send(self, method: str, url: str, body: Optional[bytes],
+              headers: Optional[Dict[str, str]]) -> Optional[CodexResponse]:
+        try:
+            return send_request(self.pool, method, url, body=body, headers=headers,
+                                timeout=self.timeout, use_cache=self.use_cache,
+                                limiter=self.limiter)
+        except (OSError, http.client.HTTPException, zlib.error) as e:
+            self.errors += 1
+            print(f"    ❌ Request failed for {url}: {e}")
+            return None
+
+    async def request(self, method: str, url: str, body: Optional[bytes] = None,
+                      headers: Optional[Dict[str, str]] = None) -> Optional[CodexResponse]:
+        """Send a request; returns None on network errors"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._send, method, url, body, headers)
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[CodexResponse]:
+        return await self.request('GET', url, headers=headers)
+
+    async def head(self, url: str) -> Optional[CodexResponse]:
+        return await self.request('HEAD', url)
+
+    async def post_json(self, url: str, payload) -> Optional[CodexResponse]:
+        body = json.dumps(payload).encode('utf-8')
+        return await self.request('POST', url, body=body, headers=API_HEADERS)
+
+    async def search(self, query: str) -> Optional[list]:
+        """Query the Codex search API; returns the result list or None on failure"""
+        response = await self.post_json(SEARCH_URL, {"query": query, "resultType": None})
+        if response is None or response.status != 200:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    async def fetch_all(self, urls: Iterable[str]) -> List[Optional[CodexResponse]]:
+        """GET every URL concurrently, results in input order"""
+        return await asyncio.gather(*(self.get(url) for url in urls))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        if self._owns_pool:
+            self.pool.close()
+
+
+def iter_fetch(urls: Iterable[str],
+               concurrency: int = DEFAULT_CONCURRENCY) -> Iterator[Tuple[str, Optional[CodexResponse]]]:
+    """Yield (url, response) in input order while the next pages download in the background
+
+    At most `concurrency * 2` responses are buffered, so memory stays flat over long crawls.
+    """
+    loop = asyncio.new_event_loop()
+    client = CodexClient(concurrency=concurrency)
+    pending = deque()
+    url_iter = iter(urls)
+    window = client.concurrency * 2
+
+    def schedule(batch):
+        for url in batch:
+            pending.append((url, loop.create_task(client.get(url))))
+
+    try:
+        schedule(islice(url_iter, window))
+        while pending:
+            url, task = pending.popleft()
+            response = loop.run_until_complete(task)
+            schedule(islice(url_iter, 1))
+            yield url, response
+    finally:
+        for _, task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(asyncio.gather(*(t for _, t in pending), return_exceptions=True))
+        client.close()
+        loop.close()
+
+
+def fetch_all(urls: Iterable[str],
+              concurrency: int = DEFAULT_CONCURRENCY) -> List[Optional[CodexResponse]]:
+    """Fetch every URL concurrently from sync code, results in input order"""
+    return [response for _, response in iter_fetch(urls, concurrency=concurrency)]
+
+
+# Shared pool for sequential scripts so consecutive calls reuse the same TLS connection
+_shared_pool: Optional[ConnectionPool] = None
+_shared_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = ConnectionPool()
+        return _shared_pool
+
+
+def fetch(url: str, method: str = 'GET', body: Optional[bytes] = None,
+          headers: Optional[Dict[str, str]] = None, timeout: float = DEFAULT_TIMEOUT,
+          use_cache: bool = True) -> Optional[CodexResponse]:
+    """Blocking request over the shared keep-alive pool; returns None on network errors"""
+    try:
+        return send_request(get_pool(), method, url, body=body, headers=headers,
+                            timeout=timeout, use_cache=use_cache)
+    except (OSError, http.client.HTTPException, zlib.error) as e:
+        print(f"    ❌ Request failed for {url}: {e}")
+        return None
+
+
+def fetch_text(url: str, timeout: float = DEFAULT_TIMEOUT) -> Optional[str]:
+    """Page body as text, or None unless the server answered 200"""
+    response = fetch(url, timeout=timeout)
+    if response is None or response.status != 200:
+        return None
+    return response.text
+
+
+def fetch_bytes(url: str, timeout: float = DEFAULT_TIMEOUT) -> Optional[bytes]:
+    """Raw body (icons), or None unless the server answered 200"""
+    response = fetch(url, timeout=timeout)
+    if response is None or response.status != 200:
+        return None
+    return response.content
+
+
+def post_json(url: str, payload, timeout: float = DEFAULT_TIMEOUT) -> Optional[CodexResponse]:
+    body = json.dumps(payload).encode('utf-8')
+    return fetch(url, method='POST', body=body, headers=API_HEADERS, timeout=timeout)
+
+
+def search_codex(query: str, timeout: float = DEFAULT_TIMEOUT) -> Optional[list]:
+    """Query the Codex search API; returns the result list or None on failure"""
+    response = post_json(SEARCH_URL, {"query": query, "resultType": None}, timeout=timeout)
+    if response is None or response.status != 200:
+        return None
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def print_throughput():
+    """Per-host request rate for this process against its budget, plus cache effectiveness"""
+    stats = get_limiter().stats()
+    if stats:
+        print("📈 Codex throughput:")
+        for host, host_stats in sorted(stats.items()):
+            print(f"  - {host}: {host_stats['requests']} requests, "
+                  f"{host_stats['req_per_s']}/s (budget {host_stats['budget_per_s']}/s), "
+                  f"{host_stats['throttled']} throttled, waited {host_stats['waited_s']}s")
+    cache = get_cache()
+    if cache is not None:
+        cache_stats = cache.stats()
+        print(f"  - cache: {cache_stats['hits']} hits, {cache_stats['revalidated']} revalidated, "
+              f"{cache_stats['misses']} misses")
@@ -14,6 +14,13 @@ The system is designed to:
 3. Detect changes in Codex data (respawn times, locations, etc.)
 4. Generate import reports for review
 5. Handle incremental updates without data loss
+
+Records are streamed from a snapshot file or the live Codex crawl (codex_source.py).
+
+Usage:
+    python3 scripts/codex_staging.py --migrate     # once, before the first import (backs up the database)
+    python3 scripts/codex_import_system.py --source file --input data/named-mobs/named_mobs.json --dry-run
+    python3 scripts/codex_import_system.py --source api
 """
 
 import sqlite3
@@ -21,14 +28,19 @@ import json
 import requests
 import sys
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 import argparse
 
+from codex_snapshots import ArchivedSource, SnapshotArchive
+from codex_source import DEFAULT_SNAPSHOT, open_source
+from codex_staging import diff_staging, require_import_schema, stage_records, upsert_staged
+
 class CodexImportSystem:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.conn = None
         self.import_log = []
+        self.changed_mobs = []
         
     def connect_db(self):
         """Connect to the database."""
@@ -89,128 +101,56 @@ class CodexImportSystem:
             'custom_items': custom_items
         }
         
-    def detect_changes(self, codex_data: List[Dict], local_data: Dict) -> Dict:
-        """Detect changes between Codex and local data."""
-        changes = {
-            'new_mobs': [],
-            'updated_respawn_times': [],
-            'updated_locations': [],
-            'removed_mobs': []
-        }
-        
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT name, respawn_time, location_x, location_y FROM named_mobs")
-        local_mobs = {row['name']: dict(row) for row in cursor.fetchall()}
-        
-        codex_mob_names = {mob['name'] for mob in codex_data}
-        local_mob_names = set(local_mobs.keys())
-        
-        # New mobs in Codex
-        changes['new_mobs'] = [mob for mob in codex_data if mob['name'] not in local_mob_names]
-        
-        # Removed mobs (in local but not in Codex)
-        changes['removed_mobs'] = list(local_mob_names - codex_mob_names)
-        
-        # Updated data
-        for mob in codex_data:
-            if mob['name'] in local_mobs:
-                local_mob = local_mobs[mob['name']]
-                
-                # Check respawn time changes
-                if mob.get('respawn_time') != local_mob['respawn_time']:
-                    changes['updated_respawn_times'].append({
-                        'name': mob['name'],
-                        'old': local_mob['respawn_time'],
-                        'new': mob.get('respawn_time')
-                    })
-                    
-                # Check location changes
-                if (mob.get('location_x') != local_mob['location_x'] or 
-                    mob.get('location_y') != local_mob['location_y']):
-                    changes['updated_locations'].append({
-                        'name': mob['name'],
-                        'old': [local_mob['location_x'], local_mob['location_y']],
-                        'new': [mob.get('location_x'), mob.get('location_y')]
-                    })
+    def detect_changes(self, codex_data: Optional[Iterable[Dict]] = None, local_data: Dict = None) -> Dict:
+        """Detect changes between Codex and local data.
         
+        `codex_data` is bulk-loaded into the staging table first when given; the
+        change sets are computed by SQL joins against named_mobs (codex_staging.py).
+        """
+        if codex_data is not None:
+            stage_records(self.conn, codex_data)
+        changes = diff_staging(self.conn)
+        self.changed_mobs = changes.pop('changed_mobs')
         return changes
         
-    def import_mob_data(self, codex_data: List[Dict], preserve_local: bool = True):
-        """Import mob data while preserving local modifications."""
+    def import_mob_data(self, codex_data: Iterable[Dict], preserve_local: bool = True):
+        """Import mob data while preserving local modifications.
+        
+        `codex_data` is consumed as a stream (see codex_source.py) into the staging
+        table and applied with one INSERT ... ON CONFLICT DO UPDATE that only
+        writes new or changed mobs, in one transaction.
+        """
+        require_import_schema(self.conn)
         preserved = self.get_local_preservations() if preserve_local else {'triangulated_coords': {}, 'custom_items': {}}
-        changes = self.detect_changes(codex_data, preserved)
+        count = stage_records(self.conn, codex_data)
+        changes = self.detect_changes()
         
-        self.log(f"Starting import of {len(codex_data)} named mobs")
+        self.log(f"Starting import of {count} named mobs from {getattr(codex_data, 'label', 'Codex data')}")
         self.log(f"Preserving {len(preserved['triangulated_coords'])} triangulated coordinates")
         self.log(f"Preserving {len(preserved['custom_items'])} custom item sets")
         
+        # Preserved columns are never part of the upsert's SET list
+        for mob in self.changed_mobs:
+            if mob['name'] in preserved['triangulated_coords']:
+                self.log(f"Preserving triangulated coords for {mob['name']}")
+                
+        written = upsert_staged(self.conn)
+        for mob in changes['new_mobs']:
+            self.log(f"Added new mob: {mob['name']}")
+        
         # Report changes
+        self.log(f"Wrote {written} rows ({len(changes['new_mobs'])} new, {len(self.changed_mobs)} changed, "
+                 f"{changes['unchanged']} unchanged)")
         if changes['new_mobs']:
             self.log(f"Found {len(changes['new_mobs'])} new mobs")
+        if changes['renamed_mobs']:
+            self.log(f"Found {len(changes['renamed_mobs'])} renamed mobs")
         if changes['updated_respawn_times']:
             self.log(f"Found {len(changes['updated_respawn_times'])} respawn time changes")
         if changes['updated_locations']:
             self.log(f"Found {len(changes['updated_locations'])} location changes")
         if changes['removed_mobs']:
             self.log(f"Found {len(changes['removed_mobs'])} removed mobs", "WARNING")
-            
-        cursor = self.conn.cursor()
-        
-        for mob in codex_data:
-            # Check if mob exists
-            cursor.execute("SELECT id FROM named_mobs WHERE name = ?", (mob['name'],))
-            existing = cursor.fetchone()
-            
-            if existing:
-                # Update existing mob, preserving local data
-                mob_id = existing['id']
-                
-                # Prepare update data
-                update_data = {
-                    'level': mob.get('level'),
-                    'level_range': mob.get('level_range'),
-                    'respawn_time': mob.get('respawn_time'),
-                    'respawn_minutes': mob.get('respawn_minutes'),
-                    'codex_url': mob.get('codex_url'),
-                    'location_x': mob.get('location_x'),
-                    'location_y': mob.get('location_y'),
-                    'location_z': mob.get('location_z'),
-                    'updated_at': datetime.now().isoformat()
-                }
-                
-                # Preserve triangulated coordinates
-                if mob['name'] in preserved['triangulated_coords']:
-                    coords = preserved['triangulated_coords'][mob['name']]
-                    update_data.update(coords)
-                    self.log(f"Preserving triangulated coords for {mob['name']}")
-                
-                # Build update query
-                set_clause = ', '.join([f"{k} = ?" for k in update_data.keys()])
-                values = list(update_data.values()) + [mob_id]
-                
-                cursor.execute(f"UPDATE named_mobs SET {set_clause} WHERE id = ?", values)
-                
-            else:
-                # Insert new mob
-                cursor.execute("""
-                    INSERT INTO named_mobs 
-                    (name, slug, level, level_range, respawn_time, respawn_minutes, 
-                     codex_url, location_x, location_y, location_z, type)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    mob['name'],
-                    mob.get('slug'),
-                    mob.get('level'),
-                    mob.get('level_range'),
-                    mob.get('respawn_time'),
-                    mob.get('respawn_minutes'),
-                    mob.get('codex_url'),
-                    mob.get('location_x'),
-                    mob.get('location_y'),
-                    mob.get('location_z'),
-                    'named_mob'
-                ))
-                self.log(f"Added new mob: {mob['name']}")
         
         self.conn.commit()
         self.log("Import completed successfully")
@@ -232,6 +172,12 @@ class CodexImportSystem:
                 report.append(f"  + {mob['name']} (Level {mob.get('level', '?')})")
             report.append("")
             
+        if changes['renamed_mobs']:
+            report.append(f"RENAMED MOBS ({len(changes['renamed_mobs'])}):")
+            for change in changes['renamed_mobs']:
+                report.append(f"  ~ {change['old']} → {change['new']} ({change['slug']})")
+            report.append("")
+            
         if changes['updated_respawn_times']:
             report.append(f"RESPAWN TIME CHANGES ({len(changes['updated_respawn_times'])}):")
             for change in changes['updated_respawn_times']:
@@ -250,6 +196,9 @@ class CodexImportSystem:
                 report.append(f"  - {mob_name}")
             report.append("")
             
+        report.append(f"UNCHANGED MOBS: {changes.get('unchanged', 0)}")
+        report.append("")
+            
         report.append("PRESERVED LOCAL DATA:")
         report.append(f"  ✓ Triangulated coordinates preserved")
         report.append(f"  ✓ Custom special items preserved") 
@@ -260,9 +209,11 @@ class CodexImportSystem:
 def main():
     parser = argparse.ArgumentParser(description='Import Codex data flexibly')
     parser.add_argument('--source', choices=['file', 'api'], default='file',
-                       help='Data source: file (JSON) or api (direct Codex)')
-    parser.add_argument('--input', type=str, 
-                       help='Input file path (for file source)')
+                       help='Data source: file (NDJSON/JSON snapshot) or api (live Codex crawl)')
+    parser.add_argument('--input', type=str, default=DEFAULT_SNAPSHOT,
+                       help=f'Input file path (for file source, default: {DEFAULT_SNAPSHOT})')
+    parser.add_argument('--archive', action='store_true',
+                       help='Archive the records as a versioned snapshot (always done for --source api)')
     parser.add_argument('--dry-run', action='store_true',
                        help='Show what would be imported without making changes')
     parser.add_argument('--report-only', action='store_true',
@@ -283,23 +234,13 @@ def main():
             print(f"Custom items: {len(preserved['custom_items'])}")
             return
             
-        # Example usage with dummy data for now
-        # In the future, this would fetch from Codex API or read from JSON export
-        example_codex_data = [
-            {
-                'name': 'Forgelord Zammer',
-                'level': 25,
-                'respawn_time': '30-45 minutes',
-                'respawn_minutes': 30,
-                'codex_url': 'https://ashescodex.com/db/mob/forgelord-zammer',
-                'location_x': -123456.789,
-                'location_y': 654321.123,
-                'location_z': 100.0
-            }
-        ]
+        # Records are read lazily; mob data only, drop lists are not imported here
+        codex_data = open_source(args.source, args.input, with_drops=False)
+        if args.source == 'api' or args.archive:
+            codex_data = ArchivedSource(codex_data, SnapshotArchive())
         
         if not args.dry_run:
-            changes = importer.import_mob_data(example_codex_data)
+            changes = importer.import_mob_data(codex_data)
             report = importer.generate_import_report(changes)
             print(report)
             
@@ -308,7 +249,7 @@ def main():
                 f.write(report)
         else:
             print("DRY RUN - No changes made")
-            changes = importer.detect_changes(example_codex_data, importer.get_local_preservations())
+            changes = importer.detect_changes(codex_data)
             report = importer.generate_import_report(changes)
             print(report)
             
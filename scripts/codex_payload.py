@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Shared parser for the loot payload embedded in Ashes Codex mob pages
+SvelteKit ships the mob data as a JSON string inside the page
+(`"body":"{\"data\":{...,\"_loot\":[...]}}"`). This module finds that
+string with a linear scan, unescapes it in the same pass with the JSON string
+decoder (not chained str.replace calls), then walks _loot ->
+rewardDefContainers -> rewards -> itemRewards without recursion.
+
+orjson is used for decoding when installed (pip install orjson); the stdlib
+json module is the fallback. Set CODEX_JSON=json to force the stdlib backend.
+"""
+
+import json
+import os
+from json.decoder import scanstring
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BODY_MARKER = '"body":"'
+
+if orjson is not None and os.environ.get('CODEX_JSON', 'orjson') != 'json':
+    JSON_BACKEND = 'orjson'
+    _loads = orjson.loads
+else:
+    JSON_BACKEND = 'json'
+    _loads = json.loads
+
+
+def set_backend(name: str):
+    """Switch the JSON backend ('orjson' or 'json'), mainly for benchmarking"""
+    global JSON_BACKEND, _loads
+    if name == 'orjson':
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+        _loads = orjson.loads
+    elif name == 'json':
+        _loads = json.loads
+    else:
+        raise ValueError(f"unknown JSON backend: {name}")
+    JSON_BACKEND = name
+
+
+def iter_payload_bodies(content: str) -> Iterator[str]:
+    """Decoded `"body":"..."` strings in page order
+
+    scanstring (C-accelerated in CPython) finds the closing quote and resolves
+    every escape in the same pass, so each body is read exactly once.
+    """
+    pos = 0
+    while True:
+        marker = content.find(BODY_MARKER, pos)
+        if marker == -1:
+            return
+        try:
+            body, pos = scanstring(content, marker + len(BODY_MARKER))
+        except ValueError:
+            return
+        yield body
+
+
+def parse_page(content: str) -> Optional[dict]:
+    """Decoded payload of the first fetched body that carries loot data, or None"""
+    for body in iter_payload_bodies(content):
+        if '"_loot"' not in body:
+            continue
+        try:
+            data = _loads(body)
+        except ValueError:
+            continue
+        if isinstance(data, dict) and isinstance(data.get('data'), dict):
+            return data
+    return None
+
+
+class LootReward:
+    """One item entry of a loot table with its drop chance within its container"""
+    __slots__ = ('table', 'item', 'name', 'code', 'guid', 'min_rarity', 'drop_chance')
+
+    def __init__(self, table: str, item: dict, drop_chance: str):
+        self.table = table
+        self.item = item
+        self.name = item.get('itemName', 'Unknown')
+        self.code = item.get('name', '')
+        self.guid = item.get('guid', '')
+        try:
+            self.min_rarity = int(item.get('minRarity', '1'))
+        except (TypeError, ValueError):
+            self.min_rarity = 1
+        self.drop_chance = drop_chance
+
+    @property
+    def url(self) -> str:
+        return f"https://ashescodex.com/db/item/{self.code}" if self.code else ""
+
+
+def table_rewards(table: dict) -> List[LootReward]:
+    """Flatten rewardDefContainers -> rewards -> itemRewards of one loot table"""
+    table_name = table.get('name', '')
+    rewards = []
+    for container in table.get('rewardDefContainers') or ():
+        weights = container.get('weightsPerReward') or []
+        total_weight = sum(weights)
+        for i, reward in enumerate(container.get('rewards') or ()):
+            if i < len(weights) and total_weight > 0:
+                drop_chance = f"{weights[i] / total_weight * 100:.1f}%"
+            else:
+                drop_chance = "Unknown"
+            for item_reward in reward.get('itemRewards') or ():
+                item = item_reward.get('item')
+                if item:
+                    rewards.append(LootReward(table_name, item, drop_chance))
+    return rewards
+
+
+def loot_tables(data: Optional[dict]) -> Iterator[Tuple[str, List[LootReward]]]:
+    """(table name, rewards) for every loot table of a page payload"""
+    if not data:
+        return
+    for table in data.get('data', {}).get('_loot') or ():
+        yield table.get('name', ''), table_rewards(table)
+
+
+def named_loot_tables(data: Optional[dict], marker: str = '_Named') -> Iterator[Tuple[str, List[LootReward]]]:
+    """(table name, rewards) for every loot table whose name contains `marker`"""
+    for table_name, rewards in loot_tables(data):
+        if marker in table_name:
+            yield table_name, rewards
+
+
+def walk_loot_tables(root, marker: str = '_Named', debug: bool = False) -> Iterator[Tuple[Optional[str], dict]]:
+    """Yield (path, table) for every dict anywhere under `root` whose name contains `marker`
+
+    Iterative depth-first walk in document order with an explicit stack. Like
+    the recursive search it replaces, matched tables and item dicts are still
+    descended into (a matched table is yielded before its children); only
+    scalars are never pushed. Paths like `.nodes[1].data._loot[3]` are only
+    built when debug is set; otherwise the path is None.
+    """
+    stack = [root]
+    paths = [''] if debug else None
+    while stack:
+        obj = stack.pop()
+        path = paths.pop() if debug else None
+        if isinstance(obj, dict):
+            name = obj.get('name')
+            if isinstance(name, str) and marker in name:
+                yield path, obj
+            for key, value in reversed(obj.items()):
+                if isinstance(value, (dict, list)):
+                    stack.append(value)
+                    if debug:
+                        paths.append(f"{path}.{key}")
+        elif debug:
+            for i in range(len(obj) - 1, -1, -1):
+                value = obj[i]
+                if isinstance(value, (dict, list)):
+                    stack.append(value)
+                    paths.append(f"{path}[{i}]")
+        else:
+            for value in reversed(obj):
+                if isinstance(value, (dict, list)):
+                    stack.append(value)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Cross-process token-bucket rate limiter for Ashes Codex traffic
+Bucket state lives in a small SQLite file, so every script running on the
+machine draws from the same per-host budget instead of each one sleeping on
+its own. 429 and 5xx answers put the host into exponential backoff (honouring
+Retry-After), which all processes then observe.
+
+Configuration (environment):
+    CODEX_LIMITER_PATH=...          bucket database (default data/cache/codex_ratelimit.sqlite)
+    CODEX_RATE_LIMITS=host=rate[/burst],...
+                                    override budgets, e.g. "ashescodex.com=1/2,cdn.ashescodex.com=10"
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+DEFAULT_LIMITER_PATH = 'data/cache/codex_ratelimit.sqlite'
+
+# Requests per second and burst size per host
+HOST_BUDGETS: Dict[str, Tuple[float, int]] = {
+    'ashescodex.com': (2.0, 4),
+    'api.ashescodex.com': (2.0, 4),
+    'cdn.ashescodex.com': (8.0, 16),
+}
+
+BACKOFF_START = 2.0
+BACKOFF_MAX = 120.0
+
+
+def is_throttle_status(status: int) -> bool:
+    """Answers that mean the server wants us to slow down"""
+    return status == 429 or status >= 500
+
+
+def _parse_budgets(spec: str) -> Dict[str, Tuple[float, int]]:
+    budgets = {}
+    for part in spec.split(','):
+        if '=' not in part:
+            continue
+        host, value = part.split('=', 1)
+        rate, _, burst = value.partition('/')
+        rate = float(rate)
+        budgets[host.strip()] = (rate, int(burst) if burst else max(1, int(rate * 2)))
+    return budgets
+
+
+class HostCounters:
+    """Per-process throughput counters for one host"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.requests / elapsed if elapsed > 0 else 0.0
+
+
+class RateLimiter:
+    """Token buckets shared between processes through SQLite row locks"""
+
+    def __init__(self, path: str = DEFAULT_LIMITER_PATH,
+                 budgets: Optional[Dict[str, Tuple[float, int]]] = None):
+        self.path = path
+        self.budgets = dict(HOST_BUDGETS)
+        if budgets:
+            self.budgets.update(budgets)
+        self.counters: Dict[str, HostCounters] = {}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                host TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                blocked_until REAL NOT NULL DEFAULT 0,
+                backoff REAL NOT NULL DEFAULT 0
+            )
+        """)
+
+    def _counters(self, host: str) -> HostCounters:
+        counters = self.counters.get(host)
+        if counters is None:
+            counters = self.counters[host] = HostCounters()
+        return counters
+
+    def _take(self, host: str, rate: float, burst: int) -> float:
+        """Try to take one token; returns 0 on success or the seconds to wait"""
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT tokens, updated_at, blocked_until FROM buckets WHERE host = ?", (host,)
+                ).fetchone()
+                if row is None:
+                    tokens, blocked_until = float(burst), 0.0
+                else:
+                    tokens, updated_at, blocked_until = row
+                    tokens = min(float(burst), tokens + max(0.0, now - updated_at) * rate)
+
+                if now < blocked_until:
+                    wait = blocked_until - now
+                elif tokens >= 1.0:
+                    tokens -= 1.0
+                    wait = 0.0
+                else:
+                    wait = (1.0 - tokens) / rate
+
+                self.conn.execute("""
+                    INSERT INTO buckets (host, tokens, updated_at, blocked_until)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(host) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at
+                """, (host, tokens, now, blocked_until))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def acquire(self, host: str):
+        """Block until `host` has budget for one more request (no-op for unknown hosts)"""
+        budget = self.budgets.get(host)
+        if budget is None:
+            return
+        rate, burst = budget
+        counters = self._counters(host)
+        while True:
+            wait = self._take(host, rate, burst)
+            if wait <= 0:
+                counters.requests += 1
+                return
+            counters.waited += wait
+            time.sleep(wait)
+
+    def report(self, host: str, status: int, retry_after: Optional[str] = None):
+        """Feed the response status back: throttle answers block the host for everyone"""
+        if host not in self.budgets:
+            return
+        throttled = is_throttle_status(status)
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT backoff FROM buckets WHERE host = ?", (host,)).fetchone()
+                backoff = row[0] if row else 0.0
+                if throttled:
+                    backoff = min(BACKOFF_MAX, backoff * 2 if backoff else BACKOFF_START)
+                    delay = backoff
+                    if retry_after and retry_after.isdigit():
+                        delay = max(delay, float(retry_after))
+                    self.conn.execute("""
+                        INSERT INTO buckets (host, tokens, updated_at, blocked_until, backoff)
+                        VALUES (?, 0, ?, ?, ?)
+                        ON CONFLICT(host) DO UPDATE SET tokens = 0, updated_at = excluded.updated_at,
+                            blocked_until = MAX(blocked_until, excluded.blocked_until), backoff = excluded.backoff
+                    """, (host, now, now + delay, backoff))
+                elif backoff:
+                    self.conn.execute("UPDATE buckets SET backoff = 0 WHERE host = ?", (host,))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        if throttled:
+            self._counters(host).throttled += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-host throughput for this process"""
+        return {
+            host: {
+                'requests': c.requests,
+                'throttled': c.throttled,
+                'waited_s': round(c.waited, 2),
+                'req_per_s': round(c.rate(), 2),
+                'budget_per_s': self.budgets[host][0],
+            }
+            for host, c in self.counters.items()
+        }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_lock = threading.Lock()
+
+
+def get_limiter() -> RateLimiter:
+    """Process-wide limiter built from the environment"""
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter(
+                path=os.environ.get('CODEX_LIMITER_PATH', DEFAULT_LIMITER_PATH),
+                budgets=_parse_budgets(os.environ.get('CODEX_RATE_LIMITS', '')),
+            )
+        return _default_limiter
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Batched Codex search resolver
+Resolves a whole list of item names against the Codex search API at once:
+the union of every name's query variants is de-duplicated, run concurrently
+(paced by the shared rate limiter) and memoized, and every name is matched
+against one combined index of all results seen so far. Variants are sent in
+waves, so names that already matched never cost another request. Every icon
+path seen in a result is fed to the learned icon index (icon_index.py).
+"""
+
+import asyncio
+from typing import Callable, Dict, Iterable, List, Optional
+
+from codex_client import DEFAULT_CONCURRENCY, CodexClient
+from icon_index import game_path_to_cdn_url, get_icon_index
+
+
+def search_variants(item_name: str) -> List[str]:
+    """Queries to try for a name, most specific first, without duplicates"""
+    words = item_name.split()
+    variants = [
+        item_name,  # Full name
+        item_name.replace("'", ""),  # No apostrophes
+        item_name.replace("'", " "),  # Apostrophes as spaces
+        " ".join(words[:2]),  # First 2 words
+        " ".join(words[:3]),  # First 3 words
+        item_name.split("'s")[0] if "'s" in item_name else item_name,  # Remove possessive
+    ]
+    unique = []
+    for variant in variants:
+        variant = " ".join(variant.split())
+        if variant and variant not in unique:
+            unique.append(variant)
+    return unique
+
+
+def _loose(name: str) -> str:
+    return name.lower().replace("'", "")
+
+
+def has_icon(item: dict) -> bool:
+    icon = item.get('icon', '')
+    return bool(icon) and icon != "None"
+
+
+def icon_to_cdn_url(icon_path: str) -> Optional[str]:
+    """Convert a game icon path to its 64px CDN URL
+
+    /Game/UI/Icons/Items/Gear/.../TUI_Icon_X.TUI_Icon_X -> https://cdn.ashescodex.com/UI/Icons/Items/Gear/.../TUI_Icon_X_64.webp
+    """
+    return game_path_to_cdn_url(icon_path)
+
+
+class SearchMatch:
+    def __init__(self, item: dict, query: str, exact: bool):
+        self.item = item
+        self.query = query
+        self.exact = exact
+
+    @property
+    def name(self) -> str:
+        return self.item.get('itemName', '')
+
+    @property
+    def cdn_url(self) -> Optional[str]:
+        return icon_to_cdn_url(self.item.get('icon', ''))
+
+
+class SearchResolver:
+    """Memoized, batched name -> search result resolution
+
+    require_icon only accepts results with a usable icon path (icon downloads);
+    without it any item result counts (grade lookups). exact_only disables the
+    substring fallback, so every variant is tried for an exact name.
+    """
+
+    def __init__(self, variants: Callable[[str], List[str]] = search_variants,
+                 concurrency: int = DEFAULT_CONCURRENCY, require_icon: bool = False,
+                 exact_only: bool = False):
+        self.variants = variants
+        self.concurrency = concurrency
+        self.require_icon = require_icon
+        self.exact_only = exact_only
+        # query -> result list (None when the request failed)
+        self.results: Dict[str, Optional[list]] = {}
+        # itemName -> (item, query that returned it)
+        self.index: Dict[str, tuple] = {}
+        self.requests = 0
+
+    def _accept(self, item: dict) -> bool:
+        return item.get('type') == 'item' and (not self.require_icon or has_icon(item))
+
+    def _add_results(self, query: str, results: Optional[list]):
+        self.results[query] = results
+        for result in results or []:
+            item = result.get('item', {})
+            if self._accept(item):
+                self.index.setdefault(item.get('itemName', ''), (item, query))
+
+    async def _run(self, queries: List[str]):
+        async with CodexClient(concurrency=self.concurrency) as client:
+            results = await asyncio.gather(*(client.search(query) for query in queries))
+        for query, result in zip(queries, results):
+            self._add_results(query, result)
+        # Every confirmed icon path teaches the icon index, in one transaction per wave
+        get_icon_index().learn_game_paths(
+            (item.get('name', ''), item.get('icon', ''))
+            for result in results for item in (entry.get('item', {}) for entry in result or [])
+            if has_icon(item))
+
+    def prefetch(self, queries: Iterable[str]):
+        """Run every query not yet memoized, concurrently"""
+        pending = []
+        for query in queries:
+            if query not in self.results and query not in pending:
+                pending.append(query)
+        if pending:
+            self.requests += len(pending)
+            asyncio.run(self._run(pending))
+
+    def _close_match(self, item_name: str, queries: List[str]) -> Optional[SearchMatch]:
+        if self.exact_only:
+            return None
+        wanted = _loose(item_name)
+        for query in queries:
+            for result in self.results.get(query) or []:
+                item = result.get('item', {})
+                if not self._accept(item):
+                    continue
+                found = _loose(item.get('itemName', ''))
+                if found and (wanted in found or found in wanted):
+                    return SearchMatch(item, query, exact=False)
+        return None
+
+    def resolve(self, item_names: Iterable[str]) -> Dict[str, Optional[SearchMatch]]:
+        """Match every name; exact names anywhere in the combined index win over close matches"""
+        plans = {name: self.variants(name) for name in item_names}
+        matches: Dict[str, Optional[SearchMatch]] = {name: None for name in plans}
+        unresolved = list(plans)
+        depth = 0
+        while unresolved:
+            still = []
+            for name in unresolved:
+                if name in self.index:
+                    item, query = self.index[name]
+                    matches[name] = SearchMatch(item, query, exact=True)
+                elif depth < len(plans[name]):
+                    still.append(name)
+            if not still:
+                break
+
+            self.prefetch(plans[name][depth] for name in still)
+
+            unresolved = []
+            for name in still:
+                if name in self.index:
+                    item, query = self.index[name]
+                    matches[name] = SearchMatch(item, query, exact=True)
+                    continue
+                match = self._close_match(name, plans[name][:depth + 1])
+                if match is not None:
+                    matches[name] = match
+                else:
+                    unresolved.append(name)
+            depth += 1
+        return matches
+
+    def resolve_one(self, item_name: str) -> Optional[SearchMatch]:
+        return self.resolve([item_name])[item_name]
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Versioned Codex snapshot archive
+data/named-mobs/*.json are overwritten by every export, so the only history
+of the Codex data used to be the text reports in data/import_reports/. Every
+crawl (or imported snapshot file) can instead be archived as an immutable,
+compressed snapshot of importer records (see codex_source.py):
+
+    data/named-mobs/snapshots/
+        manifest.json                        {"version": 1, "snapshots": [{id, file, index,
+                                              created_at, source, codec, records, sha256}, ...]}
+        20250916-140224.ndjson.zst           NDJSON sorted by slug, written as independently
+                                             compressed chunks of CHUNK_RECORDS records
+        20250916-140224.index.json           {"chunks": [{offset, length, first, last}],
+                                              "slugs": {slug: chunk number}}
+
+Chunks are plain zstd frames / gzip members / xz streams, so a snapshot also
+decompresses as a whole with the usual tools, while a lookup by slug only
+reads and decompresses one chunk. zstd is used when the zstandard package is
+installed, gzip otherwise (--codec xz for smaller, slower archives). A crawl
+identical to the latest snapshot is not stored again. Records are sorted in
+bounded memory (sorted runs spilled to temporary files, then merged), so
+archiving a streamed crawl does not hold it in memory.
+
+Diffs and histories only read the archive, never the live database.
+
+Usage:
+    python3 scripts/codex_snapshots.py archive [--source file|api] [--input path]
+    python3 scripts/codex_snapshots.py list
+    python3 scripts/codex_snapshots.py show <slug> [--snapshot latest]
+    python3 scripts/codex_snapshots.py diff [previous] [latest] [--field respawn_time] [--json]
+    python3 scripts/codex_snapshots.py history <slug> [--field respawn_time]
+"""
+
+import argparse
+import gzip
+import hashlib
+import heapq
+import itertools
+import json
+import lzma
+import os
+import sys
+import tempfile
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from codex_source import DEFAULT_SNAPSHOT, open_source
+from codex_staging import RECORD_COLUMNS
+
+DEFAULT_ARCHIVE_DIR = 'data/named-mobs/snapshots'
+MANIFEST_NAME = 'manifest.json'
+CHUNK_RECORDS = 64
+SPILL_RECORDS = 4096  # records held in memory while sorting, see SnapshotWriter
+ZSTD_LEVEL = 10
+CODEC_EXTENSIONS = {'zst': 'zst', 'gzip': 'gz', 'xz': 'xz'}
+
+
+def default_codec() -> str:
+    return 'zst' if zstandard is not None else 'gzip'
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == 'zst':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if codec == 'xz':
+        return lzma.compress(data, preset=6)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == 'zst':
+        if zstandard is None:
+            raise RuntimeError("zstd snapshot: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if codec == 'xz':
+        return lzma.decompress(data)
+    return gzip.decompress(data)
+
+
+def record_key(mob: dict) -> str:
+    """Archive key of a record: its slug, or the name for mobs without one"""
+    return mob.get('slug') or f"name:{mob.get('name')}"
+
+
+def canonical_record(mob: dict) -> dict:
+    """Record with the importer columns in a fixed order (unknown drops stay absent)"""
+    record = {column: mob.get(column) for column in RECORD_COLUMNS if column != 'special_drops'}
+    if mob.get('special_drops') is not None:
+        record['special_drops'] = mob['special_drops']
+    return record
+
+
+class SnapshotArchive:
+    """Immutable compressed snapshots of Codex records, indexed by mob slug"""
+
+    def __init__(self, archive_dir: str = DEFAULT_ARCHIVE_DIR):
+        self.archive_dir = archive_dir
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.archive_dir, name)
+
+    def manifest(self) -> dict:
+        try:
+            with open(self._path(MANIFEST_NAME)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'version': 1, 'snapshots': []}
+
+    def snapshots(self) -> List[dict]:
+        return self.manifest()['snapshots']
+
+    def resolve(self, ref: str = 'latest') -> dict:
+        """Snapshot entry for an id (or unique id prefix), 'latest', 'previous' or '-N'"""
+        snapshots = self.snapshots()
+        if not snapshots:
+            raise LookupError(f"no snapshots in {self.archive_dir}")
+        if ref in ('latest', 'previous') or ref.startswith('-') and ref[1:].isdigit():
+            position = {'latest': -1, 'previous': -2}.get(ref) or int(ref)
+            if -position > len(snapshots):
+                raise LookupError(f"only {len(snapshots)} snapshots archived")
+            return snapshots[position]
+        matches = [entry for entry in snapshots if entry['id'].startswith(ref)]
+        if len(matches) != 1:
+            raise LookupError(f"snapshot '{ref}' {'is ambiguous' if matches else 'not found'}")
+        return matches[0]
+
+    def _write_json(self, name: str, data):
+        temp = self._path(f".{name}.tmp")
+        with open(temp, 'w') as f:
+            json.dump(data, f, indent=1)
+        os.replace(temp, self._path(name))
+
+    def writer(self, source: str = '', codec: Optional[str] = None, force: bool = False) -> 'SnapshotWriter':
+        """Incremental write: add() records one by one, close() archives them"""
+        return SnapshotWriter(self, source, codec, force)
+
+    def write(self, records: Iterable[dict], source: str = '', codec: Optional[str] = None,
+              force: bool = False) -> Tuple[dict, bool]:
+        """Archive records as a new snapshot; (entry, created) - created is False when
+        the records are identical to the latest snapshot and force is not set"""
+        writer = self.writer(source, codec, force)
+        for mob in records:
+            writer.add(mob)
+        return writer.close()
+
+    def index(self, entry: dict) -> dict:
+        with open(self._path(entry['index'])) as f:
+            return json.load(f)
+
+    def _chunk(self, f, entry: dict, chunk: dict) -> List[dict]:
+        f.seek(chunk['offset'])
+        data = decompress(f.read(chunk['length']), entry['codec'])
+        return [json.loads(line) for line in data.splitlines() if line]
+
+    def records(self, entry: dict) -> Iterator[dict]:
+        """Every record of a snapshot in key order, one chunk in memory at a time"""
+        with open(self._path(entry['file']), 'rb') as f:
+            for chunk in self.index(entry)['chunks']:
+                yield from self._chunk(f, entry, chunk)
+
+    def get(self, entry: dict, key: str) -> Optional[dict]:
+        """One record by slug (or 'name:<name>'), reading only its chunk"""
+        index = self.index(entry)
+        number = index['slugs'].get(key)
+        if number is None:
+            return None
+        with open(self._path(entry['file']), 'rb') as f:
+            chunk = self._chunk(f, entry, index['chunks'][number])
+        return next((mob for mob in chunk if record_key(mob) == key), None)
+
+
+class SnapshotWriter:
+    """Sorts records by key in bounded memory and writes them as one snapshot
+
+    At most SPILL_RECORDS records are held; beyond that they are spilled as
+    sorted runs to temporary files and merged while the chunks are written.
+    A key seen again replaces the earlier record.
+    """
+
+    def __init__(self, archive: SnapshotArchive, source: str = '', codec: Optional[str] = None,
+                 force: bool = False):
+        self.archive = archive
+        self.source = source
+        self.codec = codec or default_codec()
+        self.force = force
+        if self.codec == 'zst' and zstandard is None:
+            raise RuntimeError("zstd codec: pip install zstandard")
+        self.pending = {}
+        self.runs = []
+
+    def add(self, mob: dict):
+        self.pending[record_key(mob)] = json.dumps(canonical_record(mob), ensure_ascii=False,
+                                                   separators=(',', ':'))
+        if len(self.pending) >= SPILL_RECORDS:
+            self._spill()
+
+    def _spill(self):
+        run = tempfile.TemporaryFile('w+', encoding='utf-8')
+        for key in sorted(self.pending):
+            run.write(json.dumps([key, self.pending[key]], ensure_ascii=False) + '\n')
+        run.seek(0)
+        self.runs.append(run)
+        self.pending = {}
+
+    def _sorted(self) -> Iterator[Tuple[str, str]]:
+        """(key, line) pairs in key order, the last record of each key"""
+        if not self.runs:
+            yield from sorted(self.pending.items())
+            return
+        if self.pending:
+            self._spill()
+        # heapq.merge is stable: equal keys come out in run order, so the last one wins
+        merged = heapq.merge(*((tuple(json.loads(line)) for line in run) for run in self.runs),
+                             key=lambda pair: pair[0])
+        previous = next(merged, None)
+        for pair in merged:
+            if pair[0] != previous[0]:
+                yield previous
+            previous = pair
+        if previous is not None:
+            yield previous
+
+    def close(self) -> Tuple[dict, bool]:
+        archive = self.archive
+        snapshots = archive.snapshots()
+        os.makedirs(archive.archive_dir, exist_ok=True)
+        snapshot_id = time.strftime('%Y%m%d-%H%M%S')
+        while any(entry['id'] == snapshot_id for entry in snapshots):
+            snapshot_id = f"{snapshot_id}-{len(snapshots)}"
+        filename = f"{snapshot_id}.ndjson.{CODEC_EXTENSIONS[self.codec]}"
+        index = {'chunks': [], 'slugs': {}}
+        digest = hashlib.sha256()
+        offset = records = 0
+        temp = archive._path(f".{filename}.tmp")
+        try:
+            with open(temp, 'wb') as f:
+                pairs = self._sorted()
+                while True:
+                    batch = list(itertools.islice(pairs, CHUNK_RECORDS))
+                    if not batch:
+                        break
+                    data = b''.join(line.encode() + b'\n' for _, line in batch)
+                    digest.update(data)
+                    chunk = compress(data, self.codec)
+                    f.write(chunk)
+                    index['chunks'].append({'offset': offset, 'length': len(chunk),
+                                            'first': batch[0][0], 'last': batch[-1][0]})
+                    index['slugs'].update((key, len(index['chunks']) - 1) for key, _ in batch)
+                    offset += len(chunk)
+                    records += len(batch)
+        finally:
+            for run in self.runs:
+                run.close()
+            self.runs, self.pending = [], {}
+
+        if snapshots and snapshots[-1]['sha256'] == digest.hexdigest() and not self.force:
+            os.remove(temp)
+            return snapshots[-1], False
+        os.replace(temp, archive._path(filename))
+        archive._write_json(f"{snapshot_id}.index.json", index)
+
+        entry = {
+            'id': snapshot_id,
+            'file': filename,
+            'index': f"{snapshot_id}.index.json",
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'source': self.source,
+            'codec': self.codec,
+            'records': records,
+            'bytes': offset,
+            'sha256': digest.hexdigest(),
+        }
+        manifest = archive.manifest()
+        manifest['snapshots'].append(entry)
+        archive._write_json(MANIFEST_NAME, manifest)
+        return entry, True
+
+
+class ArchivedSource:
+    """Pass the records of a source through to a snapshot writer; archive them once exhausted"""
+
+    def __init__(self, source: Iterable[dict], archive: SnapshotArchive):
+        self.source = source
+        self.archive = archive
+        self.label = getattr(source, 'label', 'Codex data')
+
+    def __iter__(self) -> Iterator[dict]:
+        writer = self.archive.writer(source=self.label)
+        for mob in self.source:
+            writer.add(mob)
+            yield mob
+        entry, created = writer.close()
+        if created:
+            print(f"🗄️  Archived snapshot {entry['id']} ({entry['records']} mobs, {entry['bytes'] / 1024:.0f} KB)")
+        else:
+            print(f"🗄️  Codex data identical to snapshot {entry['id']} - not archived again")
+
+
+def diff_records(old: Iterable[dict], new: Iterable[dict],
+                 fields: Optional[List[str]] = None) -> Iterator[Tuple[str, str, dict]]:
+    """Merge-join two key-ordered record streams
+
+    Yields ('added', key, record), ('removed', key, record) and
+    ('changed', key, {field: (old, new)}) in key order.
+    """
+    old, new = iter(old), iter(new)
+    a, b = next(old, None), next(new, None)
+    while a is not None or b is not None:
+        key_a = record_key(a) if a is not None else None
+        key_b = record_key(b) if b is not None else None
+        if b is None or a is not None and key_a < key_b:
+            yield 'removed', key_a, a
+            a = next(old, None)
+        elif a is None or key_b < key_a:
+            yield 'added', key_b, b
+            b = next(new, None)
+        else:
+            changed = {field: (a.get(field), b.get(field))
+                       for field in (fields or sorted(set(a) | set(b)))
+                       if a.get(field) != b.get(field)}
+            if changed:
+                yield 'changed', key_a, changed
+            a, b = next(old, None), next(new, None)
+
+
+def _value(value) -> str:
+    if isinstance(value, list):
+        return f"[{len(value)} items]"
+    return 'None' if value is None else str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Versioned Codex snapshot archive')
+    parser.add_argument('--archive-dir', default=DEFAULT_ARCHIVE_DIR, help='Snapshot archive directory')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    archive_cmd = commands.add_parser('archive', help='Archive a crawl or snapshot file')
+    archive_cmd.add_argument('--source', choices=['file', 'api'], default='file',
+                             help='Data source: file (NDJSON/JSON snapshot) or api (live Codex crawl)')
+    archive_cmd.add_argument('--input', default=DEFAULT_SNAPSHOT,
+                             help=f'Snapshot path for the file source (default: {DEFAULT_SNAPSHOT})')
+    archive_cmd.add_argument('--no-drops', action='store_true', help='Live crawl: skip mob pages')
+    archive_cmd.add_argument('--codec', choices=sorted(CODEC_EXTENSIONS),
+                             help='Compression (default: zst if zstandard is installed, else gzip)')
+    archive_cmd.add_argument('--force', action='store_true', help='Archive even if identical to the latest')
+
+    commands.add_parser('list', help='List archived snapshots')
+
+    show_cmd = commands.add_parser('show', help='Show one mob of a snapshot')
+    show_cmd.add_argument('slug', help="Mob slug (or 'name:<name>')")
+    show_cmd.add_argument('--snapshot', default='latest', help='Snapshot id, latest, previous or -N')
+
+    diff_cmd = commands.add_parser('diff', help='Diff two snapshots')
+    diff_cmd.add_argument('old', nargs='?', default='previous', help='Old snapshot (default: previous)')
+    diff_cmd.add_argument('new', nargs='?', default='latest', help='New snapshot (default: latest)')
+    diff_cmd.add_argument('--field', action='append', help='Only compare these fields (repeatable)')
+    diff_cmd.add_argument('--json', action='store_true', help='Output JSON lines')
+
+    history_cmd = commands.add_parser('history', help='Values of one mob across all snapshots')
+    history_cmd.add_argument('slug', help="Mob slug (or 'name:<name>')")
+    history_cmd.add_argument('--field', action='append', help='Only track these fields (repeatable)')
+    args = parser.parse_args()
+
+    archive = SnapshotArchive(args.archive_dir)
+    try:
+        if args.command == 'archive':
+            source = open_source(args.source, args.input, with_drops=not args.no_drops)
+            print(f"📥 Reading {source.label}...")
+            entry, created = archive.write(source, source=source.label, codec=args.codec, force=args.force)
+            if created:
+                print(f"✅ Snapshot {entry['id']}: {entry['records']} mobs, "
+                      f"{entry['bytes'] / 1024:.0f} KB ({entry['codec']})")
+            else:
+                print(f"✅ Identical to snapshot {entry['id']} - nothing archived")
+
+        elif args.command == 'list':
+            snapshots = archive.snapshots()
+            if not snapshots:
+                print(f"ℹ️  No snapshots in {args.archive_dir}")
+            for entry in snapshots:
+                print(f"  {entry['id']}  {entry['records']:4d} mobs  {entry['bytes'] / 1024:6.0f} KB  "
+                      f"{entry['codec']:4s}  {entry['source']}")
+
+        elif args.command == 'show':
+            entry = archive.resolve(args.snapshot)
+            mob = archive.get(entry, args.slug)
+            if mob is None:
+                print(f"❌ {args.slug} not in snapshot {entry['id']}")
+                sys.exit(1)
+            print(json.dumps(mob, indent=2, ensure_ascii=False))
+
+        elif args.command == 'diff':
+            old, new = archive.resolve(args.old), archive.resolve(args.new)
+            counts = {'added': 0, 'removed': 0, 'changed': 0}
+            if not args.json:
+                print(f"🔍 {old['id']} -> {new['id']}")
+            for kind, key, detail in diff_records(archive.records(old), archive.records(new), args.field):
+                counts[kind] += 1
+                if args.json:
+                    if kind == 'changed':
+                        detail = {field: {'old': a, 'new': b} for field, (a, b) in detail.items()}
+                    print(json.dumps({'change': kind, 'key': key, 'detail': detail}, ensure_ascii=False))
+                elif kind == 'changed':
+                    changes = ', '.join(f"{field}: {_value(a)} -> {_value(b)}" for field, (a, b) in detail.items())
+                    print(f"  ~ {key}: {changes}")
+                else:
+                    print(f"  {'+' if kind == 'added' else '-'} {key} ({detail.get('name')})")
+            if not args.json:
+                print(f"📊 {counts['added']} added, {counts['removed']} removed, {counts['changed']} changed")
+
+        elif args.command == 'history':
+            previous = None
+            for entry in archive.snapshots():
+                mob = archive.get(entry, args.slug)
+                values = None if mob is None else {field: mob.get(field)
+                                                   for field in (args.field or sorted(mob))}
+                if values == previous:
+                    continue
+                if values is None:
+                    print(f"  {entry['id']}  (not in snapshot)")
+                elif previous is None:
+                    print(f"  {entry['id']}  " + ', '.join(f"{k}={_value(v)}" for k, v in values.items()))
+                else:
+                    print(f"  {entry['id']}  " + ', '.join(f"{k}: {_value(previous.get(k))} -> {_value(v)}"
+                                                          for k, v in values.items() if previous.get(k) != v))
+                previous = values
+    except LookupError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
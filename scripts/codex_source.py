@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Streaming named-mob record sources for the Codex importers
+Every source is an iterable of importer records, produced one at a time so an
+import runs in constant memory and starts writing while the rest of the data
+is still being read or downloaded:
+
+    {'name', 'slug', 'level', 'level_range', 'respawn_time', 'respawn_minutes',
+     'codex_url', 'location_x', 'location_y', 'location_z',
+     'special_drops': [{'name', 'url', 'rarity', 'type', 'drop_chance'}, ...]}
+
+special_drops is only present when the source knows the drops (the crawl, or
+a snapshot that carries them); importers leave existing items alone otherwise.
+
+Sources:
+    SnapshotSource(path)      NDJSON (one mob per line) or a JSON snapshot, either
+                              a top-level array or an object with a "mobs" array
+                              (data/named-mobs/named_mobs.json, named-mobs.json,
+                              named-mobs-processed.json); decoded element by element.
+                              named-mobs-processed.json has no locations: its records
+                              carry location_* = None and imports keep stored locations
+    CodexCrawlSource()        live crawl of the paginated named-mob list of the
+                              Codex API, plus every mob page for its _Named drops
+
+Usage:
+    from codex_source import open_source
+    for mob in open_source('file', 'data/named-mobs/named_mobs.json'):
+        ...
+"""
+
+import json
+import re
+from typing import Iterator, List, Optional
+
+from codex_client import CODEX_API, fetch, iter_fetch, mob_url
+from codex_payload import named_loot_tables, parse_page
+
+DEFAULT_SNAPSHOT = 'data/named-mobs/named_mobs.json'
+MOBS_LIST_URL = f"{CODEX_API}/mobs"
+DEFAULT_PAGE_SIZE = 30
+READ_CHUNK = 64 * 1024
+# Loot that is not a "special drop" (same exclusions as the _Named extractors)
+EXCLUDED_ITEM_PREFIXES = ('Resource_', 'Consumable_Recipe_', 'Certificate_')
+ITEM_TYPE_PREFIXES = (
+    ('Gear_Weapon_', 'Weapon'),
+    ('Gear_Accessory_', 'Accessory'),
+    ('Gear_Armor_', 'Armor'),
+    ('Gear_Artisan_', 'Artisan Tool'),
+    ('Bag_', 'Bag'),
+    ('Artisan_', 'Artisan'),
+    ('Tool_', 'Tool'),
+)
+_MOBS_ARRAY = re.compile(r'"mobs"\s*:\s*\[')
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+
+def _numbers(value) -> List[float]:
+    if isinstance(value, (int, float)):
+        return [value]
+    return [float(n) for n in _NUMBER.findall(value)] if isinstance(value, str) else []
+
+
+def _int(value) -> Optional[int]:
+    numbers = _numbers(value)
+    return int(numbers[0]) if numbers else None
+
+
+def respawn_minutes(respawn_time) -> Optional[float]:
+    """'1200 seconds' -> 20, '120 - 180 seconds' -> 3 (upper bound), '150 seconds' -> 2.5"""
+    numbers = _numbers(respawn_time)
+    if not numbers:
+        return None
+    minutes = max(numbers) / 60
+    return int(minutes) if minutes == int(minutes) else minutes
+
+
+def normalize_mob(raw: dict) -> dict:
+    """Importer record from any known mob shape
+
+    Accepts importer records (snake_case), the exported snapshots (camelCase
+    with a location object) and raw Codex API list entries (_displayName,
+    _slug, _location, populationInstances).
+    """
+    instances = raw.get('populationInstances') or [{}]
+    instance = instances[0] if isinstance(instances[0], dict) else {}
+    location = raw.get('location') or raw.get('_location') or {}
+
+    name = raw.get('name') or raw.get('_displayName') or instance.get('_displayName')
+    slug = raw.get('slug') or raw.get('_slug')
+    level_range = raw.get('level_range') or raw.get('levelRange') or raw.get('_levelRange')
+    respawn_time = raw.get('respawn_time') or raw.get('respawnTime') or instance.get('respawnTime')
+    if isinstance(respawn_time, (int, float)):
+        respawn_time = f"{respawn_time} seconds"
+
+    level = raw.get('level')
+    if level is None:
+        level = _int(raw.get('levelMin') or instance.get('nPCLevelMin') or level_range)
+    minutes = raw.get('respawn_minutes', raw.get('respawnMinutes'))
+    if minutes is None:
+        minutes = respawn_minutes(raw.get('respawnTimeSeconds') or respawn_time)
+
+    mob = {
+        'name': name,
+        'slug': slug,
+        'level': level,
+        'level_range': level_range,
+        'respawn_time': respawn_time,
+        'respawn_minutes': minutes,
+        'codex_url': (raw.get('codex_url') or raw.get('codexUrl') or raw.get('codexLink')
+                      or (mob_url(slug) if slug else None)),
+        'location_x': raw.get('location_x', location.get('x')),
+        'location_y': raw.get('location_y', location.get('y')),
+        'location_z': raw.get('location_z', location.get('z')),
+    }
+    drops = raw.get('special_drops', raw.get('specialDrops'))
+    if drops is not None:
+        mob['special_drops'] = drops
+    return mob
+
+
+def item_type(item_code: str) -> str:
+    for prefix, type_name in ITEM_TYPE_PREFIXES:
+        if item_code.startswith(prefix):
+            return type_name
+    return 'Special'
+
+
+def page_drops(content: str) -> List[dict]:
+    """special_drops of a mob page: every item of its _Named loot tables"""
+    drops = []
+    seen = set()
+    for _, rewards in named_loot_tables(parse_page(content)):
+        for reward in rewards:
+            if (not reward.code or reward.name == 'Unknown' or reward.code in seen
+                    or reward.code.startswith(EXCLUDED_ITEM_PREFIXES)):
+                continue
+            seen.add(reward.code)
+            drops.append({
+                'name': reward.name,
+                'url': reward.url,
+                'rarity': 'Uncommon' if reward.min_rarity >= 2 else 'Common',
+                'type': item_type(reward.code),
+                'drop_chance': reward.drop_chance,
+            })
+    return drops
+
+
+def iter_json_array(f, start: int = 0) -> Iterator:
+    """Decode the elements of the JSON array at `start` one by one from a text stream"""
+    decoder = json.JSONDecoder()
+    buffer = f.read(max(start + 1, READ_CHUNK))
+    pos = buffer.index('[', start) + 1
+    eof = False
+    while True:
+        # Skip whitespace and separators, refilling the buffer as needed
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer, pos = f.read(READ_CHUNK), 0
+            eof = not buffer
+        if pos >= len(buffer) or buffer[pos] == ']':
+            return
+        try:
+            element, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(READ_CHUNK)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield element
+        pos = end
+
+
+class SnapshotSource:
+    """Mob records streamed from an NDJSON or JSON snapshot file"""
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT):
+        self.path = path
+        self.label = f"snapshot {path}"
+
+    def _raw(self) -> Iterator[dict]:
+        with open(self.path, encoding='utf-8') as f:
+            head = f.read(READ_CHUNK)
+            stripped = head.lstrip()
+            wrapper = _MOBS_ARRAY.search(head) if stripped.startswith('{') else None
+            f.seek(0)
+            if stripped.startswith('['):
+                yield from iter_json_array(f)
+            elif wrapper is not None:
+                yield from iter_json_array(f, wrapper.end() - 1)
+            else:
+                # NDJSON: one mob object per line
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield json.loads(line)
+
+    def __iter__(self) -> Iterator[dict]:
+        for raw in self._raw():
+            if isinstance(raw, dict):
+                yield normalize_mob(raw)
+
+
+class CodexCrawlSource:
+    """Mob records crawled live: the paginated named-mob list, plus each mob page for drops
+
+    List pages are fetched one at a time; the mob pages of a list page download
+    concurrently (iter_fetch) while the previous records are being imported.
+    """
+
+    def __init__(self, with_drops: bool = True, page_size: int = DEFAULT_PAGE_SIZE):
+        self.with_drops = with_drops
+        self.page_size = page_size
+        self.label = f"Codex crawl {MOBS_LIST_URL}"
+        self.pages_fetched = 0
+
+    def list_page(self, page: int) -> List[dict]:
+        url = (f"{MOBS_LIST_URL}?page={page}&per_page={self.page_size}"
+               f"&sortColumn=name&sortDir=asc&namedMobs=true")
+        response = fetch(url)
+        if response is None or response.status != 200:
+            raise RuntimeError(f"mob list page {page} failed: "
+                               f"{response.status if response is not None else 'no response'}")
+        data = response.json()
+        if isinstance(data, dict):
+            data = next((data[key] for key in ('data', 'mobs', 'items', 'results')
+                         if isinstance(data.get(key), list)), [])
+        return [entry for entry in data if isinstance(entry, dict)]
+
+    def __iter__(self) -> Iterator[dict]:
+        page = 1
+        while True:
+            entries = self.list_page(page)
+            mobs = [normalize_mob(entry) for entry in entries]
+            mobs = [mob for mob in mobs if mob['name']]
+            if not self.with_drops:
+                yield from mobs
+            else:
+                yield from (mob for mob in mobs if not mob['slug'])
+                crawled = [mob for mob in mobs if mob['slug']]
+                pages = iter_fetch(mob_url(mob['slug']) for mob in crawled)
+                for mob, (_, response) in zip(crawled, pages):
+                    if response is not None and response.status == 200:
+                        mob['special_drops'] = page_drops(response.text)
+                        self.pages_fetched += 1
+                    yield mob
+            if len(entries) < self.page_size:
+                return
+            page += 1
+
+
+def open_source(kind: str, path: Optional[str] = None, with_drops: bool = True):
+    """'file' -> SnapshotSource(path), 'api' -> CodexCrawlSource()"""
+    if kind == 'file':
+        return SnapshotSource(path or DEFAULT_SNAPSHOT)
+    if kind == 'api':
+        return CodexCrawlSource(with_drops=with_drops)
+    raise ValueError(f"unknown source: {kind}")
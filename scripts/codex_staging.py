@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Staging table and set-based diff for Codex imports
+An import first bulk-loads the incoming records (any iterable from
+codex_source.py) into a TEMP table keyed by mob name, in executemany batches,
+so the snapshot is never held in Python. The change sets are then computed by
+SQLite with indexed joins against named_mobs in one pass over the staged rows
+(plus one anti-join for removed mobs); Python only ever sees the rows that
+differ, so the cost of a report grows with the size of the change:
+
+    new_mobs                 staged, not in named_mobs (by name, nor by slug)
+    renamed_mobs             matched by slug under a different name (updated in place)
+    removed_mobs             in named_mobs, not staged
+    updated_respawn_times    respawn_time differs
+    updated_levels           level differs
+    updated_locations        location_x/location_y differ (optionally only for
+                             mobs without triangulated map coordinates; a
+                             source without locations never changes them)
+    updated_drops            the source's drop list differs from the last one imported
+    unchanged                number of existing mobs with nothing to write
+
+Each staged record carries two fingerprints computed while staging:
+codex_fingerprint, a hash over its named_mobs fields, and drops_fingerprint,
+a hash of its drop list (NULL when the source does not know the drops, so
+sources with and without drops do not disturb each other). named_mobs keeps
+the fingerprints of the last imported record. A mob whose codex_fingerprint
+matches is not compared field by field; one whose fingerprint differs but
+whose fields all match (e.g. a snapshot without locations) is unchanged too.
+Drop hashes are only compared when the source provides drops.
+
+The staged rows are then applied with one INSERT ... SELECT ... ON CONFLICT DO
+UPDATE statement (upsert_staged), which needs unique indexes on
+named_mobs(name) and named_mobs(slug) (migrate_unique_keys, SQLite >= 3.35)
+and the fingerprint columns. Importers only check for them
+(require_import_schema); adding them is the explicit --migrate step.
+Local columns (map_lat, map_lng, coordinate_source, is_hidden) are never part
+of the update, and only new or changed rows are written, so re-importing an
+unchanged snapshot writes nothing.
+
+Usage:
+    python3 scripts/codex_staging.py --migrate     # unique keys + fingerprint columns (backs the database up first)
+
+    stage_records(conn, records)
+    changes = diff_staging(conn)
+    upsert_staged(conn)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, List
+
+from items_catalog import DB_PATH, backup_database
+
+STAGING_TABLE = 'import_staging'
+DEFAULT_BATCH_SIZE = 500
+RECORD_COLUMNS = ('name', 'slug', 'level', 'level_range', 'respawn_time', 'respawn_minutes',
+                  'codex_url', 'location_x', 'location_y', 'location_z', 'special_drops')
+FINGERPRINT_COLUMNS = ('codex_fingerprint', 'drops_fingerprint')
+STAGING_COLUMNS = RECORD_COLUMNS + FINGERPRINT_COLUMNS
+
+# Codex-sourced named_mobs columns written by an import (name is the conflict key)
+CODEX_FIELDS = ('slug', 'level', 'level_range', 'respawn_time', 'respawn_minutes', 'codex_url',
+                'location_x', 'location_y', 'location_z')
+LOCATION_FIELDS = ('location_x', 'location_y', 'location_z')
+UNIQUE_KEYS = (('idx_named_mobs_name', 'name'), ('idx_named_mobs_slug', 'slug'))
+
+STAGING_SCHEMA = f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+        name TEXT PRIMARY KEY,
+        slug TEXT,
+        level INTEGER,
+        level_range TEXT,
+        respawn_time TEXT,
+        respawn_minutes INTEGER,
+        codex_url TEXT,
+        location_x REAL,
+        location_y REAL,
+        location_z REAL,
+        special_drops TEXT, -- JSON list; NULL when the source does not know the drops
+        codex_fingerprint TEXT,
+        drops_fingerprint TEXT -- NULL when the source does not know the drops
+    )
+"""
+STAGING_INDEX = f"CREATE INDEX IF NOT EXISTS temp.idx_{STAGING_TABLE}_slug ON {STAGING_TABLE}(slug)"
+
+# The named_mobs row a staged mob updates: same name, else same slug (a rename),
+# matching the conflict targets of upsert_staged
+MATCH_SQL = """named_mobs nm ON nm.id = COALESCE((SELECT id FROM named_mobs WHERE name = s.name),
+                                       (SELECT id FROM named_mobs WHERE slug = s.slug))"""
+
+# An existing mob needs a write: its fields differ (skipped when the fingerprint
+# matches), or the source's drop list differs from the last one imported.
+# {stored}/{stored_drops} are the named_mobs fingerprint columns (NULL before the migration)
+CHANGED_SQL = """(
+        {stored} IS NOT s.codex_fingerprint AND (
+              nm.name IS NOT s.name
+           OR nm.respawn_time IS NOT s.respawn_time OR nm.respawn_minutes IS NOT s.respawn_minutes
+           OR nm.level IS NOT s.level OR nm.level_range IS NOT s.level_range
+           OR nm.location_x IS NOT COALESCE(s.location_x, nm.location_x)
+           OR nm.location_y IS NOT COALESCE(s.location_y, nm.location_y)
+           OR nm.location_z IS NOT COALESCE(s.location_z, nm.location_z)
+           OR nm.codex_url IS NOT s.codex_url)
+        OR s.drops_fingerprint IS NOT NULL AND s.drops_fingerprint IS NOT {stored_drops})"""
+
+DIFF_SQL = f"""
+    SELECT s.*, nm.id AS mob_id,
+           nm.id IS NULL AS is_new,
+           nm.name AS old_name, nm.name IS NOT s.name AS renamed,
+           nm.respawn_time AS old_respawn_time, nm.level AS old_level,
+           nm.location_x AS old_location_x, nm.location_y AS old_location_y,
+           nm.codex_url AS old_codex_url,
+           nm.map_lat IS NOT NULL AND nm.map_lng IS NOT NULL AS triangulated,
+           nm.respawn_time IS NOT s.respawn_time AS respawn_changed,
+           nm.level IS NOT s.level AS level_changed,
+           (nm.location_x IS NOT COALESCE(s.location_x, nm.location_x)
+            OR nm.location_y IS NOT COALESCE(s.location_y, nm.location_y)) AS location_changed,
+           nm.codex_url IS NOT s.codex_url AS url_changed,
+           s.drops_fingerprint IS NOT NULL AND s.drops_fingerprint IS NOT {{stored_drops}} AS drops_changed
+    FROM {STAGING_TABLE} s
+    LEFT JOIN {MATCH_SQL}
+    WHERE nm.id IS NULL OR {{changed}}
+    ORDER BY s.name
+"""
+
+UNCHANGED_SQL = f"""
+    SELECT COUNT(*) FROM {STAGING_TABLE} s
+    JOIN {MATCH_SQL}
+    WHERE NOT {{changed}}
+"""
+
+REMOVED_SQL = f"""
+    SELECT nm.name FROM named_mobs nm
+    WHERE NOT EXISTS (SELECT 1 FROM {STAGING_TABLE} s WHERE s.name = nm.name)
+      AND NOT EXISTS (SELECT 1 FROM {STAGING_TABLE} s WHERE s.slug = nm.slug)
+    ORDER BY nm.name
+"""
+
+
+def _hash(value) -> str:
+    content = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def record_fingerprint(mob: dict) -> str:
+    """Stable hash of a record's named_mobs fields (the drop list is hashed separately)"""
+    return _hash([mob.get(column) for column in RECORD_COLUMNS if column != 'special_drops'])
+
+
+def drops_fingerprint(mob: dict):
+    """Stable hash of a record's drop list; None when the record does not carry drops"""
+    drops = mob.get('special_drops')
+    return _hash(drops) if drops is not None else None
+
+
+def _staging_row(mob: dict) -> tuple:
+    drops = mob.get('special_drops')
+    return tuple(mob.get(column) for column in RECORD_COLUMNS[:-1]) + (
+        json.dumps(drops) if drops is not None else None, record_fingerprint(mob), drops_fingerprint(mob))
+
+
+def _changed_sql(conn: sqlite3.Connection) -> Dict[str, str]:
+    """Format arguments of the diff queries for the fingerprint columns present"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(named_mobs)")}
+    stored = {'stored': 'nm.codex_fingerprint' if 'codex_fingerprint' in columns else 'NULL',
+              'stored_drops': 'nm.drops_fingerprint' if 'drops_fingerprint' in columns else 'NULL'}
+    return dict(stored, changed=CHANGED_SQL.format(**stored))
+
+
+def stage_records(conn: sqlite3.Connection, records: Iterable[dict],
+                  batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """(Re)fill the staging table from a record stream; returns the number of records
+
+    A name seen twice keeps its last record.
+    """
+    conn.execute(STAGING_SCHEMA)
+    conn.execute(STAGING_INDEX)
+    conn.execute(f"DELETE FROM {STAGING_TABLE}")
+    placeholders = ', '.join('?' for _ in STAGING_COLUMNS)
+    sql = f"INSERT OR REPLACE INTO {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) VALUES ({placeholders})"
+    rows = (_staging_row(mob) for mob in records if mob.get('name'))
+    count = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return count
+        conn.executemany(sql, batch)
+        count += len(batch)
+
+
+def staged_mob(row) -> dict:
+    """Importer record of a staged row (special_drops decoded)"""
+    mob = {column: row[column] for column in RECORD_COLUMNS}
+    if mob['special_drops'] is None:
+        del mob['special_drops']
+    else:
+        mob['special_drops'] = json.loads(mob['special_drops'])
+    return mob
+
+
+def staged_rows(conn: sqlite3.Connection, where: str = "1 = 1", params: tuple = ()) -> List[sqlite3.Row]:
+    """Staged rows matching `where`, joined to named_mobs (mob_id, triangulated, has_items)"""
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    cursor.execute(f"""
+        SELECT s.*, nm.id AS mob_id,
+               nm.map_lat IS NOT NULL AND nm.map_lng IS NOT NULL AS triangulated,
+               EXISTS (SELECT 1 FROM named_mob_items i WHERE i.named_mob_id = nm.id) AS has_items
+        FROM {STAGING_TABLE} s
+        LEFT JOIN {MATCH_SQL}
+        WHERE {where}
+        ORDER BY s.name
+    """, params)
+    return cursor.fetchall()
+
+
+def diff_staging(conn: sqlite3.Connection, keep_triangulated: bool = False) -> Dict[str, List]:
+    """Change sets between the staged snapshot and named_mobs
+
+    keep_triangulated: ignore location changes of mobs that have triangulated
+    map coordinates (their Codex location is not used for placement).
+    'changed_mobs' holds every existing row with any differing Codex field (the
+    importers' update set); the report sets only list the reviewed fields.
+    """
+    changes = {
+        'new_mobs': [],
+        'renamed_mobs': [],
+        'removed_mobs': [],
+        'updated_respawn_times': [],
+        'updated_levels': [],
+        'updated_locations': [],
+        'updated_drops': [],
+        'changed_mobs': [],
+        'unchanged': 0,
+    }
+    # Before the migration there are no stored fingerprints: every mob is compared
+    sql = _changed_sql(conn)
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    for row in cursor.execute(DIFF_SQL.format(**sql)):
+        if row['is_new']:
+            changes['new_mobs'].append(staged_mob(row))
+            continue
+        changes['changed_mobs'].append(row)
+        if row['renamed']:
+            changes['renamed_mobs'].append({'old': row['old_name'], 'new': row['name'], 'slug': row['slug']})
+        if row['respawn_changed']:
+            changes['updated_respawn_times'].append({
+                'name': row['name'], 'old': row['old_respawn_time'], 'new': row['respawn_time']})
+        if row['level_changed']:
+            changes['updated_levels'].append({'name': row['name'], 'old': row['old_level'], 'new': row['level']})
+        if row['location_changed'] and not (keep_triangulated and row['triangulated']):
+            changes['updated_locations'].append({
+                'name': row['name'],
+                'old': [row['old_location_x'], row['old_location_y']],
+                'new': [row['location_x'], row['location_y']]})
+        if row['drops_changed']:
+            changes['updated_drops'].append(row['name'])
+    changes['removed_mobs'] = [row[0] for row in conn.execute(REMOVED_SQL)]
+    changes['unchanged'] = conn.execute(UNCHANGED_SQL.format(**sql)).fetchone()[0]
+    return changes
+
+
+def has_unique_index(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    """Whether `column` alone is covered by a unique index (or UNIQUE constraint)"""
+    for index in conn.execute(f"PRAGMA index_list({table})").fetchall():
+        if index[2] and [row[2] for row in conn.execute(f"PRAGMA index_info('{index[1]}')")] == [column]:
+            return True
+    return False
+
+
+def duplicate_keys(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """Values of the would-be unique columns that occur more than once"""
+    duplicates = {}
+    for _, column in UNIQUE_KEYS:
+        rows = conn.execute(f"""
+            SELECT {column} FROM named_mobs WHERE {column} IS NOT NULL
+            GROUP BY {column} HAVING COUNT(*) > 1 ORDER BY {column}
+        """).fetchall()
+        if rows:
+            duplicates[column] = [row[0] for row in rows]
+    return duplicates
+
+
+def migrate_unique_keys(conn: sqlite3.Connection) -> List[str]:
+    """Add the unique indexes on named_mobs(name) and named_mobs(slug); returns the ones created
+
+    Raises ValueError listing the duplicates when existing rows prevent it.
+    """
+    missing = [(index, column) for index, column in UNIQUE_KEYS
+               if not has_unique_index(conn, 'named_mobs', column)]
+    if not missing:
+        return []
+    duplicates = duplicate_keys(conn)
+    if duplicates:
+        details = '; '.join(f"{column}: {', '.join(map(str, values))}" for column, values in duplicates.items())
+        raise ValueError(f"duplicate named_mobs keys, resolve them before importing ({details})")
+    with conn:
+        for index, column in missing:
+            conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {index} ON named_mobs({column})")
+    return [index for index, _ in missing]
+
+
+def has_fingerprint(conn: sqlite3.Connection) -> bool:
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(named_mobs)")}
+    return all(column in columns for column in FINGERPRINT_COLUMNS)
+
+
+def migrate_fingerprint(conn: sqlite3.Connection) -> List[str]:
+    """Add the named_mobs fingerprint columns; returns the ones created"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(named_mobs)")}
+    missing = [column for column in FINGERPRINT_COLUMNS if column not in columns]
+    with conn:
+        for column in missing:
+            conn.execute(f"ALTER TABLE named_mobs ADD COLUMN {column} TEXT")
+    return missing
+
+
+def missing_import_schema(conn: sqlite3.Connection) -> List[str]:
+    """Parts of the import schema the database still lacks (empty when up to date)"""
+    missing = [index for index, column in UNIQUE_KEYS if not has_unique_index(conn, 'named_mobs', column)]
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(named_mobs)")}
+    missing.extend(f"named_mobs.{column}" for column in FINGERPRINT_COLUMNS if column not in columns)
+    return missing
+
+
+def require_import_schema(conn: sqlite3.Connection):
+    """Raise RuntimeError unless the import schema is in place
+
+    Importers never migrate the live database themselves: the migration adds
+    unique indexes and columns, so it is an explicit, backed-up step.
+    """
+    missing = missing_import_schema(conn)
+    if missing:
+        raise RuntimeError(f"import schema missing ({', '.join(missing)}); "
+                           f"run 'python3 scripts/codex_staging.py --migrate' first")
+
+
+def migrate_import_schema(conn: sqlite3.Connection) -> List[str]:
+    """Unique keys + fingerprint columns; returns what was created (nothing when up to date)"""
+    created = migrate_unique_keys(conn)
+    created.extend(f"named_mobs.{column}" for column in migrate_fingerprint(conn))
+    return created
+
+
+def upsert_staged(conn: sqlite3.Connection, keep_triangulated: bool = False) -> int:
+    """Insert or update every staged mob in one statement; returns the number of rows written
+
+    New mobs are inserted visible with no map coordinates. Existing mobs (by
+    name, or by slug when a mob was renamed) only get their Codex fields
+    updated: map_lat, map_lng, coordinate_source and is_hidden are left out of
+    the SET list, slug only fills a missing value, a location the source does
+    not provide is kept, and with keep_triangulated the location of a
+    triangulated mob is kept. Only new mobs and the diff's changed mobs are
+    selected; unchanged ones are not even attempted (an attempted insert would
+    still advance the AUTOINCREMENT sequence). The drop fingerprint is only
+    replaced when the source provides drops.
+    """
+    triangulated = "named_mobs.map_lat IS NOT NULL AND named_mobs.map_lng IS NOT NULL"
+
+    def value(field: str) -> str:
+        if field == 'slug':
+            return "COALESCE(named_mobs.slug, excluded.slug)"
+        if field in LOCATION_FIELDS:
+            # Sources without locations (e.g. named-mobs-processed.json) keep the stored ones
+            location = f"COALESCE(excluded.{field}, named_mobs.{field})"
+            if keep_triangulated:
+                return f"CASE WHEN {triangulated} THEN named_mobs.{field} ELSE {location} END"
+            return location
+        return f"excluded.{field}"
+
+    def update(fields) -> str:
+        assignments = ',\n            '.join(f"{field} = {value(field)}" for field in fields)
+        return f"""DO UPDATE SET
+            {assignments},
+            codex_fingerprint = excluded.codex_fingerprint,
+            drops_fingerprint = COALESCE(excluded.drops_fingerprint, named_mobs.drops_fingerprint),
+            updated_at = excluded.updated_at"""
+
+    columns = ('name',) + CODEX_FIELDS + FINGERPRINT_COLUMNS
+    before = conn.total_changes
+    # "WHERE ..." also disambiguates ON CONFLICT from a join constraint in the SELECT
+    conn.execute(f"""
+        INSERT INTO named_mobs ({', '.join(columns)}, type, is_hidden, updated_at)
+        SELECT {', '.join(f's.{column}' for column in columns)}, 'named_mob', 0, ? FROM {STAGING_TABLE} s
+        LEFT JOIN {MATCH_SQL}
+        WHERE nm.id IS NULL OR {_changed_sql(conn)['changed']}
+        ON CONFLICT(name) {update(CODEX_FIELDS)}
+        ON CONFLICT(slug) {update(('name',) + CODEX_FIELDS)}
+    """, (datetime.now().isoformat(),))
+    return conn.total_changes - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Codex import staging / named_mobs import schema')
+    parser.add_argument('--db', default=DB_PATH, help='Database path')
+    parser.add_argument('--migrate', action='store_true',
+                        help='Add unique indexes on named_mobs name and slug and the fingerprint columns')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        return
+    conn = sqlite3.connect(args.db)
+    duplicates = duplicate_keys(conn)
+    for column, values in duplicates.items():
+        print(f"⚠️  Duplicate {column}: {', '.join(map(str, values))}")
+    if args.migrate and not duplicates:
+        if not missing_import_schema(conn):
+            print("✅ Import schema already in place")
+        else:
+            print(f"💾 Backup: {backup_database(args.db, 'import-schema')}")
+            print(f"✅ Created {', '.join(migrate_import_schema(conn))}")
+    for _, column in UNIQUE_KEYS:
+        state = 'unique' if has_unique_index(conn, 'named_mobs', column) else 'not unique'
+        print(f"📊 named_mobs.{column}: {state}")
+    if has_fingerprint(conn):
+        total, fingerprinted = conn.execute(
+            "SELECT COUNT(*), COUNT(codex_fingerprint) FROM named_mobs").fetchone()
+        print(f"📊 {fingerprinted}/{total} mobs fingerprinted")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Checkpointed crawl journal for the Codex mob crawls
+Records per-mob progress (pending -> fetched -> parsed -> written, or failed)
+together with a hash of the parsed items (the data actually written, not the
+page, whose markup changes without the drops changing) in the main database,
+so an interrupted run resumes where it stopped and refreshes only touch what
+is needed.
+
+Selection modes (see add_journal_arguments):
+    default         resume - every mob not yet written by this crawl
+    --only-failed   only mobs whose last attempt failed or never finished
+    --since TS      mobs not written since TS (plus never-written ones)
+    --restart       forget the journal for this crawl and start from the first mob
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Tuple
+
+PENDING = 'pending'
+FETCHED = 'fetched'
+PARSED = 'parsed'
+WRITTEN = 'written'
+FAILED = 'failed'
+
+
+def items_hash(items: list) -> str:
+    """Stable hash of the parsed items of a mob (stored as crawl_journal.content_hash)"""
+    content = json.dumps(items, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def add_journal_arguments(parser: argparse.ArgumentParser):
+    """Shared resume/refresh flags for journaled crawl scripts"""
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--only-failed', action='store_true',
+                      help='Re-process only mobs that failed or never finished')
+    mode.add_argument('--since', metavar='TIMESTAMP',
+                      help="Re-process mobs not written since TIMESTAMP, UTC (e.g. '2025-09-15 12:00')")
+    mode.add_argument('--restart', action='store_true',
+                      help='Clear the journal for this crawl and start from the first mob')
+
+
+class CrawlJournal:
+    """Per-mob crawl state for one named crawl, stored next to the data it produces"""
+
+    def __init__(self, conn: sqlite3.Connection, crawl: str):
+        self.conn = conn
+        self.crawl = crawl
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_journal (
+                crawl TEXT NOT NULL,
+                named_mob_id INTEGER NOT NULL,
+                slug TEXT,
+                state TEXT NOT NULL,
+                content_hash TEXT,
+                item_count INTEGER,
+                error TEXT,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                written_at DATETIME,
+                PRIMARY KEY (crawl, named_mob_id)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_crawl_journal_state ON crawl_journal(crawl, state)")
+        self.conn.commit()
+
+    def restart(self):
+        self.conn.execute("DELETE FROM crawl_journal WHERE crawl = ?", (self.crawl,))
+        self.conn.commit()
+
+    def entries(self) -> Dict[int, Tuple[str, Optional[str], Optional[str]]]:
+        """named_mob_id -> (state, content_hash, written_at)"""
+        rows = self.conn.execute("""
+            SELECT named_mob_id, state, content_hash, written_at
+            FROM crawl_journal WHERE crawl = ?
+        """, (self.crawl,)).fetchall()
+        return {row[0]: (row[1], row[2], row[3]) for row in rows}
+
+    def select(self, mobs: Sequence[tuple], only_failed: bool = False,
+               since: Optional[str] = None) -> List[tuple]:
+        """Filter mob rows (id first) down to the ones this run has to process"""
+        entries = self.entries()
+        selected = []
+        for mob in mobs:
+            entry = entries.get(mob[0])
+            if entry is None:
+                if not only_failed:
+                    selected.append(mob)
+                continue
+            state, _, written_at = entry
+            if only_failed:
+                if state != WRITTEN:
+                    selected.append(mob)
+            elif since is not None:
+                if state != WRITTEN or written_at is None or written_at < since:
+                    selected.append(mob)
+            elif state != WRITTEN:
+                selected.append(mob)
+        return selected
+
+    def previous_hash(self, mob_id: int) -> Optional[str]:
+        """Items hash of the last result that was fully written for this mob"""
+        row = self.conn.execute("""
+            SELECT content_hash FROM crawl_journal
+            WHERE crawl = ? AND named_mob_id = ? AND written_at IS NOT NULL
+        """, (self.crawl, mob_id)).fetchone()
+        return row[0] if row else None
+
+    def mark(self, mob_id: int, slug: str, state: str, content_hash: Optional[str] = None,
+             item_count: Optional[int] = None, error: Optional[str] = None, commit: bool = True):
+        """Record a state transition; `written` also stamps written_at
+
+        Pass commit=False to make the transition part of the caller's transaction
+        (used so item rows and the `written` state land atomically).
+        """
+        self.conn.execute("""
+            INSERT INTO crawl_journal (crawl, named_mob_id, slug, state, content_hash, item_count, error,
+                                       updated_at, written_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP,
+                    CASE WHEN ? = 'written' THEN CURRENT_TIMESTAMP END)
+            ON CONFLICT(crawl, named_mob_id) DO UPDATE SET
+                slug = excluded.slug,
+                state = excluded.state,
+                content_hash = COALESCE(excluded.content_hash, content_hash),
+                item_count = COALESCE(excluded.item_count, item_count),
+                error = excluded.error,
+                updated_at = CURRENT_TIMESTAMP,
+                written_at = COALESCE(excluded.written_at, written_at)
+        """, (self.crawl, mob_id, slug, state, content_hash, item_count, error, state))
+        if commit:
+            self.conn.commit()
+
+    def mark_pending(self, mobs: Sequence[tuple]):
+        """Queue the selected mobs (id, name, slug, ...) in one transaction"""
+        self.conn.executemany("""
+            INSERT INTO crawl_journal (crawl, named_mob_id, slug, state)
+            VALUES (?, ?, ?, 'pending')
+            ON CONFLICT(crawl, named_mob_id) DO UPDATE SET state = 'pending', error = NULL,
+                updated_at = CURRENT_TIMESTAMP
+        """, [(self.crawl, mob[0], mob[2]) for mob in mobs])
+        self.conn.commit()
+
+    def summary(self) -> Dict[str, int]:
+        rows = self.conn.execute("""
+            SELECT state, COUNT(*) FROM crawl_journal WHERE crawl = ? GROUP BY state
+        """, (self.crawl,)).fetchall()
+        return dict(rows)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Producer/consumer pipeline for Codex mob crawls
+    fetchers (codex_client.iter_fetch, concurrent + rate limited)
+        -> bounded parse queue -> parser threads
+        -> bounded write queue -> one writer owning the SQLite connection
+
+Every queue is bounded, so a slow stage blocks the stages feeding it instead of
+piling pages up in memory. The writer drains the write queue in batches and
+commits each batch as one transaction, running each job's statements in order
+and grouping consecutive identical ones into a single executemany. A progress
+line reports rows/s and both queue depths: a full parse queue means parsing is
+the bottleneck, a full write queue means the database is, and two empty queues
+mean the crawl is waiting on the network.
+"""
+
+import itertools
+import queue
+import sqlite3
+import threading
+import time
+from operator import itemgetter
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from codex_client import DEFAULT_CONCURRENCY, iter_fetch
+
+_DONE = object()
+# A partial batch is committed once its oldest job has waited this long
+MAX_BATCH_AGE = 2.0
+
+
+class WriteJob:
+    """Everything the writer has to do for one mob: ordered (sql, params) statements"""
+
+    def __init__(self, key, statements: Sequence[Tuple[str, tuple]], rows: int = 0, info=None):
+        self.key = key
+        self.statements = list(statements)
+        # Rows counted towards the rows/s figure (usually the item INSERTs)
+        self.rows = rows
+        self.info = info
+
+
+class PipelineStats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.fetched = 0
+        self.fetch_failed = 0
+        self.parsed = 0
+        self.parse_failed = 0
+        self.jobs = 0
+        self.rows = 0
+        self.batches = 0
+        self.max_parse_depth = 0
+        self.max_write_depth = 0
+
+    def elapsed(self) -> float:
+        return max(time.monotonic() - self.started, 1e-9)
+
+    def rows_per_s(self) -> float:
+        return self.rows / self.elapsed()
+
+
+class CrawlPipeline:
+    """Fetch -> parse -> write with bounded queues and a single batched writer
+
+    parse(mob, response) runs on parser threads and returns a WriteJob, or None
+    when there is nothing to write. on_written(job) runs on the writer after the
+    batch holding the job has been committed.
+    """
+
+    def __init__(self, db_path: str, parse: Callable, fetch_concurrency: int = DEFAULT_CONCURRENCY,
+                 parsers: int = 2, queue_size: int = 32, batch_size: int = 50,
+                 report_every: float = 5.0, on_written: Optional[Callable] = None):
+        self.db_path = db_path
+        self.parse = parse
+        self.fetch_concurrency = fetch_concurrency
+        self.parsers = max(1, parsers)
+        self.batch_size = max(1, batch_size)
+        self.report_every = report_every
+        self.on_written = on_written
+        self.parse_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.write_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.stats = PipelineStats()
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+
+    # Stage 1: fetchers
+    def _fetch(self, mobs: Sequence[tuple], url_for: Callable):
+        try:
+            pages = iter_fetch((url_for(mob) for mob in mobs), concurrency=self.fetch_concurrency)
+            for mob, (url, response) in zip(mobs, pages):
+                if self._stop.is_set():
+                    break
+                if response is None or response.status != 200:
+                    self.stats.fetch_failed += 1
+                    print(f"    ❌ Failed to fetch {url}")
+                    continue
+                self.stats.fetched += 1
+                self.parse_queue.put((mob, response))
+        except BaseException as e:
+            self._errors.append(e)
+        finally:
+            for _ in range(self.parsers):
+                self.parse_queue.put(_DONE)
+
+    # Stage 2: parsers
+    def _parse_worker(self):
+        try:
+            while not self._stop.is_set():
+                try:
+                    entry = self.parse_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if entry is _DONE:
+                    break
+                mob, response = entry
+                try:
+                    job = self.parse(mob, response)
+                except Exception as e:
+                    with self._stats_lock:
+                        self.stats.parse_failed += 1
+                    print(f"    ❌ Parse error for {mob}: {e}")
+                    continue
+                with self._stats_lock:
+                    self.stats.parsed += 1
+                if job is not None:
+                    self.write_queue.put(job)
+        finally:
+            self.write_queue.put(_DONE)
+
+    # Stage 3: writer
+    def _write_batch(self, conn: sqlite3.Connection, jobs: List[WriteJob]):
+        # Statements keep their order; only consecutive identical ones of a job
+        # (e.g. its item INSERTs) share an executemany
+        with conn:
+            for job in jobs:
+                for sql, group in itertools.groupby(job.statements, key=itemgetter(0)):
+                    conn.executemany(sql, [params for _, params in group])
+        self.stats.batches += 1
+        self.stats.jobs += len(jobs)
+        self.stats.rows += sum(job.rows for job in jobs)
+        if self.on_written is not None:
+            for job in jobs:
+                self.on_written(job)
+
+    def _report(self):
+        stats = self.stats
+        print(f"⏱️  {stats.rows} rows ({stats.rows_per_s():.1f}/s) | fetched {stats.fetched} "
+              f"parsed {stats.parsed} | parse queue {self.parse_queue.qsize()}/{self.parse_queue.maxsize} "
+              f"write queue {self.write_queue.qsize()}/{self.write_queue.maxsize}")
+
+    def _writer(self, conn: sqlite3.Connection):
+        finished = 0
+        batch: List[WriteJob] = []
+        batch_started = 0.0
+        last_report = time.monotonic()
+        while finished < self.parsers:
+            self.stats.max_parse_depth = max(self.stats.max_parse_depth, self.parse_queue.qsize())
+            self.stats.max_write_depth = max(self.stats.max_write_depth, self.write_queue.qsize())
+            try:
+                entry = self.write_queue.get(timeout=0.5)
+            except queue.Empty:
+                entry = None
+            if entry is _DONE:
+                finished += 1
+            elif entry is not None:
+                if not batch:
+                    batch_started = time.monotonic()
+                batch.append(entry)
+            # Commit full batches, and partial ones when the queue idles or they get old
+            if batch and (len(batch) >= self.batch_size or entry is None
+                          or time.monotonic() - batch_started >= MAX_BATCH_AGE):
+                self._write_batch(conn, batch)
+                batch = []
+            if self.report_every and time.monotonic() - last_report >= self.report_every:
+                self._report()
+                last_report = time.monotonic()
+        if batch:
+            self._write_batch(conn, batch)
+
+    def _drain(self, threads: List[threading.Thread]):
+        """After a writer failure: unblock producers stuck on full queues until they exit"""
+        self._stop.set()
+        while any(thread.is_alive() for thread in threads):
+            for q in (self.parse_queue, self.write_queue):
+                try:
+                    while True:
+                        q.get_nowait()
+                except queue.Empty:
+                    pass
+            time.sleep(0.05)
+
+    def run(self, mobs: Iterable[tuple], url_for: Callable) -> PipelineStats:
+        mobs = list(mobs)
+        threads = [threading.Thread(target=self._fetch, args=(mobs, url_for), name='crawl-fetch', daemon=True)]
+        threads += [threading.Thread(target=self._parse_worker, name=f'crawl-parse-{i}', daemon=True)
+                    for i in range(self.parsers)]
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for thread in threads:
+                thread.start()
+            self._writer(conn)
+        except BaseException:
+            self._drain(threads)
+            raise
+        finally:
+            conn.close()
+            for thread in threads:
+                thread.join()
+        if self._errors:
+            raise self._errors[0]
+        self._report()
+        return self.stats
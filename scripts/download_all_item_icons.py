@@ -3,13 +3,15 @@
 Download ALL item icons for special items from Ashes Codex CDN
 """
 import sqlite3
-import requests
 import os
 import re
-import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def download_icon(item_data):
+from codex_client import print_throughput
+from icon_index import download_item_icon, get_icon_index
+from icon_probe import IconProber
+
+def download_icon(prober, item_data):
     item_name, item_url, item_type = item_data
     icons_dir = "app/frontend-dev/src/assets/icons/items"
     
@@ -29,7 +31,8 @@ def download_icon(item_data):
         if os.path.exists(filepath):
             return f"⏭️  {item_name}: Already exists"
         
-        # Try different icon URL patterns based on item code
+        # Learned layout for this code prefix first; these guesses only if it misses
+        # (the per-prefix patterns cover a cold index)
         icon_urls = []
         
         if item_code.startswith('Gear_Weapon_'):
@@ -50,18 +53,12 @@ def download_icon(item_data):
             f"https://cdn.ashescodex.com/UI/Icons/Gear/TUI_Icon_{item_code}_64.webp"
         ])
         
-        # Try each URL
-        for icon_url in icon_urls:
-            try:
-                response = requests.get(icon_url, timeout=15)
-                if response.status_code == 200:
-                    with open(filepath, 'wb') as f:
-                        f.write(response.content)
-                    return f"✅ {item_name}: Downloaded from {icon_url.split('/')[-2]}"
-            except:
-                continue
+        # Probe every candidate concurrently; known-dead URLs are skipped
+        result = download_item_icon(prober, item_code, filepath, icon_urls)
+        if result:
+            return f"✅ {item_name}: Downloaded from {result.url.split('/')[-2]}"
         
-        return f"❌ {item_name}: All URLs failed"
+        return f"❌ {item_name}: All URLs failed ({result.probed} probed, {result.skipped} known dead)"
         
     except Exception as e:
         return f"❌ {item_name}: Error - {e}"
@@ -93,35 +90,30 @@ def download_all_item_icons():
     items = cursor.fetchall()
     print(f"Found {len(items)} items to download...")
     
-    # Download in parallel (but be nice to the server)
+    # Download in parallel - the shared CDN token bucket keeps us at the allowed rate
     downloaded = 0
     failed = 0
+    prober = IconProber()
     
-    # Process in batches to be nice to the server
-    batch_size = 10
-    for i in range(0, len(items), batch_size):
-        batch = items[i:i+batch_size]
-        
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            futures = [executor.submit(download_icon, item) for item in batch]
-            
-            for future in as_completed(futures):
-                result = future.result()
-                print(f"  {result}")
-                if "✅" in result:
-                    downloaded += 1
-                else:
-                    failed += 1
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(download_icon, prober, item) for item in items]
         
-        # Pause between batches
-        if i + batch_size < len(items):
-            print(f"  💤 Pausing between batches... ({i+batch_size}/{len(items)})")
-            time.sleep(2)
+        for future in as_completed(futures):
+            result = future.result()
+            print(f"  {result}")
+            if "✅" in result:
+                downloaded += 1
+            else:
+                failed += 1
     
     conn.close()
+    prober.close()
     print(f"\n📊 Results:")
     print(f"✅ Downloaded: {downloaded}")
     print(f"❌ Failed: {failed}")
+    print(f"🔎 Probe: {prober.summary()}")
+    print("🗂️  Icon index: {} known items, {} layout rules".format(*get_icon_index().stats()))
+    print_throughput()
     print(f"📁 Icons saved to: {icons_dir}")
 
 if __name__ == "__main__":
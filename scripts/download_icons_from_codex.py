@@ -4,18 +4,20 @@ Download icons directly from Codex pages using our database URLs
 This approach uses the exact item URLs we already have in the database
 """
 import sqlite3
-import requests
 import re
 import os
-import time
+
+from codex_client import fetch
 
 def extract_icon_from_codex_page(codex_url):
     """Extract icon URL from a Codex item page"""
     try:
         print(f"    🔍 Scraping: {codex_url}")
-        response = requests.get(codex_url, timeout=15)
-        if response.status_code != 200:
-            print(f"    ❌ HTTP {response.status_code}")
+        response = fetch(codex_url, timeout=15)
+        if response is None:
+            return None
+        if response.status != 200:
+            print(f"    ❌ HTTP {response.status}")
             return None
         
         # Look for the icon URL in the HTML
@@ -37,13 +39,15 @@ def extract_icon_from_codex_page(codex_url):
 def download_icon(icon_url, filepath):
     """Download an icon to a file"""
     try:
-        response = requests.get(icon_url, timeout=10)
-        if response.status_code == 200 and len(response.content) > 100:
+        response = fetch(icon_url, timeout=10)
+        if response is None:
+            return False
+        if response.status == 200 and len(response.content) > 100:
             with open(filepath, 'wb') as f:
                 f.write(response.content)
             return True
         else:
-            print(f"    ❌ Download failed: HTTP {response.status_code}")
+            print(f"    ❌ Download failed: HTTP {response.status}")
             return False
     except Exception as e:
         print(f"    ❌ Download error: {e}")
@@ -110,9 +114,6 @@ def download_all_missing_icons():
                 print(f"    ❌ Download failed")
         else:
             print(f"    ❌ No icon URL found")
-        
-        # Be nice to the server
-        time.sleep(0.5)
     
     print(f"\n✅ Downloaded {downloaded} new icons")
     print(f"📊 Total icons now: {len(os.listdir(icons_dir))}")
@@ -3,17 +3,17 @@
 Download item icons by scraping the actual Codex item pages to get real icon URLs
 """
 import sqlite3
-import requests
 import os
 import re
-import time
 from bs4 import BeautifulSoup
 
+from codex_client import fetch
+
 def get_icon_from_page(item_url):
     """Get the actual icon URL from the Codex item page"""
     try:
-        response = requests.get(item_url, timeout=15)
-        if response.status_code != 200:
+        response = fetch(item_url, timeout=15)
+        if response is None or response.status != 200:
             return None
             
         soup = BeautifulSoup(response.content, 'html.parser')
@@ -83,20 +83,18 @@ def download_icons_from_pages():
                 print(f"    🔗 Found icon: {icon_url}")
                 
                 # Download the icon
-                icon_response = requests.get(icon_url, timeout=15)
-                if icon_response.status_code == 200:
+                icon_response = fetch(icon_url, timeout=15)
+                if icon_response is not None and icon_response.status == 200:
                     with open(filepath, 'wb') as f:
                         f.write(icon_response.content)
                     print(f"    ✅ Downloaded: {filename}")
                     downloaded += 1
                 else:
-                    print(f"    ❌ Download failed: {icon_response.status_code}")
+                    status = icon_response.status if icon_response is not None else 'network error'
+                    print(f"    ❌ Download failed: {status}")
             else:
                 print(f"    ❌ No icon found on page")
             
-            # Be nice to the server
-            time.sleep(1)
-            
         except Exception as e:
             print(f"    ❌ Error processing {item_name}: {e}")
     
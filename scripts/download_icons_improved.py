@@ -6,9 +6,10 @@ Based on user-provided working examples:
 - Book: /Gear/Weapon/Book/2H/TUI_Icon_Gear_Weapons_Book_2H_Common_64.webp
 """
 import sqlite3
-import requests
 import os
-import time
+
+from icon_index import download_item_icon, get_icon_index
+from icon_probe import IconProber
 
 # Weapon type mappings based on discovered patterns
 WEAPON_PATTERNS = {
@@ -108,9 +109,10 @@ def download_missing_icons():
     
     # Get items without icons
     cursor.execute("""
-        SELECT DISTINCT item_name, item_type 
+        SELECT item_name, item_type, MAX(COALESCE(item_url, ''))
         FROM named_mob_items 
         WHERE item_name IS NOT NULL AND item_name != ''
+        GROUP BY item_name, item_type
         ORDER BY item_name
     """)
     
@@ -119,8 +121,9 @@ def download_missing_icons():
     
     icons_dir = "app/frontend-built/assets/icons/items/"
     downloaded = 0
+    prober = IconProber()
     
-    for item_name, item_type in items:
+    for item_name, item_type, item_url in items:
         # Create safe filename
         safe_name = item_name.lower().replace(' ', '_').replace("'", '').replace('-', '_')
         safe_name = ''.join(c for c in safe_name if c.isalnum() or c == '_')
@@ -132,31 +135,25 @@ def download_missing_icons():
         
         print(f"📥 {item_name} ({item_type})")
         
-        # Try different URL patterns
-        success = False
-        for url in guess_icon_url(item_name, item_type):
-            try:
-                response = requests.get(url, timeout=10)
-                if response.status_code == 200 and len(response.content) > 100:
-                    with open(icon_path, 'wb') as f:
-                        f.write(response.content)
-                    print(f"    ✅ Downloaded from: {url}")
-                    downloaded += 1
-                    success = True
-                    break
-                else:
-                    print(f"    ❌ Failed: {url}")
-            except Exception as e:
-                print(f"    ❌ Error: {e}")
+        # Learned candidates for the item code first, then the guessed patterns
+        item_code = item_url.split('/item/')[1].split('?')[0] if '/item/' in item_url else ''
+        result = download_item_icon(prober, item_code, icon_path,
+                                    guess_icon_url(item_name, item_type), min_size=100)
+        success = bool(result)
+        if success:
+            print(f"    ✅ Downloaded from: {result.url}")
+            downloaded += 1
+        else:
+            print(f"    ❌ {result.probed} URLs probed, {result.skipped} known dead skipped")
         
         if not success:
             print(f"    ⚠️ No icon found for {item_name}")
-        
-        # Be nice to the server
-        time.sleep(0.5)
     
+    prober.close()
     print(f"\n✅ Downloaded {downloaded} new icons")
     print(f"📊 Total icons now: {len(os.listdir(icons_dir))}")
+    print(f"🔎 Probe: {prober.summary()}")
+    print("🗂️  Icon index: {} known items, {} layout rules".format(*get_icon_index().stats()))
 
 if __name__ == "__main__":
     download_missing_icons()
@@ -3,11 +3,11 @@
 Download item icons from Ashes Codex for special items
 """
 import sqlite3
-import requests
 import os
 import re
 from urllib.parse import urlparse
-import time
+
+from codex_client import fetch
 
 def download_item_icons():
     print("📥 Downloading item icons from Ashes Codex...")
@@ -59,18 +59,15 @@ def download_item_icons():
                 
                 # Download icon
                 print(f"  📥 {item_name}: {icon_url}")
-                response = requests.get(icon_url, timeout=10)
+                response = fetch(icon_url, timeout=10)
                 
-                if response.status_code == 200:
+                if response is not None and response.status == 200:
                     with open(filepath, 'wb') as f:
                         f.write(response.content)
                     print(f"    ✅ Downloaded: {filename}")
                     downloaded += 1
                 else:
-                    print(f"    ❌ Failed: {response.status_code}")
-                
-                # Be nice to the server
-                time.sleep(0.5)
+                    print(f"    ❌ Failed: {response.status if response is not None else 'network error'}")
                 
         except Exception as e:
             print(f"    ❌ Error downloading {item_name}: {e}")
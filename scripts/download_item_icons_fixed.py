@@ -3,10 +3,10 @@
 Download item icons from Ashes Codex CDN using correct URL pattern
 """
 import sqlite3
-import requests
 import os
 import re
-import time
+
+from codex_client import fetch
 
 def download_item_icons():
     print("📥 Downloading item icons from Ashes Codex CDN...")
@@ -79,9 +79,9 @@ def download_item_icons():
                 for icon_url in icon_paths:
                     print(f"  📥 {item_name}: {icon_url}")
                     try:
-                        response = requests.get(icon_url, timeout=10)
+                        response = fetch(icon_url, timeout=10)
                         
-                        if response.status_code == 200:
+                        if response is not None and response.status == 200:
                             with open(filepath, 'wb') as f:
                                 f.write(response.content)
                             print(f"    ✅ Downloaded: {filename}")
@@ -89,16 +89,13 @@ def download_item_icons():
                             success = True
                             break
                         else:
-                            print(f"    ❌ Failed: {response.status_code}")
+                            print(f"    ❌ Failed: {response.status if response is not None else 'network error'}")
                     except Exception as e:
                         print(f"    ❌ Error: {e}")
                 
                 if not success:
                     print(f"    ❌ All URLs failed for {item_name}")
                 
-                # Be nice to the server
-                time.sleep(0.5)
-                
         except Exception as e:
             print(f"    ❌ Error processing {item_name}: {e}")
     
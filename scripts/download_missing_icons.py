@@ -4,10 +4,11 @@ Download missing item icons using the complex Codex URL patterns
 Based on the example: /Light/Meshes/TUI_Icon_Gear_Armor_Light_Meshes_WoefulSlippers_64.webp
 """
 import sqlite3
-import requests
 import os
 import re
-import time
+
+from icon_index import download_item_icon, get_icon_index
+from icon_probe import IconProber
 
 def try_complex_patterns(item_code, item_name):
     """Try various complex URL patterns for Codex icons"""
@@ -20,13 +21,14 @@ def try_complex_patterns(item_code, item_name):
         if len(parts) >= 4:
             # Gear_Armor_Light_Bootshredder_Feet
             armor_type = parts[2]  # Light, Medium, Heavy
+            mesh_name = item_name.replace(' ', '').replace("'s", '')
             
             # Try different mesh/material patterns
             patterns.extend([
-                f"{base_url}Gear/Armor/{armor_type}/Meshes/TUI_Icon_Gear_Armor_{armor_type}_Meshes_{item_name.replace(' ', '').replace(''s', '')}_64.webp",
-                f"{base_url}Gear/Armor/{armor_type}/Leather/TUI_Icon_Gear_Armor_{armor_type}_Leather_{item_name.replace(' ', '').replace(''s', '')}_64.webp",
-                f"{base_url}Gear/Armor/{armor_type}/Plate/TUI_Icon_Gear_Armor_{armor_type}_Plate_{item_name.replace(' ', '').replace(''s', '')}_64.webp",
-                f"{base_url}Gear/Armor/{armor_type}/Mail/TUI_Icon_Gear_Armor_{armor_type}_Mail_{item_name.replace(' ', '').replace(''s', '')}_64.webp",
+                f"{base_url}Gear/Armor/{armor_type}/Meshes/TUI_Icon_Gear_Armor_{armor_type}_Meshes_{mesh_name}_64.webp",
+                f"{base_url}Gear/Armor/{armor_type}/Leather/TUI_Icon_Gear_Armor_{armor_type}_Leather_{mesh_name}_64.webp",
+                f"{base_url}Gear/Armor/{armor_type}/Plate/TUI_Icon_Gear_Armor_{armor_type}_Plate_{mesh_name}_64.webp",
+                f"{base_url}Gear/Armor/{armor_type}/Mail/TUI_Icon_Gear_Armor_{armor_type}_Mail_{mesh_name}_64.webp",
                 f"{base_url}Gear/Armor/{armor_type}/TUI_Icon_{item_code}_64.webp",
             ])
     
@@ -73,6 +75,7 @@ def download_missing_icons():
     print(f"Testing with {len(items)} problematic items...")
     
     downloaded = 0
+    prober = IconProber()
     for item_name, item_url, item_type in items:
         try:
             # Extract item code
@@ -89,35 +92,27 @@ def download_missing_icons():
             
             print(f"  📥 {item_name} ({item_code})")
             
-            # Try complex patterns
+            # Learned candidates first, complex patterns as the fallback
             patterns = try_complex_patterns(item_code, item_name)
             
-            success = False
-            for pattern in patterns:
-                try:
-                    response = requests.get(pattern, timeout=10)
-                    if response.status_code == 200:
-                        with open(filepath, 'wb') as f:
-                            f.write(response.content)
-                        print(f"    ✅ Downloaded from: {pattern.split('/')[-2]}")
-                        downloaded += 1
-                        success = True
-                        break
-                    else:
-                        print(f"    ❌ {pattern.split('/')[-2]}: {response.status_code}")
-                except:
-                    print(f"    ❌ {pattern.split('/')[-2]}: Error")
+            result = download_item_icon(prober, item_code, filepath, patterns)
+            success = bool(result)
+            if success:
+                print(f"    ✅ Downloaded from: {result.url.split('/')[-2]}")
+                downloaded += 1
             
             if not success:
-                print(f"    ❌ All patterns failed for {item_name}")
-            
-            time.sleep(0.5)
+                print(f"    ❌ All patterns failed for {item_name} "
+                      f"({result.probed} probed, {result.skipped} known dead)")
             
         except Exception as e:
             print(f"    ❌ Error processing {item_name}: {e}")
     
     conn.close()
+    prober.close()
     print(f"\n✅ Downloaded {downloaded} additional icons")
+    print(f"🔎 Probe: {prober.summary()}")
+    print("🗂️  Icon index: {} known items, {} layout rules".format(*get_icon_index().stats()))
 
 if __name__ == "__main__":
     download_missing_icons()
@@ -4,77 +4,9 @@ Extract item grades for ALL items using Codex search API
 This will fix the 'everything is blue' issue by getting proper grades
 """
 import sqlite3
-import requests
-import re
-import time
-import json
 
-def search_item_via_api(item_name):
-    """Search for item using Codex API and return item data"""
-    headers = {
-        'content-type': 'application/json',
-        'origin': 'https://ashescodex.com',
-        'referer': 'https://ashescodex.com/',
-        'user-agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'
-    }
-    
-    # Try different search variants for better matching
-    variants = [
-        item_name,  # Original name
-        item_name.replace("'", ""),  # Remove apostrophes
-        item_name.replace("'", " "),  # Replace apostrophes with spaces
-        " ".join(item_name.split()[:3]),  # First 3 words
-    ]
-    
-    for variant in variants:
-        try:
-            data = {"query": variant, "resultType": None}
-            response = requests.post('https://api.ashescodex.com/search', 
-                                   headers=headers, json=data, timeout=10)
-            
-            if response.status_code == 200:
-                results = response.json()
-                
-                # Look for exact match first
-                for result in results:
-                    if (result.get('item', {}).get('type') == 'item' and 
-                        result.get('item', {}).get('itemName') == item_name):
-                        return result.get('item', {})
-                
-                # Look for close matches
-                for result in results:
-                    if result.get('item', {}).get('type') == 'item':
-                        found_name = result.get('item', {}).get('itemName', '')
-                        if (item_name.lower().replace("'", "") in found_name.lower().replace("'", "") or
-                            found_name.lower().replace("'", "") in item_name.lower().replace("'", "")):
-                            print(f"    📝 Close match: '{found_name}'")
-                            return result.get('item', {})
-                            
-        except Exception as e:
-            print(f"    ❌ API error with '{variant}': {e}")
-            continue
-    
-    return None
-
-def extract_grade_from_codex_page(item_url):
-    """Extract grade from Codex item page"""
-    try:
-        response = requests.get(item_url, timeout=15)
-        if response.status_code != 200:
-            return None
-        
-        # Look for Grade information
-        grade_match = re.search(r'Grade:</span>\s*<span[^>]*>([^<]+)</span>', response.text)
-        
-        if grade_match:
-            grade = grade_match.group(1).strip()
-            return grade
-        else:
-            return None
-            
-    except Exception as e:
-        print(f"    ❌ Page scraping error: {e}")
-        return None
+from codex_client import print_throughput
+from item_grades import GradeResolver, code_from_url
 
 def extract_all_grades():
     """Extract grades for all items in database"""
@@ -99,25 +31,20 @@ def extract_all_grades():
     updated = 0
     failed = []
     
+    # Methods 1+2: cached mob payloads and search results, one batched search,
+    # and an item page scrape only for what neither source could grade
+    resolver = GradeResolver()
+    infos = resolver.resolve((item_name, code_from_url(item_url)) for _, item_name, item_url, _ in items)
+    print(f"🔎 {resolver.summary()}")
+    
     for item_id, item_name, item_url, item_rarity in items:
         print(f"📥 {item_name} (Rarity: {item_rarity})")
         
-        grade = None
-        
-        # Method 1: Try direct page scraping if we have URL
-        if item_url:
-            grade = extract_grade_from_codex_page(item_url)
-        
-        # Method 2: Try API search if direct scraping failed
-        if not grade:
-            print(f"    🔍 Trying API search...")
-            item_data = search_item_via_api(item_name)
-            if item_data and item_data.get('itemName') == item_name:
-                # Get the item URL from API and scrape it
-                api_name = item_data.get('name', '')
-                if api_name:
-                    api_url = f"https://ashescodex.com/db/item/{api_name}"
-                    grade = extract_grade_from_codex_page(api_url)
+        info = infos[code_from_url(item_url) or item_name]
+        grade = info.grade
+        if grade:
+            print(f"    🔍 From {info.source}")
+        item_rarity = item_rarity or info.rarity
         
         # Method 3: Fallback based on rarity (temporary)
         if not grade:
@@ -136,15 +63,13 @@ def extract_all_grades():
         else:
             print(f"    ❌ No grade found")
             failed.append(item_name)
-        
-        # Be nice to the API
-        time.sleep(1)
     
     conn.commit()
     conn.close()
     
     print(f"\n✅ Updated {updated} items with grades")
     print(f"❌ Failed: {len(failed)} items")
+    print_throughput()
     
     if failed:
         print(f"\n📝 Failed items:")
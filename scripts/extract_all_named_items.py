@@ -5,97 +5,64 @@ Excludes recipes and materials, only keeps weapons/armor/accessories
 """
 
 import sqlite3
-import subprocess
-import json
-import re
-import time
+
+from codex_client import fetch_text, mob_url, print_throughput
+from crawl_pipeline import CrawlPipeline, WriteJob
+from codex_payload import named_loot_tables, parse_page
 
 def extract_real_items_from_json(content, mob_name):
     """Extract real items from the JSON embedded in the page"""
     items = []
     
     try:
-        # Find the JSON data in the script tag
-        json_match = re.search(r'"body":"({.*?})"', content)
-        if not json_match:
-            return items
-            
-        # Decode the JSON string (it's double-encoded)
-        json_str = json_match.group(1)
-        # Unescape the JSON
-        json_str = json_str.replace('\\"', '"').replace('\\\\', '\\')
-        
-        data = json.loads(json_str)
+        data = parse_page(content)
         
-        if 'data' not in data or '_loot' not in data['data']:
-            return items
-            
         # Look through loot tables for _Named items
-        for loot_table in data['data']['_loot']:
-            table_name = loot_table.get('name', '')
+        for table_name, rewards in named_loot_tables(data):
+            print(f"    🎯 Found _Named table: {table_name}")
             
-            # Look for _Named pattern
-            if '_Named' in table_name:
-                print(f"    🎯 Found _Named table: {table_name}")
+            for reward in rewards:
+                item_name = reward.name
+                item_code = reward.code
+                min_rarity = reward.min_rarity
+                
+                # EXCLUDE recipes and materials based on ITEM CODE CATEGORIES - ONLY keep gear
+                if (item_code.startswith('Resource_') or
+                    item_code.startswith('Consumable_Recipe_') or
+                    item_code.startswith('Certificate_')):
+                    continue
+                
+                # ONLY include actual gear (weapons, armor, accessories) AND bags
+                if not (item_code.startswith('Gear_Weapon_') or 
+                       item_code.startswith('Gear_Armor_') or 
+                       item_code.startswith('Gear_Accessory_') or
+                       item_code.startswith('Bag_')):
+                    continue
+                    
+                item_url = f"https://ashescodex.com/db/item/{item_code}"
+                
+                # Determine item type - INCLUDE BAG SUPPORT
+                item_type = "Unknown"
+                if "Gear_Weapon_" in item_code:
+                    item_type = "Weapon"
+                elif "Gear_Accessory_" in item_code:
+                    item_type = "Accessory"
+                elif "Gear_Armor_" in item_code:
+                    item_type = "Armor"
+                elif "Bag_" in item_code:
+                    item_type = "Bag"
+                
+                drop_chance = reward.drop_chance
+                
+                items.append({
+                    'name': item_name,
+                    'url': item_url,
+                    'rarity': 'Uncommon' if min_rarity >= 2 else 'Common',
+                    'type': item_type,
+                    'drop_chance': drop_chance
+                })
                 
-                # Extract items from reward containers
-                if 'rewardDefContainers' in loot_table:
-                    for container in loot_table['rewardDefContainers']:
-                        if 'rewards' in container:
-                            # Get weights for drop chance calculation
-                            weights = container.get('weightsPerReward', [])
-                            total_weight = sum(weights) if weights else 0
-                            
-                            for i, reward in enumerate(container['rewards']):
-                                if 'itemRewards' in reward:
-                                    for item_reward in reward['itemRewards']:
-                                        if 'item' in item_reward and item_reward['item']:
-                                            item = item_reward['item']
-                                            item_name = item.get('itemName', 'Unknown')
-                                            item_code = item.get('name', '')
-                                            min_rarity = int(item.get('minRarity', '1'))
-                                            
-                                            # EXCLUDE recipes and materials based on ITEM CODE CATEGORIES - ONLY keep gear
-                                            if (item_code.startswith('Resource_') or
-                                                item_code.startswith('Consumable_Recipe_') or
-                                                item_code.startswith('Certificate_')):
-                                                continue
-                                            
-                                            # ONLY include actual gear (weapons, armor, accessories) AND bags
-                                            if not (item_code.startswith('Gear_Weapon_') or 
-                                                   item_code.startswith('Gear_Armor_') or 
-                                                   item_code.startswith('Gear_Accessory_') or
-                                                   item_code.startswith('Bag_')):
-                                                continue
-                                                
-                                            item_url = f"https://ashescodex.com/db/item/{item_code}"
-                                            
-                                            # Determine item type - INCLUDE BAG SUPPORT
-                                            item_type = "Unknown"
-                                            if "Gear_Weapon_" in item_code:
-                                                item_type = "Weapon"
-                                            elif "Gear_Accessory_" in item_code:
-                                                item_type = "Accessory"
-                                            elif "Gear_Armor_" in item_code:
-                                                item_type = "Armor"
-                                            elif "Bag_" in item_code:
-                                                item_type = "Bag"
-                                            
-                                            # Calculate drop chance from weights
-                                            drop_chance = "Unknown"
-                                            if weights and i < len(weights) and total_weight > 0:
-                                                chance_percent = (weights[i] / total_weight) * 100
-                                                drop_chance = f"{chance_percent:.1f}%"
-                                            
-                                            items.append({
-                                                'name': item_name,
-                                                'url': item_url,
-                                                'rarity': 'Uncommon' if min_rarity >= 2 else 'Common',
-                                                'type': item_type,
-                                                'drop_chance': drop_chance
-                                            })
-                                            
-                                            print(f"      ✅ {item_name} ({drop_chance}) - {item_type}")
+                print(f"      ✅ {item_name} ({drop_chance}) - {item_type}")
         
     except Exception as e:
         print(f"    ❌ Error parsing JSON: {e}")
@@ -105,12 +72,10 @@ def extract_real_items_from_json(content, mob_name):
 def fetch_real_items(mob_slug, mob_name):
     """Fetch and extract real items from Codex"""
     try:
-        url = f"https://ashescodex.com/db/mob/{mob_slug}"
-        result = subprocess.run(['curl', '-s', url], capture_output=True, text=True, timeout=15)
-        if result.returncode != 0:
+        content = fetch_text(mob_url(mob_slug))
+        if content is None:
             return []
             
-        content = result.stdout
         return extract_real_items_from_json(content, mob_name)
         
     except Exception as e:
@@ -139,46 +104,41 @@ def process_all_named_mobs():
     processed = 0
     found_items = 0
     
-    for mob in mobs:
+    def parse(mob, response):
         mob_id, name, slug, codex_url = mob
+        real_items = extract_real_items_from_json(response.text, name)
+        if not real_items:
+            print(f"    ⚠️  No special items found for {name}")
+            return None
         
-        print(f"\n📍 Processing: {name} ({slug})")
-        
-        # Fetch real items from Codex
-        real_items = fetch_real_items(slug, name)
-        
-        if real_items:
-            # Update database
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Clear existing items for this mob
-            cursor.execute("DELETE FROM named_mob_items WHERE named_mob_id = ?", (mob_id,))
-            
-            # Add real items
-            for i, item in enumerate(real_items, 1):
-                cursor.execute("""
-                    INSERT INTO named_mob_items 
-                    (named_mob_id, item_name, item_url, item_rarity, item_type, drop_order, drop_chance)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (mob_id, item['name'], item['url'], item['rarity'], item['type'], i, item['drop_chance']))
-            
-            conn.commit()
-            conn.close()
-            
-            print(f"    💾 Added {len(real_items)} special items")
-            processed += 1
-            found_items += len(real_items)
-        else:
-            print(f"    ⚠️  No special items found")
-        
-        # Rate limiting to be nice to Codex
-        time.sleep(1)
+        # Clear existing items for this mob, then add the real items
+        statements = [("DELETE FROM named_mob_items WHERE named_mob_id = ?", (mob_id,))]
+        for i, item in enumerate(real_items, 1):
+            statements.append(("""
+                INSERT INTO named_mob_items 
+                (named_mob_id, item_name, item_url, item_rarity, item_type, drop_order, drop_chance)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (mob_id, item['name'], item['url'], item['rarity'], item['type'], i, item['drop_chance'])))
+        return WriteJob(mob_id, statements, rows=len(real_items), info=name)
+    
+    def written(job):
+        nonlocal processed, found_items
+        print(f"    💾 {job.info}: added {job.rows} special items")
+        processed += 1
+        found_items += job.rows
+    
+    # Fetchers, parser threads and one batched writer run concurrently
+    pipeline = CrawlPipeline(db_path, parse, on_written=written)
+    stats = pipeline.run(mobs, lambda mob: mob_url(mob[2]))
     
     print(f"\n✅ Processing complete!")
     print(f"📊 Stats:")
     print(f"  - Processed: {processed} mobs")
     print(f"  - Total special items: {found_items}")
+    print(f"  - Failed fetches: {stats.fetch_failed}, parse errors: {stats.parse_failed}")
+    print(f"  - Writer: {stats.batches} batches, {stats.rows_per_s():.1f} rows/s, "
+          f"peak queue depth parse {stats.max_parse_depth} / write {stats.max_write_depth}")
+    print_throughput()
 
 def verify_results():
     """Show summary of extracted items"""
@@ -4,121 +4,101 @@ Extract ALL items from _Named categories EXCEPT recipes and materials
 Includes: Gear (weapons/armor/accessories), Bags, Artisan Clothing, Tools, etc.
 """
 
+import argparse
 import sqlite3
-import subprocess
-import json
-import re
-import time
+
+from codex_client import iter_fetch, mob_url, print_throughput
+from codex_payload import named_loot_tables, parse_page
+from crawl_journal import (CrawlJournal, FAILED, FETCHED, PARSED, WRITTEN,
+                           add_journal_arguments, items_hash)
 
 def extract_all_named_items(content, mob_name):
-    """Extract ALL items from _Named categories except recipes and materials"""
+    """Extract ALL items from _Named categories except recipes and materials
+
+    Parse errors propagate, so the caller journals a broken page as failed
+    instead of as a mob without items.
+    """
     items = []
     
     try:
-        # Find the JSON data in the script tag
-        json_match = re.search(r'"body":"({.*?})"', content)
-        if not json_match:
-            return items
-            
-        # Decode the JSON string (it's double-encoded)
-        json_str = json_match.group(1)
-        # Unescape the JSON
-        json_str = json_str.replace('\\"', '"').replace('\\\\', '\\')
+        data = parse_page(content)
+        if data is None:
+            raise ValueError("no loot payload in page")
         
-        data = json.loads(json_str)
-        
-        if 'data' not in data or '_loot' not in data['data']:
-            return items
-            
         # Look through loot tables for _Named items
-        for loot_table in data['data']['_loot']:
-            table_name = loot_table.get('name', '')
+        for table_name, rewards in named_loot_tables(data):
+            print(f"    🎯 Found _Named table: {table_name}")
             
-            # Look for _Named pattern
-            if '_Named' in table_name:
-                print(f"    🎯 Found _Named table: {table_name}")
+            for reward in rewards:
+                item_name = reward.name
+                item_code = reward.code
+                min_rarity = reward.min_rarity
+                
+                # SIMPLE FILTERING: ONLY exclude recipes and materials
+                # Keep EVERYTHING else from _Named categories
+                if (item_code.startswith('Resource_') or
+                    item_code.startswith('Consumable_Recipe_') or
+                    item_code.startswith('Certificate_')):
+                    continue
                 
-                # Extract items from reward containers
-                if 'rewardDefContainers' in loot_table:
-                    for container in loot_table['rewardDefContainers']:
-                        if 'rewards' in container:
-                            # Get weights for drop chance calculation
-                            weights = container.get('weightsPerReward', [])
-                            total_weight = sum(weights) if weights else 0
-                            
-                            for i, reward in enumerate(container['rewards']):
-                                if 'itemRewards' in reward:
-                                    for item_reward in reward['itemRewards']:
-                                        if 'item' in item_reward and item_reward['item']:
-                                            item = item_reward['item']
-                                            item_name = item.get('itemName', 'Unknown')
-                                            item_code = item.get('name', '')
-                                            min_rarity = int(item.get('minRarity', '1'))
-                                            
-                                            # SIMPLE FILTERING: ONLY exclude recipes and materials
-                                            # Keep EVERYTHING else from _Named categories
-                                            if (item_code.startswith('Resource_') or
-                                                item_code.startswith('Consumable_Recipe_') or
-                                                item_code.startswith('Certificate_')):
-                                                continue
-                                            
-                                            # Skip empty items
-                                            if not item_name or item_name == 'Unknown':
-                                                continue
-                                                
-                                            item_url = f"https://ashescodex.com/db/item/{item_code}"
-                                            
-                                            # Determine item type from code
-                                            item_type = "Unknown"
-                                            if item_code.startswith('Gear_Weapon_'):
-                                                item_type = "Weapon"
-                                            elif item_code.startswith('Gear_Accessory_'):
-                                                item_type = "Accessory"
-                                            elif item_code.startswith('Gear_Armor_'):
-                                                item_type = "Armor"
-                                            elif item_code.startswith('Bag_'):
-                                                item_type = "Bag"
-                                            elif item_code.startswith('Artisan_'):
-                                                item_type = "Artisan"
-                                            elif item_code.startswith('Tool_'):
-                                                item_type = "Tool"
-                                            else:
-                                                # For unknown types, try to guess from name
-                                                if any(word in item_name.lower() for word in ['bag', 'satchel', 'pouch']):
-                                                    item_type = "Bag"
-                                                elif any(word in item_name.lower() for word in ['apron', 'clothing', 'outfit']):
-                                                    item_type = "Artisan"
-                                                elif any(word in item_name.lower() for word in ['tool', 'hammer', 'pick']):
-                                                    item_type = "Tool"
-                                                else:
-                                                    item_type = "Special"
-                                            
-                                            # Calculate drop chance from weights
-                                            drop_chance = "Unknown"
-                                            if weights and i < len(weights) and total_weight > 0:
-                                                chance_percent = (weights[i] / total_weight) * 100
-                                                drop_chance = f"{chance_percent:.1f}%"
-                                            
-                                            items.append({
-                                                'name': item_name,
-                                                'url': item_url,
-                                                'rarity': 'Uncommon' if min_rarity >= 2 else 'Common',
-                                                'type': item_type,
-                                                'drop_chance': drop_chance
-                                            })
-                                            
-                                            print(f"      ✅ {item_name} ({drop_chance}) - {item_type}")
+                # Skip empty items
+                if not item_name or item_name == 'Unknown':
+                    continue
+                    
+                item_url = f"https://ashescodex.com/db/item/{item_code}"
+                
+                # Determine item type from code
+                item_type = "Unknown"
+                if item_code.startswith('Gear_Weapon_'):
+                    item_type = "Weapon"
+                elif item_code.startswith('Gear_Accessory_'):
+                    item_type = "Accessory"
+                elif item_code.startswith('Gear_Armor_'):
+                    item_type = "Armor"
+                elif item_code.startswith('Bag_'):
+                    item_type = "Bag"
+                elif item_code.startswith('Artisan_'):
+                    item_type = "Artisan"
+                elif item_code.startswith('Tool_'):
+                    item_type = "Tool"
+                else:
+                    # For unknown types, try to guess from name
+                    if any(word in item_name.lower() for word in ['bag', 'satchel', 'pouch']):
+                        item_type = "Bag"
+                    elif any(word in item_name.lower() for word in ['apron', 'clothing', 'outfit']):
+                        item_type = "Artisan"
+                    elif any(word in item_name.lower() for word in ['tool', 'hammer', 'pick']):
+                        item_type = "Tool"
+                    else:
+                        item_type = "Special"
+                
+                drop_chance = reward.drop_chance
+                
+                items.append({
+                    'name': item_name,
+                    'url': item_url,
+                    'rarity': 'Uncommon' if min_rarity >= 2 else 'Common',
+                    'type': item_type,
+                    'drop_chance': drop_chance
+                })
+                
+                print(f"      ✅ {item_name} ({drop_chance}) - {item_type}")
         
     except Exception as e:
         print(f"    ❌ Error parsing JSON: {e}")
+        raise
     
     return items
 
-def fix_all_remaining_mobs():
+def fix_all_remaining_mobs(only_failed=False, since=None, restart=False):
     """Re-process the remaining visible mobs with the fixed filtering"""
     db_path = '/app/database/db/mydb.sqlite'
+    # One connection for the whole run; every mob commits in its own transaction
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
+    journal = CrawlJournal(conn, 'named_items_fixed')
+    if restart:
+        journal.restart()
     
     # Get the remaining visible mobs (excluding Test Mob)
     cursor.execute("""
@@ -128,64 +108,80 @@ def fix_all_remaining_mobs():
         ORDER BY name
     """)
     
-    mobs = cursor.fetchall()
-    conn.close()
+    mobs = journal.select(cursor.fetchall(), only_failed=only_failed, since=since)
+    journal.mark_pending(mobs)
     
     print(f"🔍 Re-processing {len(mobs)} remaining mobs with FIXED filtering...")
     
     found_new_items = 0
+    unchanged = 0
     
-    for mob in mobs:
+    # Pages download concurrently (rate limited by the client) while we parse
+    pages = iter_fetch(mob_url(slug) for _, _, slug in mobs)
+    
+    for mob, (url, response) in zip(mobs, pages):
         mob_id, name, slug = mob
         
         print(f"\n📍 Re-processing: {name} ({slug})")
         
         # Fetch items from Codex with fixed filtering
         try:
-            url = f"https://ashescodex.com/db/mob/{slug}"
-            result = subprocess.run(['curl', '-s', url], capture_output=True, text=True, timeout=15)
-            if result.returncode != 0:
+            if response is None or response.status != 200:
                 print("    ❌ Failed to fetch page")
+                status = response.status if response is not None else 'no response'
+                journal.mark(mob_id, slug, FAILED, error=f"fetch: {status}")
                 continue
                 
-            content = result.stdout
+            content = response.text
+            journal.mark(mob_id, slug, FETCHED)
+            
             items = extract_all_named_items(content, name)
+            # Hash the _Named items we write, not the page around them
+            drops_hash = items_hash(items)
+            if drops_hash == journal.previous_hash(mob_id):
+                print("    ⏭️  Items unchanged since last write, skipping")
+                journal.mark(mob_id, slug, WRITTEN, content_hash=drops_hash)
+                unchanged += 1
+                continue
+            journal.mark(mob_id, slug, PARSED, item_count=len(items))
             
             if items:
-                # Update database
-                conn = sqlite3.connect(db_path)
-                cursor = conn.cursor()
-                
-                # Clear existing items
-                cursor.execute("DELETE FROM named_mob_items WHERE named_mob_id = ?", (mob_id,))
-                
-                # Add new items
-                for i, item in enumerate(items, 1):
-                    cursor.execute("""
-                        INSERT INTO named_mob_items 
-                        (named_mob_id, item_name, item_url, item_rarity, item_type, drop_order, drop_chance)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (mob_id, item['name'], item['url'], item['rarity'], item['type'], i, item['drop_chance']))
-                
-                # Hide this mob since it now has items
-                cursor.execute("UPDATE named_mobs SET is_hidden = 1 WHERE id = ?", (mob_id,))
-                
-                conn.commit()
-                conn.close()
+                # Items, hidden flag and journal state land in one transaction
+                with conn:
+                    # Clear existing items
+                    cursor.execute("DELETE FROM named_mob_items WHERE named_mob_id = ?", (mob_id,))
+                    
+                    # Add new items
+                    for i, item in enumerate(items, 1):
+                        cursor.execute("""
+                            INSERT INTO named_mob_items 
+                            (named_mob_id, item_name, item_url, item_rarity, item_type, drop_order, drop_chance)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)
+                        """, (mob_id, item['name'], item['url'], item['rarity'], item['type'], i, item['drop_chance']))
+                    
+                    # Hide this mob since it now has items
+                    cursor.execute("UPDATE named_mobs SET is_hidden = 1 WHERE id = ?", (mob_id,))
+                    journal.mark(mob_id, slug, WRITTEN, content_hash=drops_hash,
+                                 item_count=len(items), commit=False)
                 
                 print(f"    💾 Added {len(items)} items and hid mob")
                 found_new_items += len(items)
             else:
                 print(f"    ⚠️  Still no items found")
+                journal.mark(mob_id, slug, WRITTEN, content_hash=drops_hash, item_count=0)
         
         except Exception as e:
             print(f"    ❌ Error: {e}")
-        
-        # Rate limiting
-        time.sleep(1)
+            journal.mark(mob_id, slug, FAILED, error=str(e))
+    
+    summary = journal.summary()
+    conn.close()
     
     print(f"\n✅ Re-processing complete!")
     print(f"📊 Found {found_new_items} new items with fixed filtering")
+    print(f"📊 Unchanged mobs skipped: {unchanged}")
+    print(f"📊 Journal: {summary}")
+    print_throughput()
 
 def show_final_status():
     """Show final status after re-processing"""
@@ -215,10 +211,14 @@ def show_final_status():
     conn.close()
 
 def main():
+    parser = argparse.ArgumentParser(description='Re-extract _Named items with fixed filtering (resumable)')
+    add_journal_arguments(parser)
+    args = parser.parse_args()
+    
     print("🎯 Re-extracting with FIXED Filtering (ALL _Named items except recipes/materials)")
     print("=" * 80)
     
-    fix_all_remaining_mobs()
+    fix_all_remaining_mobs(only_failed=args.only_failed, since=args.since, restart=args.restart)
     show_final_status()
     
     print(f"\n🌐 Check results at: http://localhost:9090")
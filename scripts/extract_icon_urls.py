@@ -3,16 +3,16 @@
 Extract icon URLs from Codex item pages and store them in database for future use
 """
 import sqlite3
-import requests
 import re
-import time
+
+from codex_client import fetch
 
 def extract_icon_from_page(item_url):
     """Extract the icon URL from a Codex item page"""
     try:
         print(f"    🔍 Scraping: {item_url}")
-        response = requests.get(item_url, timeout=15)
-        if response.status_code != 200:
+        response = fetch(item_url, timeout=15)
+        if response is None or response.status != 200:
             return None
         
         # Look for the icon URL in the HTML
@@ -69,9 +69,6 @@ def extract_all_icon_urls():
             # Update database with icon URL
             cursor.execute("UPDATE named_mob_items SET icon_url = ? WHERE id = ?", (icon_url, item_id))
             updated += 1
-        
-        # Be nice to the server
-        time.sleep(1)
     
     conn.commit()
     conn.close()
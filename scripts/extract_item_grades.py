@@ -3,36 +3,13 @@
 Extract item GRADES from Codex pages (not rarities)
 Grade determines the color scheme: Initiate, Adept, Radiant
 """
+import argparse
 import sqlite3
-import requests
-import re
-import time
 
-def extract_grade_from_codex(item_url):
-    """Extract the Grade from a Codex item page"""
-    try:
-        print(f"    🔍 Scraping: {item_url}")
-        response = requests.get(item_url, timeout=15)
-        if response.status_code != 200:
-            return None
-        
-        # Look for Grade information in the HTML
-        # Pattern: <span class="text-white/80">Radiant</span> after "Grade:"
-        grade_match = re.search(r'Grade:</span>\s*<span[^>]*>([^<]+)</span>', response.text)
-        
-        if grade_match:
-            grade = grade_match.group(1).strip()
-            print(f"    ✅ Found grade: {grade}")
-            return grade
-        else:
-            print(f"    ❌ No grade found")
-            return None
-            
-    except Exception as e:
-        print(f"    ❌ Error: {e}")
-        return None
+from item_grades import GradeResolver, code_from_url
+from items_catalog import is_migrated, mark_fetched, stale_items
 
-def update_item_grades():
+def update_item_grades(refresh_days=None):
     """Update database with item grades from Codex"""
     print("🔍 Extracting item grades from Codex pages...")
     
@@ -41,40 +18,55 @@ def update_item_grades():
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
-    # Add grade column if it doesn't exist
-    try:
-        cursor.execute("ALTER TABLE named_mob_items ADD COLUMN item_grade TEXT")
-        print("✅ Added item_grade column")
-    except:
-        print("✅ item_grade column already exists")
-    
-    # Get items without grades
-    cursor.execute("""
-        SELECT id, item_name, item_url, item_rarity 
-        FROM named_mob_items 
-        WHERE item_url IS NOT NULL AND item_url != ''
-        AND (item_grade IS NULL OR item_grade = '')
-        ORDER BY item_name
-        LIMIT 20
-    """)
+    catalog = is_migrated(conn)
+    if catalog:
+        # One row per unique item: never-enriched ungraded items, or with
+        # --refresh-days every item last enriched more than N days ago
+        table = "items"
+        where = "item_url IS NOT NULL AND item_url != ''"
+        if not refresh_days:
+            where += " AND (item_grade IS NULL OR item_grade = '')"
+        items = [(item_id, name, url, rarity)
+                 for item_id, _, name, url, rarity in stale_items(conn, refresh_days, where)]
+    else:
+        table = "named_mob_items"
+        # Add grade column if it doesn't exist
+        try:
+            cursor.execute("ALTER TABLE named_mob_items ADD COLUMN item_grade TEXT")
+            print("✅ Added item_grade column")
+        except:
+            print("✅ item_grade column already exists")
+        
+        # Get items without grades
+        cursor.execute("""
+            SELECT id, item_name, item_url, item_rarity 
+            FROM named_mob_items 
+            WHERE item_url IS NOT NULL AND item_url != ''
+            AND (item_grade IS NULL OR item_grade = '')
+            ORDER BY item_name
+        """)
+        items = cursor.fetchall()
+    print(f"Processing {len(items)} {'catalog ' if catalog else ''}items...")
     
-    items = cursor.fetchall()
-    print(f"Processing {len(items)} items...")
+    # Grades come from cached payloads/search results; item pages are the last resort
+    resolver = GradeResolver()
+    infos = resolver.resolve((item_name, code_from_url(item_url)) for _, item_name, item_url, _ in items)
     
     updated = 0
     for item_id, item_name, item_url, item_rarity in items:
         print(f"📥 {item_name} (Rarity: {item_rarity})")
         
-        grade = extract_grade_from_codex(item_url)
+        info = infos[code_from_url(item_url) or item_name]
+        grade = info.grade
         
         if grade:
+            print(f"    ✅ Found grade: {grade} ({info.source})")
             # Update database with grade
-            cursor.execute("UPDATE named_mob_items SET item_grade = ? WHERE id = ?", (grade, item_id))
+            cursor.execute(f"UPDATE {table} SET item_grade = ? WHERE id = ?", (grade, item_id))
             updated += 1
-        
-        # Be nice to the server
-        time.sleep(1)
     
+    if catalog:
+        mark_fetched(conn, [item[0] for item in items])
     conn.commit()
     
     # Show grade distribution
@@ -82,6 +74,7 @@ def update_item_grades():
     grade_dist = cursor.fetchall()
     
     print(f"\n✅ Updated {updated} items with grades")
+    print(f"🔎 {resolver.summary()}")
     print(f"📊 Grade distribution:")
     for grade, count in grade_dist:
         print(f"  • {grade}: {count} items")
@@ -89,4 +82,7 @@ def update_item_grades():
     conn.close()
 
 if __name__ == "__main__":
-    update_item_grades()
+    parser = argparse.ArgumentParser(description='Extract item grades from Codex')
+    parser.add_argument('--refresh-days', type=float,
+                        help='With the item catalog: also re-grade items enriched more than N days ago')
+    update_item_grades(parser.parse_args().refresh_days)
@@ -5,19 +5,18 @@ Works with the 4 test mobs: Bloodmage Triune, Waterlogged Liffy, Forgelord Zamme
 """
 
 import sqlite3
-import subprocess
 import json
 import re
 
+from codex_client import fetch_text, mob_url
+
 def fetch_and_extract_named_data(mob_slug, mob_name):
     """Fetch mob page and extract _Named item data"""
     try:
-        url = f"https://ashescodex.com/db/mob/{mob_slug}"
-        result = subprocess.run(['curl', '-s', url], capture_output=True, text=True, timeout=15)
-        if result.returncode != 0:
+        content = fetch_text(mob_url(mob_slug))
+        if content is None:
             return []
             
-        content = result.stdout
         
         # Look for the _Named pattern specific to this mob
         expected_pattern = f"{mob_name.replace(' ', '_').replace('Bloodmage', 'Cultist_Mage')}_Named"
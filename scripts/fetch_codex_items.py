@@ -1,74 +1,66 @@
 #!/usr/bin/env python3
 """
 Fetch special items from Codex embed pages
-Parses the "Possible Drops" table to find uncommon items and their drop rates
+Reads the embedded loot payload to find uncommon items and their drop rates
 """
 
 import sqlite3
-import requests
-import re
-import time
-from urllib.parse import urljoin, unquote
+
+from codex_client import fetch_text, mob_url
+from codex_payload import loot_tables, parse_page
 
 def parse_codex_embed_page(mob_slug):
     """Parse the Codex embed page for a mob to extract special items"""
     try:
-        url = f"https://ashescodex.com/db/mob/{mob_slug}?embed=true"
+        url = f"{mob_url(mob_slug)}?embed=true"
         print(f"📡 Fetching: {url}")
         
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        content = response.text
+        content = fetch_text(url, timeout=10)
+        if content is None:
+            raise RuntimeError(f"could not fetch {url}")
         
-        # Parse the "Possible Drops" table
+        # The embed page carries the same SvelteKit loot payload as the full page;
+        # every loot table counts, like the whole "Possible Drops" section did
         items = []
         
-        # Look for table rows with item links and drop rates
-        # Pattern: [Item Name ](/db/item/item-url) | | | Drop Rate
-        pattern = r'\[([^]]+)\s+\]\(/db/item/([^)]+)\).*?(\d+(?:\.\d+)?%)'
-        
-        matches = re.findall(pattern, content, re.MULTILINE | re.DOTALL)
-        
-        for match in matches:
-            item_name = match[0].strip()
-            item_url_encoded = match[1]
-            drop_rate = match[2]
-            
-            # Decode URL encoding
-            item_url = unquote(item_url_encoded)
-            full_item_url = f"https://ashescodex.com/db/item/{item_url}"
+        for table_name, rewards in loot_tables(parse_page(content)):
+            for reward in rewards:
+                item_name = reward.name
+                item_code = reward.code
+                drop_rate = reward.drop_chance
+                full_item_url = reward.url
+                
+                # Determine item type and rarity based on patterns
+                item_type = "Unknown"
+                rarity = "Uncommon"  # Default for special drops
+                
+                if "Recipe" in item_name:
+                    item_type = "Recipe"
+                    rarity = "Common"
+                elif "Fragment" in item_name or "Bone" in item_name:
+                    item_type = "Material"
+                    rarity = "Common"
+                elif "Gear_Weapon" in item_code:
+                    item_type = "Weapon"
+                    rarity = "Uncommon"
+                elif "Gear_Accessory" in item_code:
+                    item_type = "Accessory" 
+                    rarity = "Uncommon"
+                elif "Gear_Armor" in item_code:
+                    item_type = "Armor"
+                    rarity = "Uncommon"
+                
+                # Only include uncommon items (the special drops)
+                if rarity == "Uncommon":
+                    items.append({
+                        'name': item_name,
+                        'url': full_item_url,
+                        'rarity': rarity,
+                        'type': item_type,
+                        'drop_chance': drop_rate
+                    })
+                    print(f"  ✅ Found special item: {item_name} ({drop_rate})")
             
-            # Determine item type and rarity based on patterns
-            item_type = "Unknown"
-            rarity = "Uncommon"  # Default for special drops
-            
-            if "Recipe" in item_name:
-                item_type = "Recipe"
-                rarity = "Common"
-            elif "Fragment" in item_name or "Bone" in item_name:
-                item_type = "Material"
-                rarity = "Common"
-            elif "Gear_Weapon" in item_url:
-                item_type = "Weapon"
-                rarity = "Uncommon"
-            elif "Gear_Accessory" in item_url:
-                item_type = "Accessory" 
-                rarity = "Uncommon"
-            elif "Gear_Armor" in item_url:
-                item_type = "Armor"
-                rarity = "Uncommon"
-            
-            # Only include uncommon items (the special drops)
-            if rarity == "Uncommon":
-                items.append({
-                    'name': item_name,
-                    'url': full_item_url,
-                    'rarity': rarity,
-                    'type': item_type,
-                    'drop_chance': drop_rate
-                })
-                print(f"  ✅ Found special item: {item_name} ({drop_rate})")
-        
         return items
         
     except Exception as e:
@@ -138,9 +130,6 @@ def process_named_mobs():
                 processed += 1
             else:
                 print(f"  ⚠️  No special items found")
-        
-        # Rate limiting
-        time.sleep(1)
     
     print(f"\n✅ Processed {processed} mobs with special items")
 
@@ -4,15 +4,16 @@ Fetch special items from named mobs based on _Named categories
 """
 
 import sqlite3
-import requests
 import json
 import re
 from urllib.parse import urljoin
 
+from codex_client import mob_url
+
 def get_mob_items_from_codex(mob_slug):
     """Fetch items from a specific mob page"""
     try:
-        url = f"https://ashescodex.com/db/mob/{mob_slug}"
+        url = mob_url(mob_slug)
         # This would need to scrape the actual page or use an API
         # For now, let's work with what we have and add the pattern matching
         print(f"Would fetch from: {url}")
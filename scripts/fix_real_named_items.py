@@ -4,89 +4,56 @@ Fix the test items with the REAL items from Codex JSON data
 """
 
 import sqlite3
-import subprocess
-import json
-import re
+
+from codex_client import fetch_text, mob_url
+from codex_payload import named_loot_tables, parse_page
 
 def extract_real_items_from_json(content, mob_name):
     """Extract real items from the JSON embedded in the page"""
     items = []
     
     try:
-        # Find the JSON data in the script tag
-        json_match = re.search(r'"body":"({.*?})"', content)
-        if not json_match:
-            return items
-            
-        # Decode the JSON string (it's double-encoded)
-        json_str = json_match.group(1)
-        # Unescape the JSON
-        json_str = json_str.replace('\\"', '"').replace('\\\\', '\\')
-        
-        data = json.loads(json_str)
+        data = parse_page(content)
         
-        if 'data' not in data or '_loot' not in data['data']:
-            return items
-            
         # Look through loot tables for _Named items
-        for loot_table in data['data']['_loot']:
-            table_name = loot_table.get('name', '')
+        for table_name, rewards in named_loot_tables(data):
+            print(f"    🎯 Found _Named table: {table_name}")
             
-            # Look for _Named pattern
-            if '_Named' in table_name:
-                print(f"    🎯 Found _Named table: {table_name}")
+            for reward in rewards:
+                item_name = reward.name
+                item_code = reward.code
+                min_rarity = reward.min_rarity
+                
+                # Skip recipes and common materials (but include the special items)
+                if 'Recipe:' in item_name:
+                    continue
                 
-                # Extract items from reward containers
-                if 'rewardDefContainers' in loot_table:
-                    for container in loot_table['rewardDefContainers']:
-                        if 'rewards' in container:
-                            # Get weights for drop chance calculation
-                            weights = container.get('weightsPerReward', [])
-                            total_weight = sum(weights) if weights else 0
-                            
-                            for i, reward in enumerate(container['rewards']):
-                                if 'itemRewards' in reward:
-                                    for item_reward in reward['itemRewards']:
-                                        if 'item' in item_reward and item_reward['item']:
-                                            item = item_reward['item']
-                                            item_name = item.get('itemName', 'Unknown')
-                                            item_code = item.get('name', '')
-                                            min_rarity = int(item.get('minRarity', '1'))
-                                            
-                                            # Skip recipes and common materials (but include the special items)
-                                            if 'Recipe:' in item_name:
-                                                continue
-                                            
-                                            # Only include items with rarity 2+ (uncommon+) or specific special items
-                                            if (min_rarity >= 2 or 
-                                                any(special in item_name for special in ['Waterlogged Gloves', 'Wand of Allurement', 'Silkwind Leggings'])):
-                                                
-                                                item_url = f"https://ashescodex.com/db/item/{item_code}"
-                                                
-                                                # Determine item type
-                                                item_type = "Unknown"
-                                                if "Weapon_" in item_code:
-                                                    item_type = "Weapon"
-                                                elif "Accessory_" in item_code:
-                                                    item_type = "Accessory"
-                                                elif "Armor_" in item_code:
-                                                    item_type = "Armor"
-                                                
-                                                # Calculate drop chance from weights
-                                                drop_chance = "Unknown"
-                                                if weights and i < len(weights) and total_weight > 0:
-                                                    chance_percent = (weights[i] / total_weight) * 100
-                                                    drop_chance = f"{chance_percent:.1f}%"
-                                                
-                                                items.append({
-                                                    'name': item_name,
-                                                    'url': item_url,
-                                                    'rarity': 'Uncommon' if min_rarity >= 2 else 'Common',
-                                                    'type': item_type,
-                                                    'drop_chance': drop_chance
-                                                })
-                                                
-                                                print(f"      ✅ {item_name} ({drop_chance}) - {item_type}")
+                # Only include items with rarity 2+ (uncommon+) or specific special items
+                if (min_rarity >= 2 or 
+                    any(special in item_name for special in ['Waterlogged Gloves', 'Wand of Allurement', 'Silkwind Leggings'])):
+                    
+                    item_url = f"https://ashescodex.com/db/item/{item_code}"
+                    
+                    # Determine item type
+                    item_type = "Unknown"
+                    if "Weapon_" in item_code:
+                        item_type = "Weapon"
+                    elif "Accessory_" in item_code:
+                        item_type = "Accessory"
+                    elif "Armor_" in item_code:
+                        item_type = "Armor"
+                    
+                    drop_chance = reward.drop_chance
+                    
+                    items.append({
+                        'name': item_name,
+                        'url': item_url,
+                        'rarity': 'Uncommon' if min_rarity >= 2 else 'Common',
+                        'type': item_type,
+                        'drop_chance': drop_chance
+                    })
+                    
+                    print(f"      ✅ {item_name} ({drop_chance}) - {item_type}")
         
     except Exception as e:
         print(f"    ❌ Error parsing JSON: {e}")
@@ -96,12 +63,10 @@ def extract_real_items_from_json(content, mob_name):
 def fetch_real_items(mob_slug, mob_name):
     """Fetch and extract real items from Codex"""
     try:
-        url = f"https://ashescodex.com/db/mob/{mob_slug}"
-        result = subprocess.run(['curl', '-s', url], capture_output=True, text=True, timeout=15)
-        if result.returncode != 0:
+        content = fetch_text(mob_url(mob_slug))
+        if content is None:
             return []
             
-        content = result.stdout
         return extract_real_items_from_json(content, mob_name)
         
     except Exception as e:
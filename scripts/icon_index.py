@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Learned item-code -> CDN icon path index
+Every confirmed icon location (search API `/Game/UI/Icons/Items/...` paths and
+every successful download) teaches the index two things:
+  - the exact icon URL of that item code, and
+  - a layout rule for its code prefixes (Gear_Weapon, Gear_Weapon_Sword, ...):
+    how the CDN subtree and the file name derive from the code tokens, e.g.
+    Gear_Weapon_* -> {0}/{1}/{2}/{3}/TUI_Icon_Gear_Weapons_{code[2:]}, so a
+    rule learned from swords also places a new mace under Gear/Weapon/Mace/1H
+Rules carry hit counts, so candidates for an unseen code are ranked by the most
+specific prefix first and by how often the rule was confirmed, and most new
+items resolve with one request instead of a pattern fan-out.
+
+Configuration (environment):
+    CODEX_ICON_INDEX_PATH=...   index database (default data/cache/icon_index.sqlite)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+CDN_ICON_BASE = "https://cdn.ashescodex.com/UI/Icons/Items/"
+GAME_ICON_PREFIX = "/Game/UI/Icons/Items/"
+DEFAULT_INDEX_PATH = 'data/cache/icon_index.sqlite'
+ICON_SIZE_SUFFIX = '_64.webp'
+# Code prefixes learned per item: Gear_Weapon, Gear_Weapon_Sword, Gear_Weapon_Sword_1H
+PREFIX_LEVELS = (4, 3, 2)
+
+
+def split_cdn_url(url: str) -> Optional[Tuple[str, str]]:
+    """(subtree, file stem) of a CDN icon URL, e.g. ('Gear/Weapon/Sword/1H', 'TUI_Icon_X')"""
+    if not url.startswith(CDN_ICON_BASE) or not url.endswith(ICON_SIZE_SUFFIX):
+        return None
+    rest = url[len(CDN_ICON_BASE):-len(ICON_SIZE_SUFFIX)]
+    subtree, _, stem = rest.rpartition('/')
+    return subtree, stem
+
+
+def game_path_to_cdn_url(icon_path: str) -> Optional[str]:
+    """/Game/UI/Icons/Items/<subtree>/<stem>.<stem> -> CDN 64px URL"""
+    if GAME_ICON_PREFIX not in icon_path:
+        return None
+    rest = icon_path.split(GAME_ICON_PREFIX, 1)[1]
+    subtree, _, stem = rest.rpartition('/')
+    stem = stem.split('.')[0]
+    return f"{CDN_ICON_BASE}{subtree}/{stem}{ICON_SIZE_SUFFIX}" if subtree else f"{CDN_ICON_BASE}{stem}{ICON_SIZE_SUFFIX}"
+
+
+def derive_rule(item_code: str, stem: str) -> Tuple[str, int]:
+    """How `stem` derives from `item_code`: (literal stem prefix, code tokens skipped)
+
+    The longest run of trailing code tokens the stem ends with is treated as
+    copied from the code; everything before it is literal. code_skip is -1 when
+    the stem shares no tail with the code (the rule then only knows the subtree).
+    """
+    code_tokens = item_code.split('_')
+    stem_tokens = stem.split('_')
+    common = 0
+    while (common < len(code_tokens) and common < len(stem_tokens)
+           and code_tokens[-1 - common] == stem_tokens[-1 - common]):
+        common += 1
+    if common == 0:
+        return '', -1
+    literal = '_'.join(stem_tokens[:len(stem_tokens) - common])
+    return (literal + '_' if literal else ''), len(code_tokens) - common
+
+
+def subtree_template(item_code: str, subtree: str) -> str:
+    """Subtree with directories that repeat a code token replaced by its position
+
+    ('Gear_Weapon_Sword_1H_Implacable', 'Gear/Weapon/Sword/1H') -> '{0}/{1}/{2}/{3}'
+    """
+    tokens = item_code.split('_')
+    segments = []
+    for segment in subtree.split('/') if subtree else ():
+        segments.append(f"{{{tokens.index(segment)}}}" if segment in tokens else segment)
+    return '/'.join(segments)
+
+
+def apply_rule(item_code: str, subtree: str, stem_prefix: str, code_skip: int) -> str:
+    """Candidate URL for `item_code` from a learned rule, or '' when it does not fit"""
+    tokens = item_code.split('_')
+    try:
+        subtree = subtree.format(*tokens)
+    except (IndexError, KeyError, ValueError):
+        return ''
+    if code_skip < 0:
+        stem = f"TUI_Icon_{item_code}"
+    else:
+        if code_skip >= len(tokens):
+            return ''
+        stem = stem_prefix + '_'.join(tokens[code_skip:])
+    base = f"{CDN_ICON_BASE}{subtree}/" if subtree else CDN_ICON_BASE
+    return f"{base}{stem}{ICON_SIZE_SUFFIX}"
+
+
+def code_prefixes(item_code: str) -> List[str]:
+    tokens = item_code.split('_')
+    return ['_'.join(tokens[:level]) for level in PREFIX_LEVELS if len(tokens) > level]
+
+
+class IconIndex:
+    """Persistent exact icon URLs and ranked prefix -> subtree rules"""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS icon_items (
+                item_code TEXT PRIMARY KEY,
+                cdn_url TEXT NOT NULL,
+                source TEXT NOT NULL,
+                seen_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS icon_rules (
+                prefix TEXT NOT NULL,
+                subtree TEXT NOT NULL,
+                stem_prefix TEXT NOT NULL,
+                code_skip INTEGER NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (prefix, subtree, stem_prefix, code_skip)
+            )
+        """)
+        self.conn.commit()
+
+    def learn_many(self, entries: Iterable[Tuple[str, str]], source: str):
+        """Record confirmed (item_code, cdn_url) pairs in one transaction"""
+        now = time.time()
+        confirmed = {}
+        for item_code, cdn_url in entries:
+            parts = split_cdn_url(cdn_url) if item_code and cdn_url else None
+            if parts is not None:
+                confirmed[item_code] = (cdn_url, parts)
+        if not confirmed:
+            return
+        with self._lock:
+            with self.conn:
+                # A rule hit counts once per item code, not once per re-confirmation
+                known = dict(self.conn.execute(
+                    f"SELECT item_code, cdn_url FROM icon_items WHERE item_code IN ({','.join('?' * len(confirmed))})",
+                    list(confirmed)).fetchall())
+                rules = []
+                for item_code, (cdn_url, (subtree, stem)) in confirmed.items():
+                    if known.get(item_code) == cdn_url:
+                        continue
+                    stem_prefix, code_skip = derive_rule(item_code, stem)
+                    template = subtree_template(item_code, subtree)
+                    rules.extend((prefix, template, stem_prefix, code_skip, now)
+                                 for prefix in code_prefixes(item_code))
+                self.conn.executemany("""
+                    INSERT OR REPLACE INTO icon_items (item_code, cdn_url, source, seen_at)
+                    VALUES (?, ?, ?, ?)
+                """, [(item_code, cdn_url, source, now) for item_code, (cdn_url, _) in confirmed.items()])
+                self.conn.executemany("""
+                    INSERT INTO icon_rules (prefix, subtree, stem_prefix, code_skip, hits, last_seen)
+                    VALUES (?, ?, ?, ?, 1, ?)
+                    ON CONFLICT(prefix, subtree, stem_prefix, code_skip) DO UPDATE SET
+                        hits = hits + 1, last_seen = excluded.last_seen
+                """, rules)
+
+    def learn(self, item_code: str, cdn_url: str, source: str = 'download'):
+        self.learn_many([(item_code, cdn_url)], source)
+
+    def learn_game_paths(self, entries: Iterable[Tuple[str, str]]):
+        """Learn from search API results: (item code, /Game/UI/Icons/Items/... path)"""
+        self.learn_many(((code, game_path_to_cdn_url(path or '')) for code, path in entries), 'search')
+
+    def exact(self, item_code: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute("SELECT cdn_url FROM icon_items WHERE item_code = ?",
+                                    (item_code,)).fetchone()
+        return row[0] if row else None
+
+    def candidates(self, item_code: str, limit: int = 4) -> List[str]:
+        """Most likely icon URLs for a code: the known URL, then rules by prefix specificity and hits"""
+        urls = []
+        known = self.exact(item_code)
+        if known:
+            urls.append(known)
+        prefixes = code_prefixes(item_code)
+        if prefixes:
+            with self._lock:
+                rows = self.conn.execute(f"""
+                    SELECT prefix, subtree, stem_prefix, code_skip, hits FROM icon_rules
+                    WHERE prefix IN ({','.join('?' * len(prefixes))})
+                """, prefixes).fetchall()
+            # Longer (more specific) prefixes first, then the most confirmed rules
+            rows.sort(key=lambda row: (-len(row[0]), row[3] < 0, -row[4]))
+            for _, subtree, stem_prefix, code_skip, _ in rows:
+                url = apply_rule(item_code, subtree, stem_prefix, code_skip)
+                if url and url not in urls:
+                    urls.append(url)
+        return urls[:limit]
+
+    def stats(self) -> Tuple[int, int]:
+        with self._lock:
+            items = self.conn.execute("SELECT COUNT(*) FROM icon_items").fetchone()[0]
+            rules = self.conn.execute("SELECT COUNT(*) FROM icon_rules").fetchone()[0]
+        return items, rules
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def download_item_icon(prober, item_code: str, filepath: str, guesses: Iterable[str] = (),
+                       min_size: int = 0, index: Optional['IconIndex'] = None):
+    """Try learned candidates first (one small wave), then the hand-written guesses
+
+    Hits are fed back into the index. Returns the prober's ProbeResult.
+    """
+    index = index or get_icon_index()
+    learned = index.candidates(item_code) if item_code else []
+    result = prober.download(learned, filepath, min_size=min_size) if learned else None
+    if not result:
+        rest = [url for url in guesses if url not in learned]
+        fallback = prober.download(rest, filepath, min_size=min_size)
+        if result is not None:
+            fallback.probed += result.probed
+            fallback.skipped += result.skipped
+        result = fallback
+    if result and item_code:
+        index.learn(item_code, result.url)
+    return result
+
+
+_default_index: Optional[IconIndex] = None
+_default_lock = threading.Lock()
+
+
+def get_icon_index() -> IconIndex:
+    """Process-wide index built from the environment"""
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = IconIndex(os.environ.get('CODEX_ICON_INDEX_PATH', DEFAULT_INDEX_PATH))
+        return _default_index
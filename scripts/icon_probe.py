@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Concurrent icon URL prober for the Ashes Codex CDN
+Candidate icon URLs (pattern guesses) are checked with HEAD requests that run
+concurrently over the shared keep-alive pool, a few at a time in priority order;
+the best-ranked URL that exists wins and no further candidates are tried. URLs
+the CDN answered 404/403 for are remembered in a persistent negative cache, so
+repeat runs skip paths already known to be dead until the entry expires.
+
+Configuration (environment):
+    CODEX_ICON_DEAD_PATH=...    negative cache database (default data/cache/icon_dead_urls.sqlite)
+    CODEX_ICON_DEAD_TTL=...     seconds a dead URL is skipped (default 7 days)
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from codex_client import CodexClient
+
+DEFAULT_DEAD_PATH = 'data/cache/icon_dead_urls.sqlite'
+DEFAULT_DEAD_TTL = 7 * 24 * 3600
+# CDN answers meaning "no object at this path"
+DEAD_STATUSES = (403, 404, 410)
+# Candidates probed per wave; a wave with a hit ends the probe
+DEFAULT_PROBE_CONCURRENCY = 8
+
+
+class DeadUrlCache:
+    """Persistent set of URLs known to be missing on the CDN, with expiry"""
+
+    def __init__(self, path: str = DEFAULT_DEAD_PATH, ttl: float = DEFAULT_DEAD_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS dead_urls (
+                url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                checked_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def dead(self, urls: Iterable[str]) -> set:
+        """The subset of `urls` still known to be dead"""
+        urls = list(urls)
+        if not urls:
+            return set()
+        cutoff = time.time() - self.ttl
+        placeholders = ','.join('?' * len(urls))
+        with self._lock:
+            rows = self.conn.execute(f"""
+                SELECT url FROM dead_urls WHERE checked_at >= ? AND url IN ({placeholders})
+            """, [cutoff] + urls).fetchall()
+        return {row[0] for row in rows}
+
+    def mark_dead(self, entries: Dict[str, int]):
+        """Remember url -> status for every URL the CDN does not have"""
+        if not entries:
+            return
+        now = time.time()
+        with self._lock:
+            self.conn.executemany("INSERT OR REPLACE INTO dead_urls (url, status, checked_at) VALUES (?, ?, ?)",
+                                  [(url, status, now) for url, status in entries.items()])
+            self.conn.commit()
+
+    def forget(self, url: str):
+        with self._lock:
+            self.conn.execute("DELETE FROM dead_urls WHERE url = ?", (url,))
+            self.conn.commit()
+
+    def purge(self):
+        """Drop expired entries"""
+        with self._lock:
+            self.conn.execute("DELETE FROM dead_urls WHERE checked_at < ?", (time.time() - self.ttl,))
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class ProbeResult:
+    def __init__(self, url: Optional[str], probed: int, skipped: int):
+        self.url = url
+        self.probed = probed
+        self.skipped = skipped
+
+    def __bool__(self):
+        return self.url is not None
+
+
+class IconProber:
+    """HEAD-probe candidate URLs concurrently; first (best-ranked) hit wins"""
+
+    def __init__(self, concurrency: int = DEFAULT_PROBE_CONCURRENCY,
+                 dead_cache: Optional[DeadUrlCache] = None):
+        self.concurrency = max(1, concurrency)
+        self.dead_cache = dead_cache if dead_cache is not None else get_dead_cache()
+        self.client = CodexClient(concurrency=self.concurrency)
+        self.probed = 0
+        self.skipped = 0
+        self.hits = 0
+
+    async def _exists(self, url: str) -> Optional[int]:
+        response = await self.client.head(url)
+        if response is not None and response.status == 405:
+            # CDN without HEAD support - fall back to a full GET
+            response = await self.client.get(url)
+        return None if response is None else response.status
+
+    async def _probe(self, candidates: List[str]) -> Tuple[Optional[str], int]:
+        """(best-ranked live URL or None, number of URLs actually probed)"""
+        probed = 0
+        for start in range(0, len(candidates), self.concurrency):
+            wave = candidates[start:start + self.concurrency]
+            probed += len(wave)
+            statuses = await asyncio.gather(*(self._exists(url) for url in wave))
+            self.dead_cache.mark_dead({url: status for url, status in zip(wave, statuses)
+                                       if status in DEAD_STATUSES})
+            for url, status in zip(wave, statuses):
+                if status == 200:
+                    return url, probed
+        return None, probed
+
+    def probe(self, urls: Iterable[str]) -> ProbeResult:
+        """Return the best-ranked live URL among `urls` (in the order given)"""
+        candidates = []
+        for url in urls:
+            if url not in candidates:
+                candidates.append(url)
+        dead = self.dead_cache.dead(candidates)
+        live = [url for url in candidates if url not in dead]
+        self.skipped += len(dead)
+
+        url, probed = asyncio.run(self._probe(live)) if live else (None, 0)
+        self.probed += probed
+        if url is not None:
+            self.hits += 1
+        return ProbeResult(url, probed, len(dead))
+
+    def download(self, urls: Iterable[str], filepath: str, min_size: int = 0) -> ProbeResult:
+        """Probe, then GET the winning URL into `filepath`; result.url is None on failure"""
+        result = self.probe(urls)
+        if not result:
+            return result
+        response = asyncio.run(self.client.get(result.url))
+        if response is None or response.status != 200 or len(response.content) <= min_size:
+            return ProbeResult(None, result.probed, result.skipped)
+        with open(filepath, 'wb') as f:
+            f.write(response.content)
+        return result
+
+    def summary(self) -> str:
+        return f"{self.hits} hits, {self.probed} URLs probed, {self.skipped} known-dead URLs skipped"
+
+    def close(self):
+        self.client.close()
+
+
+_default_dead_cache: Optional[DeadUrlCache] = None
+_default_lock = threading.Lock()
+
+
+def get_dead_cache() -> DeadUrlCache:
+    """Process-wide negative cache built from the environment"""
+    global _default_dead_cache
+    with _default_lock:
+        if _default_dead_cache is None:
+            _default_dead_cache = DeadUrlCache(
+                path=os.environ.get('CODEX_ICON_DEAD_PATH', DEFAULT_DEAD_PATH),
+                ttl=float(os.environ.get('CODEX_ICON_DEAD_TTL', DEFAULT_DEAD_TTL)),
+            )
+        return _default_dead_cache
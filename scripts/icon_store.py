@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Content-addressed icon store
+Icon bytes are stored once per distinct content under their SHA-256
+(data/cache/icon_store/blobs/ab/abcd....webp) and a manifest maps item name ->
+blob. The built and dev asset trees are populated from the store with
+hardlinks (reflinks when the trees live on another filesystem, a plain copy
+as the last resort), so items sharing an icon share the bytes, nothing is
+written twice, and "already downloaded" is a manifest lookup.
+
+Usage:
+    python3 scripts/icon_store.py --import     # adopt the icons already in the asset trees
+    python3 scripts/icon_store.py --publish    # (re)link every manifest entry into the trees
+    python3 scripts/icon_store.py              # store statistics
+
+Configuration (environment):
+    CODEX_ICON_STORE=...        store directory (default data/cache/icon_store)
+"""
+
+import argparse
+import errno
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional, Sequence
+
+DEFAULT_STORE_DIR = 'data/cache/icon_store'
+BUILT_ICONS_DIR = 'app/frontend-built/assets/icons/items/'
+DEV_ICONS_DIR = 'app/frontend-dev/src/assets/icons/items/'
+PUBLISH_DIRS = (BUILT_ICONS_DIR, DEV_ICONS_DIR)
+# Linux FICLONE ioctl (btrfs, xfs, bcachefs): copy-on-write clone of a whole file
+FICLONE = 0x40049409
+
+
+def icon_filename(item_name: str) -> str:
+    """Asset file name of an item icon: "Archmage's Insight" -> archmages_insight.webp"""
+    safe_name = item_name.lower().replace(' ', '_').replace("'", '').replace('-', '_')
+    safe_name = ''.join(c for c in safe_name if c.isalnum() or c == '_').strip('_')
+    return f"{safe_name}.webp"
+
+
+def _reflink(src: str, dst: str) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            return True
+        except OSError:
+            pass
+    os.unlink(dst)
+    return False
+
+
+def link_file(src: str, dst: str) -> str:
+    """Atomically make `dst` a hardlink/reflink/copy of `src`; returns the method used"""
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        return 'present'
+    tmp = f"{dst}.tmp{os.getpid()}"
+    try:
+        os.link(src, tmp)
+        method = 'hardlink'
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+            raise
+        if _reflink(src, tmp):
+            method = 'reflink'
+        else:
+            shutil.copyfile(src, tmp)
+            method = 'copy'
+    os.replace(tmp, dst)
+    return method
+
+
+class IconStore:
+    """SHA-256 blob store plus an item name -> blob manifest"""
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR, publish_dirs: Sequence[str] = PUBLISH_DIRS):
+        self.root = root
+        self.blob_dir = os.path.join(root, 'blobs')
+        self.publish_dirs = tuple(publish_dirs)
+        self._lock = threading.Lock()
+
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root, 'manifest.sqlite'), timeout=30,
+                                    check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS icon_manifest (
+                item_name TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                blob TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                source_url TEXT,
+                added_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_icon_manifest_blob ON icon_manifest(blob)")
+        self.conn.commit()
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], f"{digest}.webp")
+
+    def put(self, content: bytes) -> str:
+        """Store bytes under their SHA-256 (no-op when the blob exists); returns the digest"""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+            with open(tmp, 'wb') as f:
+                f.write(content)
+            os.replace(tmp, path)
+        return digest
+
+    def add(self, item_name: str, content: bytes, source_url: Optional[str] = None,
+            publish: bool = True) -> str:
+        """Store an item's icon, record it in the manifest and (by default) publish it"""
+        digest = self.put(content)
+        self._record(item_name, digest, len(content), source_url)
+        if publish:
+            self.publish(item_name)
+        return digest
+
+    def _record(self, item_name: str, digest: str, size: int, source_url: Optional[str]):
+        with self._lock:
+            with self.conn:
+                self.conn.execute("""
+                    INSERT OR REPLACE INTO icon_manifest (item_name, filename, blob, size, source_url, added_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (item_name, icon_filename(item_name), digest, size, source_url, time.time()))
+
+    def lookup(self, item_name: str) -> Optional[str]:
+        """Blob digest of an item's icon, or None when the store has none
+
+        Entries imported by file name are re-keyed to the real item name, and an
+        icon already sitting in the first publish tree from before the store
+        existed is adopted on first lookup instead of being downloaded again.
+        """
+        filename = icon_filename(item_name)
+        with self._lock:
+            row = self.conn.execute("SELECT blob FROM icon_manifest WHERE item_name = ?",
+                                    (item_name,)).fetchone()
+            alias = None if row else self.conn.execute(
+                "SELECT blob, size, source_url FROM icon_manifest WHERE filename = ? LIMIT 1",
+                (filename,)).fetchone()
+        if row:
+            return row[0]
+        if alias:
+            self._record(item_name, *alias)
+            return alias[0]
+        if self.publish_dirs:
+            legacy = os.path.join(self.publish_dirs[0], filename)
+            if os.path.exists(legacy):
+                with open(legacy, 'rb') as f:
+                    return self.add(item_name, f.read(), publish=False)
+        return None
+
+    def has(self, item_name: str) -> bool:
+        return self.lookup(item_name) is not None
+
+    def publish(self, item_name: str) -> dict:
+        """Link an item's blob into every publish tree; {dir: method}"""
+        with self._lock:
+            row = self.conn.execute("SELECT filename, blob FROM icon_manifest WHERE item_name = ?",
+                                    (item_name,)).fetchone()
+        if not row:
+            raise KeyError(item_name)
+        filename, digest = row
+        methods = {}
+        for directory in self.publish_dirs:
+            os.makedirs(directory, exist_ok=True)
+            methods[directory] = link_file(self.blob_path(digest), os.path.join(directory, filename))
+        return methods
+
+    def publish_all(self) -> dict:
+        """Relink every manifest entry; counts per link method"""
+        with self._lock:
+            names = [row[0] for row in self.conn.execute("SELECT item_name FROM icon_manifest")]
+        counts = {}
+        for item_name in names:
+            for method in self.publish(item_name).values():
+                counts[method] = counts.get(method, 0) + 1
+        return counts
+
+    def import_dirs(self, directories: Iterable[str]) -> int:
+        """Adopt existing *.webp icons (file name -> item name is lossy, so the stem is used)"""
+        imported = 0
+        for directory in directories:
+            if not os.path.isdir(directory):
+                continue
+            for filename in sorted(os.listdir(directory)):
+                if not filename.endswith('.webp'):
+                    continue
+                item_name = filename[:-len('.webp')]
+                with self._lock:
+                    known = self.conn.execute("SELECT 1 FROM icon_manifest WHERE filename = ?",
+                                              (filename,)).fetchone()
+                if known:
+                    continue
+                with open(os.path.join(directory, filename), 'rb') as f:
+                    self.add(item_name, f.read(), publish=False)
+                imported += 1
+        return imported
+
+    def stats(self) -> dict:
+        with self._lock:
+            items, blobs, logical = self.conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT blob), COALESCE(SUM(size), 0) FROM icon_manifest").fetchone()
+            stored = self.conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM icon_manifest GROUP BY blob)"
+            ).fetchone()[0]
+        return {'items': items, 'blobs': blobs, 'logical_bytes': logical, 'stored_bytes': stored}
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_default_store: Optional[IconStore] = None
+_default_lock = threading.Lock()
+
+
+def get_icon_store() -> IconStore:
+    """Process-wide store built from the environment"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = IconStore(os.environ.get('CODEX_ICON_STORE', DEFAULT_STORE_DIR))
+        return _default_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Content-addressed icon store')
+    parser.add_argument('--import', dest='import_trees', action='store_true',
+                        help='Adopt the icons already present in the asset trees')
+    parser.add_argument('--publish', action='store_true', help='Relink every stored icon into the asset trees')
+    args = parser.parse_args()
+
+    store = get_icon_store()
+    if args.import_trees:
+        print(f"📦 Imported {store.import_dirs(store.publish_dirs)} icons into {store.root}")
+    if args.publish:
+        counts = store.publish_all()
+        print("🔗 Published: " + ", ".join(f"{count} {method}" for method, count in sorted(counts.items())))
+    stats = store.stats()
+    print(f"📊 {stats['items']} items -> {stats['blobs']} blobs, "
+          f"{stats['stored_bytes'] / 1024:.0f} KB stored for {stats['logical_bytes'] / 1024:.0f} KB of icons")
+
+
+if __name__ == "__main__":
+    main()
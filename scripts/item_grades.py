@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Item grade/rarity resolver
+Grades and rarities are looked up where we already have the data before any
+item page is fetched:
+  1. item objects inside the mob payloads stored in the HTTP cache
+     (minRarity and any grade field of every loot entry),
+  2. item objects from Codex search results (cached ones first, then one
+     batched, de-duplicated search for the names still missing),
+  3. only then the item page itself, scraped for "Grade:" (cache-aware).
+
+Usage (as a library):
+    resolver = GradeResolver()
+    infos = resolver.resolve([(item_name, item_code), ...])
+    infos[item_code].grade, infos[item_code].rarity, infos[item_code].source
+"""
+
+import json
+import re
+import sqlite3
+import zlib
+from typing import Dict, Iterable, Optional, Tuple
+
+from codex_cache import get_cache
+from codex_client import SEARCH_URL, fetch_text, item_url
+from codex_payload import parse_page, table_rewards
+from codex_search import SearchResolver
+
+# Rarity names used throughout named_mob_items.item_rarity
+RARITY_NAMES = {1: 'Common', 2: 'Uncommon', 3: 'Rare', 4: 'Epic', 5: 'Legendary'}
+# Item object fields that may carry the grade (string, or a dict with a name)
+GRADE_KEYS = ('grade', 'itemGrade', 'gearGrade')
+GRADE_PATTERN = re.compile(r'Grade:</span>\s*<span[^>]*>([^<]+)</span>')
+
+
+def item_grade(item: dict) -> Optional[str]:
+    """Grade carried by a Codex item object
+
+    The enum form is normalized ('EItemGrade::RADIANT' -> 'Radiant'); short
+    grade codes stay upper-case ('ng' -> 'NG') to match the GRADE_ORDER keys.
+    """
+    for key in GRADE_KEYS:
+        value = item.get(key)
+        if isinstance(value, dict):
+            value = value.get('displayName') or value.get('name')
+        if isinstance(value, str) and value.strip() and value != 'None':
+            value = value.strip()
+            if '::' in value:
+                return value.split('::')[-1].strip().capitalize()
+            return value.upper() if len(value) <= 2 else value
+    return None
+
+
+def item_min_rarity(item: dict) -> Optional[int]:
+    try:
+        return int(item['minRarity'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def scrape_item_grade(url: str) -> Optional[str]:
+    """Grade from an item page (last resort)"""
+    content = fetch_text(url, timeout=15)
+    if content is None:
+        return None
+    match = GRADE_PATTERN.search(content)
+    return match.group(1).strip() if match else None
+
+
+class GradeInfo:
+    __slots__ = ('grade', 'min_rarity', 'source')
+
+    def __init__(self, grade: Optional[str] = None, min_rarity: Optional[int] = None,
+                 source: Optional[str] = None):
+        self.grade = grade
+        self.min_rarity = min_rarity
+        self.source = source
+
+    @property
+    def rarity(self) -> Optional[str]:
+        return RARITY_NAMES.get(self.min_rarity) if self.min_rarity else None
+
+
+class GradeResolver:
+    """Resolve (item name, item code) pairs to grades, cheapest source first
+
+    search=False skips the search API step, scrape=False never fetches item pages.
+    """
+
+    def __init__(self, search: bool = True, scrape: bool = True):
+        self.search = search
+        self.scrape = scrape
+        self.by_code: Dict[str, dict] = {}
+        self.by_name: Dict[str, dict] = {}
+        self.sources: Dict[str, int] = {}
+        self.pages_fetched = 0
+        self._loaded = False
+
+    def _add_item(self, item: dict):
+        code = item.get('name')
+        name = item.get('itemName')
+        # Prefer entries that carry a grade over bare references to the same item
+        for key, index in ((code, self.by_code), (name, self.by_name)):
+            if key and (key not in index or (item_grade(item) and not item_grade(index[key]))):
+                index[key] = item
+
+    def load_cached(self):
+        """Index every item object found in cached mob payloads and search results"""
+        self._loaded = True
+        cache = get_cache()
+        if cache is None:
+            return
+        conn = sqlite3.connect(cache.path, timeout=30)
+        try:
+            rows = conn.execute("""
+                SELECT url, body FROM http_cache
+                WHERE status = 200 AND (url LIKE '%/db/mob/%' OR url = ?)
+            """, (SEARCH_URL,)).fetchall()
+        finally:
+            conn.close()
+        for url, body in rows:
+            content = zlib.decompress(body).decode('utf-8', errors='replace')
+            if url == SEARCH_URL:
+                try:
+                    results = json.loads(content)
+                except ValueError:
+                    continue
+                for result in results if isinstance(results, list) else ():
+                    item = result.get('item') if isinstance(result, dict) else None
+                    if isinstance(item, dict) and item.get('type') == 'item':
+                        self._add_item(item)
+                continue
+            data = parse_page(content)
+            for table in (data or {}).get('data', {}).get('_loot') or ():
+                for reward in table_rewards(table):
+                    self._add_item(reward.item)
+
+    def _known(self, item_name: str, item_code: str) -> Optional[dict]:
+        return self.by_code.get(item_code) or self.by_name.get(item_name)
+
+    def resolve(self, entries: Iterable[Tuple[str, str]]) -> Dict[str, GradeInfo]:
+        """{item code (or name when the code is empty): GradeInfo}"""
+        if not self._loaded:
+            self.load_cached()
+        entries = list(dict.fromkeys(entries))
+        infos: Dict[str, GradeInfo] = {}
+
+        def record(key, item, source):
+            info = infos.setdefault(key, GradeInfo())
+            if info.min_rarity is None and item is not None:
+                info.min_rarity = item_min_rarity(item)
+            if info.grade is None and item is not None and item_grade(item):
+                info.grade = item_grade(item)
+                info.source = source
+
+        for item_name, item_code in entries:
+            record(item_code or item_name, self._known(item_name, item_code), 'payload')
+
+        missing = [(name, code) for name, code in entries if name and infos[code or name].grade is None]
+        if missing and self.search:
+            resolver = SearchResolver(exact_only=True)
+            matches = resolver.resolve(name for name, _ in missing)
+            for item_name, item_code in missing:
+                match = matches.get(item_name)
+                if match:
+                    self._add_item(match.item)
+                    record(item_code or item_name, match.item, 'search')
+
+        if self.scrape:
+            for item_name, item_code in entries:
+                info = infos[item_code or item_name]
+                if info.grade is not None:
+                    continue
+                code = item_code or (self.by_name.get(item_name) or {}).get('name')
+                if not code:
+                    continue
+                self.pages_fetched += 1
+                info.grade = scrape_item_grade(item_url(code))
+                if info.grade:
+                    info.source = 'page'
+
+        for info in infos.values():
+            source = info.source or 'unresolved'
+            self.sources[source] = self.sources.get(source, 0) + 1
+        return infos
+
+    def summary(self) -> str:
+        counts = ', '.join(f"{count} {source}" for source, count in sorted(self.sources.items()))
+        return f"grades by source: {counts or 'none'} ({self.pages_fetched} item pages fetched)"
+
+
+def code_from_url(url: Optional[str]) -> str:
+    """Item code of a Codex item URL ('' when the URL is not an item page)"""
+    if not url or '/db/item/' not in url:
+        return ''
+    return url.split('/db/item/')[-1].split('?')[0].strip()
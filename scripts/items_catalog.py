@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Normalized item catalog
+named_mob_items used to repeat item_name, item_url, item_rarity, item_type,
+item_grade and icon_url on every mob that drops an item. The migration moves
+that metadata into one `items` row per Codex item (keyed by item code, GUID,
+or name when neither is known) and keeps only the per-mob facts in
+`named_mob_drops` (drop order and chance):
+
+    items(id, item_key UNIQUE, item_name, item_url, item_rarity, item_type,
+          item_grade, icon_url, fetched_at, created_at, updated_at)
+    named_mob_drops(id, named_mob_id, item_id, drop_order, drop_chance, created_at, updated_at)
+
+`named_mob_items` becomes a view over the join with INSTEAD OF triggers, so
+the PHP API and every existing script keep reading and writing it unchanged
+(inserts upsert the catalog row, updates of item fields hit the shared row).
+Enrichment scripts work on `items` directly, once per unique item, and use
+fetched_at to refresh only entries that are missing or stale.
+
+Usage:
+    python3 scripts/items_catalog.py --migrate     # backs the database up first
+    python3 scripts/items_catalog.py               # catalog statistics
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from typing import List, Optional, Tuple
+
+DB_PATH = "data/database/db/mydb.sqlite"
+BACKUP_DIR = "data/backups"
+
+
+
+def item_key_sql(prefix: str) -> str:
+    """SQL expression for the catalog key of a row: Codex item code from the URL, else the name"""
+    return (f"CASE WHEN {prefix}item_url LIKE '%/item/%' "
+            f"THEN substr({prefix}item_url, instr({prefix}item_url, '/item/') + 6) "
+            f"ELSE 'name:' || {prefix}item_name END")
+
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_key TEXT NOT NULL UNIQUE, -- Codex item code (or GUID); 'name:<item_name>' when neither is known
+        item_name TEXT NOT NULL,
+        item_url TEXT,
+        item_rarity TEXT CHECK(item_rarity IN ('Common', 'Uncommon', 'Rare', 'Epic', 'Legendary')),
+        item_type TEXT,
+        item_grade TEXT,
+        icon_url TEXT,
+        fetched_at DATETIME, -- last metadata enrichment (grades, icons); NULL = never
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_items_fetched_at ON items(fetched_at);
+
+    CREATE TABLE IF NOT EXISTS named_mob_drops (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        named_mob_id INTEGER NOT NULL,
+        item_id INTEGER NOT NULL,
+        drop_order INTEGER DEFAULT 1,
+        drop_chance TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (named_mob_id) REFERENCES named_mobs(id) ON DELETE CASCADE,
+        FOREIGN KEY (item_id) REFERENCES items(id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_named_mob_drops_mob ON named_mob_drops(named_mob_id, drop_order);
+    CREATE INDEX IF NOT EXISTS idx_named_mob_drops_item ON named_mob_drops(item_id);
+"""
+
+COMPAT_VIEW = f"""
+    CREATE VIEW named_mob_items AS
+    SELECT d.id, d.named_mob_id, i.item_name, i.item_url, i.item_rarity, i.item_type,
+           i.item_grade, i.icon_url, d.drop_order, d.drop_chance, d.created_at, d.updated_at,
+           d.item_id
+    FROM named_mob_drops d
+    JOIN items i ON i.id = d.item_id;
+
+    CREATE TRIGGER named_mob_items_insert INSTEAD OF INSERT ON named_mob_items
+    BEGIN
+        INSERT INTO items (item_key, item_name, item_url, item_rarity, item_type, item_grade, icon_url)
+        VALUES ({item_key_sql('NEW.')}, NEW.item_name, NEW.item_url, NEW.item_rarity, NEW.item_type,
+                NEW.item_grade, NEW.icon_url)
+        ON CONFLICT(item_key) DO UPDATE SET
+            item_name = excluded.item_name,
+            item_url = COALESCE(excluded.item_url, items.item_url),
+            item_rarity = COALESCE(excluded.item_rarity, items.item_rarity),
+            item_type = COALESCE(excluded.item_type, items.item_type),
+            item_grade = COALESCE(excluded.item_grade, items.item_grade),
+            icon_url = COALESCE(excluded.icon_url, items.icon_url),
+            updated_at = CURRENT_TIMESTAMP;
+        INSERT INTO named_mob_drops (named_mob_id, item_id, drop_order, drop_chance)
+        VALUES (NEW.named_mob_id, (SELECT id FROM items WHERE item_key = {item_key_sql('NEW.')}),
+                COALESCE(NEW.drop_order, 1), NEW.drop_chance);
+    END;
+
+    CREATE TRIGGER named_mob_items_update INSTEAD OF UPDATE ON named_mob_items
+    BEGIN
+        UPDATE items SET
+            item_name = NEW.item_name, item_url = NEW.item_url, item_rarity = NEW.item_rarity,
+            item_type = NEW.item_type, item_grade = NEW.item_grade, icon_url = NEW.icon_url,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = OLD.item_id;
+        UPDATE named_mob_drops SET
+            named_mob_id = NEW.named_mob_id, drop_order = NEW.drop_order, drop_chance = NEW.drop_chance,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = OLD.id;
+    END;
+
+    CREATE TRIGGER named_mob_items_delete INSTEAD OF DELETE ON named_mob_items
+    BEGIN
+        DELETE FROM named_mob_drops WHERE id = OLD.id;
+    END;
+"""
+
+
+def sql_statements(script: str) -> List[str]:
+    """Split a script into complete statements (trigger bodies and comments included)"""
+    statements, pending = [], ''
+    for line in script.splitlines(keepends=True):
+        pending += line
+        if sqlite3.complete_statement(pending):
+            statements.append(pending.strip())
+            pending = ''
+    return statements
+
+
+def is_migrated(conn: sqlite3.Connection) -> bool:
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'named_mob_items'").fetchone()
+    return row is not None and row[0] == 'view'
+
+
+def backup_database(db_path: str, label: str) -> str:
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    target = os.path.join(BACKUP_DIR, f"mydb-before-{label}-{time.strftime('%Y%m%d-%H%M%S')}.sqlite")
+    src = sqlite3.connect(db_path)
+    dst = sqlite3.connect(target)
+    with dst:
+        src.backup(dst)
+    dst.close()
+    src.close()
+    return target
+
+
+def migrate(conn: sqlite3.Connection) -> Tuple[int, int]:
+    """Move named_mob_items into items + named_mob_drops in one transaction; (items, drops)"""
+    if is_migrated(conn):
+        return (conn.execute("SELECT COUNT(*) FROM items").fetchone()[0],
+                conn.execute("SELECT COUNT(*) FROM named_mob_drops").fetchone()[0])
+
+    legacy = {row[1] for row in conn.execute("PRAGMA table_info(named_mob_items)")}
+
+    def column(name: str) -> str:
+        # Columns added ad hoc by older scripts may be missing
+        return f"o.{name}" if name in legacy else "NULL"
+
+    key = item_key_sql('o.')
+    conn.execute("BEGIN")
+    try:
+        for statement in sql_statements(SCHEMA):
+            conn.execute(statement)
+        # One catalog row per item; non-NULL metadata from any of its rows wins
+        conn.execute(f"""
+            INSERT INTO items (item_key, item_name, item_url, item_rarity, item_type, item_grade, icon_url)
+            SELECT {key}, MAX(o.item_name), MAX(o.item_url), MAX({column('item_rarity')}),
+                   MAX({column('item_type')}), MAX({column('item_grade')}), MAX({column('icon_url')})
+            FROM named_mob_items o
+            GROUP BY {key}
+        """)
+        conn.execute(f"""
+            INSERT INTO named_mob_drops (id, named_mob_id, item_id, drop_order, drop_chance, created_at, updated_at)
+            SELECT o.id, o.named_mob_id, i.id, {column('drop_order')}, {column('drop_chance')},
+                   {column('created_at')}, {column('updated_at')}
+            FROM named_mob_items o
+            JOIN items i ON i.item_key = {key}
+        """)
+        conn.execute("DROP TABLE named_mob_items")
+        for statement in sql_statements(COMPAT_VIEW):
+            conn.execute(statement)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return (conn.execute("SELECT COUNT(*) FROM items").fetchone()[0],
+            conn.execute("SELECT COUNT(*) FROM named_mob_drops").fetchone()[0])
+
+
+def stale_items(conn: sqlite3.Connection, max_age_days: Optional[float] = None,
+                where: str = "1 = 1") -> List[tuple]:
+    """(id, item_key, item_name, item_url, item_rarity) of items never enriched or older than max_age_days"""
+    sql = f"""
+        SELECT id, item_key, item_name, item_url, item_rarity FROM items
+        WHERE ({where}) AND (fetched_at IS NULL{" OR fetched_at < datetime('now', ?)" if max_age_days else ""})
+        ORDER BY item_name
+    """
+    params = (f"-{max_age_days} days",) if max_age_days else ()
+    return conn.execute(sql, params).fetchall()
+
+
+def mark_fetched(conn: sqlite3.Connection, item_ids):
+    conn.executemany("UPDATE items SET fetched_at = CURRENT_TIMESTAMP WHERE id = ?",
+                     [(item_id,) for item_id in item_ids])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Normalized item catalog')
+    parser.add_argument('--db', default=DB_PATH, help='Database path')
+    parser.add_argument('--migrate', action='store_true', help='Migrate named_mob_items into the catalog')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        return
+    conn = sqlite3.connect(args.db, isolation_level=None)
+
+    if args.migrate:
+        if is_migrated(conn):
+            print("✅ Item catalog already in place")
+        else:
+            print(f"💾 Backup: {backup_database(args.db, 'items-catalog')}")
+            items, drops = migrate(conn)
+            print(f"✅ Migrated {drops} drop rows onto {items} catalog items")
+
+    if not is_migrated(conn):
+        print("ℹ️  named_mob_items is not migrated yet (run with --migrate)")
+        conn.close()
+        return
+    items, enriched, drops = conn.execute("""
+        SELECT (SELECT COUNT(*) FROM items), (SELECT COUNT(*) FROM items WHERE fetched_at IS NOT NULL),
+               (SELECT COUNT(*) FROM named_mob_drops)
+    """).fetchone()
+    print(f"📊 {items} items ({enriched} enriched), {drops} mob drops")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
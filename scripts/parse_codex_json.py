@@ -5,124 +5,81 @@ Looks for the _Named pattern in loot table names and extracts associated items
 """
 
 import sqlite3
-import subprocess
-import json
-import re
-from urllib.parse import unquote
+import sys
+
+from codex_client import fetch_text, mob_url
+from codex_payload import parse_page, table_rewards, walk_loot_tables
 
 def fetch_mob_page_json(mob_slug):
     """Fetch mob page and extract embedded JSON data"""
     try:
-        url = f"https://ashescodex.com/db/mob/{mob_slug}"
-        result = subprocess.run(['curl', '-s', url], capture_output=True, text=True, timeout=15)
-        if result.returncode != 0:
+        content = fetch_text(mob_url(mob_slug))
+        if content is None:
             return None
-            
-        content = result.stdout
-        
-        # Look for the embedded JSON data in script tags
-        # Pattern: __sveltekit_... = {...}
-        json_pattern = r'__sveltekit_[^=]+=\s*({.*?});'
-        matches = re.findall(json_pattern, content, re.DOTALL)
         
-        for match in matches:
-            try:
-                data = json.loads(match)
-                # Check if this contains mob/loot data
-                if 'nodes' in data and isinstance(data['nodes'], list):
-                    for node in data['nodes']:
-                        if isinstance(node, dict) and 'data' in node:
-                            return node['data']
-                            
-                # Alternative structure check
-                if 'data' in data:
-                    return data['data']
-                    
-            except json.JSONDecodeError:
-                continue
-                
-        return None
+        # SvelteKit embeds the mob data as a JSON string in the page
+        payload = parse_page(content)
+        if payload is None:
+            return None
+        return payload['data']
         
     except Exception as e:
         print(f"Error fetching {mob_slug}: {e}")
         return None
 
-def extract_named_items(json_data, mob_name):
-    """Extract items from _Named loot tables"""
+def extract_named_items(json_data, mob_name, debug=False):
+    """Yield items from _Named loot tables (generator; walks the page data without recursion)"""
     if not json_data:
-        return []
-        
-    items = []
+        return
     
-    def search_for_named_items(obj, path=""):
-        """Recursively search for _Named patterns and associated items"""
-        if isinstance(obj, dict):
-            # Check if this is a loot table with _Named pattern
-            name = obj.get('name', '')
-            if '_Named' in name or f'{mob_name.replace(" ", "_")}_Named' in name:
-                print(f"  🎯 Found _Named table: {name}")
-                
-                # Extract items from this table
-                if 'rewardDefContainers' in obj:
-                    for container in obj['rewardDefContainers']:
-                        if 'rewards' in container:
-                            for reward in container['rewards']:
-                                if 'itemRewards' in reward:
-                                    for item_reward in reward['itemRewards']:
-                                        if 'item' in item_reward:
-                                            item = item_reward['item']
-                                            item_name = item.get('itemName', 'Unknown')
-                                            item_guid = item.get('guid', '')
-                                            
-                                            # Skip recipes and common materials
-                                            if 'Recipe:' in item_name or 'Fragment' in item_name:
-                                                continue
-                                                
-                                            # Build item URL
-                                            item_url_name = item.get('name', '')
-                                            item_url = f"https://ashescodex.com/db/item/{item_url_name}" if item_url_name else ""
-                                            
-                                            # Determine item type and rarity
-                                            item_type = "Unknown"
-                                            rarity = "Uncommon"  # Default for special drops
-                                            
-                                            if "Gear_Weapon" in item_url_name:
-                                                item_type = "Weapon"
-                                            elif "Gear_Accessory" in item_url_name or "Earring" in item_name or "Ring" in item_name:
-                                                item_type = "Accessory"
-                                            elif "Gear_Armor" in item_url_name:
-                                                item_type = "Armor"
-                                            
-                                            # Try to get drop chance from inherited chances
-                                            drop_chance = "Unknown"
-                                            if 'inheritedSubTableChance' in obj:
-                                                chances = obj['inheritedSubTableChance']
-                                                if '0' in chances:
-                                                    chance_val = float(chances['0']) * 100
-                                                    drop_chance = f"{chance_val:.1f}%"
-                                            
-                                            items.append({
-                                                'name': item_name,
-                                                'url': item_url,
-                                                'rarity': rarity,
-                                                'type': item_type,
-                                                'drop_chance': drop_chance,
-                                                'guid': item_guid,
-                                                'table_name': name
-                                            })
-                                            
-                                            print(f"    ✅ {item_name} ({drop_chance}) - {item_type}")
+    for path, table in walk_loot_tables(json_data, debug=debug):
+        table_name = table.get('name', '')
+        print(f"  🎯 Found _Named table: {table_name}")
+        if debug:
+            print(f"     at {path}")
+        
+        # Try to get drop chance from inherited chances (shared by the whole table)
+        drop_chance = "Unknown"
+        chances = table.get('inheritedSubTableChance')
+        if chances and '0' in chances:
+            chance_val = float(chances['0']) * 100
+            drop_chance = f"{chance_val:.1f}%"
+        
+        # Extract items from this table
+        for reward in table_rewards(table):
+            item_name = reward.name
+            item_guid = reward.guid
             
-            # Recursively search in nested objects
-            for key, value in obj.items():
-                search_for_named_items(value, f"{path}.{key}")
+            # Skip recipes and common materials
+            if 'Recipe:' in item_name or 'Fragment' in item_name:
+                continue
                 
-        elif isinstance(obj, list):
-            for i, item in enumerate(obj):
-                search_for_named_items(item, f"{path}[{i}]")
-    
-    search_for_named_items(json_data)
-    return items
+            # Build item URL
+            item_url_name = reward.code
+            item_url = f"https://ashescodex.com/db/item/{item_url_name}" if item_url_name else ""
+            
+            # Determine item type and rarity
+            item_type = "Unknown"
+            rarity = "Uncommon"  # Default for special drops
+            
+            if "Gear_Weapon" in item_url_name:
+                item_type = "Weapon"
+            elif "Gear_Accessory" in item_url_name or "Earring" in item_name or "Ring" in item_name:
+                item_type = "Accessory"
+            elif "Gear_Armor" in item_url_name:
+                item_type = "Armor"
+            
+            print(f"    ✅ {item_name} ({drop_chance}) - {item_type}")
+            
+            yield {
+                'name': item_name,
+                'url': item_url,
+                'rarity': rarity,
+                'type': item_type,
+                'drop_chance': drop_chance,
+                'guid': item_guid,
+                'table_name': table_name
+            }
 
 def update_mob_items(mob_id, mob_name, items):
     """Update the database with special items for a mob"""
@@ -150,7 +107,7 @@ def update_mob_items(mob_id, mob_name, items):
     conn.commit()
     conn.close()
 
-def test_specific_mobs():
+def test_specific_mobs(debug=False):
     """Test with the 4 specific mobs mentioned by user"""
     test_mobs = [
         ('bloodmage-triune', 'Bloodmage Triune'),
@@ -167,7 +124,7 @@ def test_specific_mobs():
         
         if json_data:
             print(f"  📄 JSON data extracted")
-            items = extract_named_items(json_data, name)
+            items = list(extract_named_items(json_data, name, debug=debug))
             
             if items:
                 print(f"  🎁 Found {len(items)} special items:")
@@ -185,7 +142,7 @@ def main():
     print("🎯 Testing Codex JSON Parsing for _Named Items")
     print("=" * 50)
     
-    test_specific_mobs()
+    test_specific_mobs(debug='--debug' in sys.argv)
 
 if __name__ == "__main__":
     main()
@@ -7,6 +7,9 @@ Uses ALL REF markers as control points
 import sqlite3
 import json
 import math
+from itertools import repeat
+
+import numpy as np
 
 def extract_mob_name(label):
     """Extract mob name from REF label"""
@@ -164,6 +167,13 @@ def transform_coordinates(codex_x, codex_y, params):
     
     return map_lat, map_lng
 
+def transform_points(codex_x, codex_y, params):
+    """Transform arrays of codex coordinates to map coordinates in one vectorized step"""
+    map_lat = params['scale_x'] * np.asarray(codex_x, dtype=np.float64) + params['offset_x']
+    map_lng = params['scale_y'] * np.asarray(codex_y, dtype=np.float64) + params['offset_y']
+    
+    return map_lat, map_lng
+
 def validate_transformation(control_points, params):
     """Validate transformation accuracy with control points"""
     print("\n🔍 Validation Results:")
@@ -200,27 +210,24 @@ def update_all_coordinates(db_path, params):
     """)
     
     mobs = cursor.fetchall()
-    updated_count = 0
     
     print(f"🔄 Processing {len(mobs)} named mobs...")
-    
-    for mob in mobs:
-        mob_id, name, codex_x, codex_y = mob
-        
-        # Transform coordinates
-        map_lat, map_lng = transform_coordinates(codex_x, codex_y, params)
-        
-        if map_lat is not None and map_lng is not None:
-            # Update database
-            cursor.execute("""
-                UPDATE named_mobs 
-                SET map_lat = ?, map_lng = ?, coordinate_source = ?
-                WHERE id = ?
-            """, (map_lat, map_lng, params['method'], mob_id))
-            updated_count += 1
-    
-    conn.commit()
+    if not mobs:
+        conn.close()
+        return 0
+    
+    # Transform every mob at once, then write all rows in one transaction
+    ids, _, codex_x, codex_y = zip(*mobs)
+    map_lat, map_lng = transform_points(codex_x, codex_y, params)
+    
+    with conn:
+        cursor.executemany("""
+            UPDATE named_mobs 
+            SET map_lat = ?, map_lng = ?, coordinate_source = ?
+            WHERE id = ?
+        """, zip(map_lat.tolist(), map_lng.tolist(), repeat(params['method']), ids))
     conn.close()
+    updated_count = len(ids)
     
     return updated_count
 
@@ -2,87 +2,18 @@
 """
 Search for missing items with proper quote handling
 """
-import requests
 import json
 import os
-import time
 import sqlite3
 
-def search_item_variants(item_name):
-    """Search for an item using multiple query variants"""
-    headers = {
-        'content-type': 'application/json',
-        'origin': 'https://ashescodex.com',
-        'referer': 'https://ashescodex.com/',
-        'user-agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'
-    }
-    
-    # Try different search variants
-    variants = [
-        item_name,  # Original name with quotes
-        item_name.replace("'", ""),  # Remove apostrophes
-        item_name.replace("'", " "),  # Replace apostrophes with spaces
-        " ".join(item_name.split()[:2]),  # First two words only
-        " ".join(item_name.split()[:3]),  # First three words only
-    ]
-    
-    for variant in variants:
-        try:
-            data = {"query": variant, "resultType": None}
-            response = requests.post('https://api.ashescodex.com/search', 
-                                   headers=headers, 
-                                   json=data, 
-                                   timeout=10)
-            
-            if response.status_code == 200:
-                results = response.json()
-                
-                # Look for exact match first, then partial matches
-                for result in results:
-                    if (result.get('item', {}).get('type') == 'item' and 
-                        result.get('item', {}).get('itemName') == item_name):
-                        
-                        icon_path = result.get('item', {}).get('icon', '')
-                        if icon_path and icon_path != "None":
-                            return convert_to_cdn_url(icon_path), variant
-                
-                # If no exact match, look for close matches
-                for result in results:
-                    if (result.get('item', {}).get('type') == 'item'):
-                        found_name = result.get('item', {}).get('itemName', '')
-                        if (item_name.lower() in found_name.lower() or 
-                            found_name.lower() in item_name.lower()):
-                            
-                            icon_path = result.get('item', {}).get('icon', '')
-                            if icon_path and icon_path != "None":
-                                print(f"    📝 Close match: '{found_name}' for '{item_name}'")
-                                return convert_to_cdn_url(icon_path), variant
-            
-        except Exception as e:
-            print(f"    ❌ Error searching '{variant}': {e}")
-            continue
-    
-    return None, None
-
-def convert_to_cdn_url(icon_path):
-    """Convert game icon path to CDN URL"""
-    if "/Game/UI/Icons/Items/" in icon_path:
-        path_part = icon_path.split("/Game/UI/Icons/Items/")[1]
-        icon_name = path_part.split("/")[-1]
-        if "." in icon_name:
-            icon_name = icon_name.split(".")[0]
-        
-        path_parts = path_part.split("/")[:-1]
-        cdn_path = "/".join(path_parts)
-        
-        return f"https://cdn.ashescodex.com/UI/Icons/Items/{cdn_path}/{icon_name}_64.webp"
-    return None
+from codex_client import fetch, print_throughput
+from codex_search import SearchResolver
 
 def download_icon(url, filepath):
     """Download an icon from URL"""
     try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200 and len(response.content) > 100:
+        response = fetch(url, timeout=10)
+        if response is not None and response.status == 200 and len(response.content) > 100:
             with open(filepath, 'wb') as f:
                 f.write(response.content)
             return True
@@ -124,7 +55,13 @@ def search_and_download_missing():
     dev_icons_dir = "app/frontend-dev/src/assets/icons/items/"
     downloaded = 0
     
-    for item_name in missing_items[:10]:  # Limit to first 10 for testing
+    batch = missing_items[:10]  # Limit to first 10 for testing
+    resolver = SearchResolver(require_icon=True)
+    matches = resolver.resolve(batch)
+    print(f"🔎 Resolved {sum(1 for m in matches.values() if m)}/{len(batch)} items "
+          f"with {resolver.requests} search requests")
+    
+    for item_name in batch:
         print(f"📥 {item_name}")
         
         safe_name = item_name.lower().replace(' ', '_').replace("'", '').replace('-', '_')
@@ -133,9 +70,13 @@ def search_and_download_missing():
         icon_path = os.path.join(icons_dir, f"{safe_name}.webp")
         dev_icon_path = os.path.join(dev_icons_dir, f"{safe_name}.webp")
         
-        cdn_url, variant_used = search_item_variants(item_name)
+        match = matches[item_name]
+        cdn_url = match.cdn_url if match else None
         
         if cdn_url:
+            variant_used = match.query
+            if not match.exact:
+                print(f"    📝 Close match: '{match.name}' for '{item_name}'")
             print(f"    🔍 Found via '{variant_used}': {cdn_url}")
             
             if download_icon(cdn_url, icon_path):
@@ -152,11 +93,10 @@ def search_and_download_missing():
                 print(f"    ❌ Download failed")
         else:
             print(f"    ❌ Not found with any variant")
-        
-        time.sleep(1)
     
     print(f"\n✅ Downloaded {downloaded} new icons")
     print(f"📊 Total icons now: {len(os.listdir(icons_dir))}")
+    print_throughput()
 
 if __name__ == "__main__":
     search_and_download_missing()
@@ -2,6 +2,10 @@
 """
 Selective triangulation - use only the best reference points
 Focus on accuracy over quantity
+
+Superseded by `triangulate_coordinates.py --robust ransac`, which uses every
+REF marker and rejects misplaced ones automatically instead of relying on
+this hand-picked list.
 """
 
 import sqlite3
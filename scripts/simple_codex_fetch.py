@@ -1,25 +1,18 @@
 #!/usr/bin/env python3
 """
-Simple Codex item fetching using curl (no external dependencies)
+Simple Codex item fetching using the shared keep-alive client (no external dependencies)
 """
 
 import sqlite3
-import subprocess
 import re
 import json
 from urllib.parse import unquote
 
+from codex_client import fetch_text, mob_url
+
 def fetch_mob_page(mob_slug):
-    """Fetch mob page using curl"""
-    try:
-        url = f"https://ashescodex.com/db/mob/{mob_slug}?embed=true"
-        result = subprocess.run(['curl', '-s', url], capture_output=True, text=True, timeout=10)
-        if result.returncode == 0:
-            return result.stdout
-        return None
-    except Exception as e:
-        print(f"Error fetching {mob_slug}: {e}")
-        return None
+    """Fetch mob embed page over the shared connection pool"""
+    return fetch_text(f"{mob_url(mob_slug)}?embed=true", timeout=10)
 
 def parse_special_items(content):
     """Parse special items from Codex content"""
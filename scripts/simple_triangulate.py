@@ -7,6 +7,9 @@ Uses all REF markers for coordinate transformation
 import sqlite3
 import json
 import math
+from itertools import repeat
+
+import numpy as np
 
 def extract_mob_name(label):
     """Extract mob name from REF label"""
@@ -138,6 +141,13 @@ def transform_coordinates(codex_x, codex_y, transform_params):
     
     return map_lat, map_lng
 
+def transform_points(codex_x, codex_y, transform_params):
+    """Transform arrays of codex coordinates to map coordinates in one vectorized step"""
+    map_lat = transform_params['scale_x'] * np.asarray(codex_x, dtype=np.float64) + transform_params['offset_x']
+    map_lng = transform_params['scale_y'] * np.asarray(codex_y, dtype=np.float64) + transform_params['offset_y']
+    
+    return map_lat, map_lng
+
 def update_all_coordinates(db_path, transform_params):
     """Update all named mob coordinates using the transformation"""
     conn = sqlite3.connect(db_path)
@@ -151,30 +161,27 @@ def update_all_coordinates(db_path, transform_params):
     """)
     
     mobs = cursor.fetchall()
-    updated_count = 0
     
     print(f"🔄 Processing {len(mobs)} named mobs...")
-    
-    for mob in mobs:
-        mob_id, name, codex_x, codex_y = mob
-        
-        # Transform coordinates
-        map_lat, map_lng = transform_coordinates(codex_x, codex_y, transform_params)
-        
-        if map_lat is not None and map_lng is not None:
-            # Update database
-            cursor.execute("""
-                UPDATE named_mobs 
-                SET map_lat = ?, map_lng = ?, coordinate_source = ?
-                WHERE id = ?
-            """, (map_lat, map_lng, transform_params['method'], mob_id))
-            updated_count += 1
-            
-            if updated_count <= 5:  # Show first 5 for verification
-                print(f"  ✅ {name}: ({codex_x:.0f}, {codex_y:.0f}) -> ({map_lat:.3f}, {map_lng:.3f})")
-    
-    conn.commit()
+    if not mobs:
+        conn.close()
+        return 0
+    
+    # Transform every mob at once, then write all rows in one transaction
+    ids, names, codex_x, codex_y = zip(*mobs)
+    map_lat, map_lng = transform_points(codex_x, codex_y, transform_params)
+    
+    for name, x, y, lat, lng in list(zip(names, codex_x, codex_y, map_lat, map_lng))[:5]:  # Show first 5 for verification
+        print(f"  ✅ {name}: ({x:.0f}, {y:.0f}) -> ({lat:.3f}, {lng:.3f})")
+    
+    with conn:
+        cursor.executemany("""
+            UPDATE named_mobs 
+            SET map_lat = ?, map_lng = ?, coordinate_source = ?
+            WHERE id = ?
+        """, zip(map_lat.tolist(), map_lng.tolist(), repeat(transform_params['method']), ids))
     conn.close()
+    updated_count = len(ids)
     
     return updated_count
 
@@ -9,6 +9,14 @@ This script imports named mob data from Ashes Codex while:
 4. Adding new named mobs
 5. Updating existing data intelligently
 6. Filtering to only show named mobs with special drops
+
+Records are streamed from a snapshot file or the live Codex crawl (codex_source.py).
+
+Usage:
+    python3 scripts/codex_staging.py --migrate     # once, before the first import (backs up the database)
+    python3 scripts/smart_codex_import.py --dry-run
+    python3 scripts/smart_codex_import.py --source file --input data/named-mobs/named_mobs.json
+    python3 scripts/smart_codex_import.py --source api
 """
 
 import sqlite3
@@ -16,22 +24,30 @@ import json
 import requests
 import sys
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 import argparse
 
+from codex_snapshots import ArchivedSource, SnapshotArchive
+from codex_source import DEFAULT_SNAPSHOT, open_source
+from codex_staging import (diff_staging, require_import_schema, stage_records, staged_mob,
+                           staged_rows, upsert_staged)
+
 class SmartCodexImporter:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.conn = None
         self.changes = {
             'new_mobs': [],
+            'renamed_mobs': [],
             'updated_respawn_times': [],
             'updated_locations': [],
             'updated_levels': [],
             'removed_mobs': [],
             'preserved_triangulation': [],
-            'preserved_items': []
+            'preserved_items': [],
+            'unchanged': 0
         }
+        self.changed_mobs = []
         
     def connect(self):
         self.conn = sqlite3.connect(self.db_path)
@@ -82,246 +98,99 @@ class SmartCodexImporter:
             
         return items
         
-    def simulate_codex_import(self) -> List[Dict]:
-        """
-        Simulate a Codex import with some example data.
-        In the future, this would fetch from the actual Codex API.
-        """
-        return [
-            {
-                'name': 'Forgelord Zammer',
-                'slug': 'forgelord-zammer',
-                'level': 25,
-                'level_range': '25',
-                'respawn_time': '30-45 minutes',
-                'respawn_minutes': 30,
-                'codex_url': 'https://ashescodex.com/db/mob/forgelord-zammer',
-                'location_x': -123456.789,
-                'location_y': 654321.123,
-                'location_z': 100.0,
-                'special_drops': [
-                    {
-                        'name': 'Ancient Dunzen Longsword',
-                        'url': 'https://ashescodex.com/db/item/Gear_Weapon_Sword_1H_Zammer',
-                        'rarity': 'Uncommon',
-                        'type': 'Weapon',
-                        'drop_chance': '12%'  # Updated from Codex
-                    },
-                    {
-                        'name': 'Forgelord Signet',
-                        'url': 'https://ashescodex.com/db/item/Gear_Accessory_Ring_Zammer',
-                        'rarity': 'Uncommon', 
-                        'type': 'Ring',
-                        'drop_chance': '8%'
-                    }
-                ]
-            },
-            {
-                'name': 'Chief Armorer Jannus',
-                'slug': 'chief-armorer-jannus',
-                'level': 20,
-                'level_range': '20',
-                'respawn_time': '25-35 minutes',  # Changed from original
-                'respawn_minutes': 25,  # Changed from original
-                'codex_url': 'https://ashescodex.com/db/mob/chief-armorer-jannus',
-                'location_x': -987654.321,
-                'location_y': 123456.789,
-                'location_z': 50.0,
-                'special_drops': [
-                    {
-                        'name': 'Buttressed Shield',
-                        'url': 'https://ashescodex.com/db/item/Gear_Weapon_Shield_OH_Jannus',
-                        'rarity': 'Uncommon',
-                        'type': 'Shield',
-                        'drop_chance': '18%'  # New drop chance data
-                    }
-                ]
-            },
-            # New mob example
-            {
-                'name': 'Magnus the Cinderbound Colossus',
-                'slug': 'magnus-the-cinderbound-colossus',
-                'level': 50,
-                'level_range': '50',
-                'respawn_time': '60-90 minutes',
-                'respawn_minutes': 60,
-                'codex_url': 'https://ashescodex.com/db/mob/magnus-the-cinderbound-colossus',
-                'location_x': -555555.555,
-                'location_y': 777777.777,
-                'location_z': 200.0,
-                'special_drops': [
-                    {
-                        'name': 'Cinderbound Greatsword',
-                        'url': 'https://ashescodex.com/db/item/cinderbound-greatsword',
-                        'rarity': 'Epic',
-                        'type': 'Weapon',
-                        'drop_chance': '5%'
-                    },
-                    {
-                        'name': 'Molten Core Fragment',
-                        'url': 'https://ashescodex.com/db/item/molten-core-fragment',
-                        'rarity': 'Rare',
-                        'type': 'Material',
-                        'drop_chance': '25%'
-                    }
-                ]
-            }
-        ]
-        
-    def detect_changes(self, codex_data: List[Dict]) -> Dict:
-        """Detect what has changed between Codex and our database."""
-        current_mobs = self.get_current_mobs()
-        current_items = self.get_special_items()
+    def stage(self, codex_data: Iterable[Dict]) -> int:
+        """Bulk-load a record stream into the staging table (see codex_staging.py)."""
+        count = stage_records(self.conn, codex_data)
+        self.log(f"Staged {count} mobs from {getattr(codex_data, 'label', 'Codex data')}")
+        return count
         
-        codex_mob_names = {mob['name'] for mob in codex_data}
-        local_mob_names = set(current_mobs.keys())
+    def detect_changes(self, codex_data: Optional[Iterable[Dict]] = None) -> Dict:
+        """Detect what has changed between Codex and our database.
         
-        # New mobs
-        new_mobs = [mob for mob in codex_data if mob['name'] not in local_mob_names]
-        self.changes['new_mobs'] = new_mobs
+        The change sets come from SQL joins between the staging table and
+        named_mobs; `codex_data` is staged first when given.
+        """
+        if codex_data is not None:
+            self.stage(codex_data)
+        diff = diff_staging(self.conn, keep_triangulated=True)
+        self.changed_mobs = diff.pop('changed_mobs')
+        self.changes.update(diff)
+        return self.changes
         
-        # Removed mobs (in our DB but not in Codex)
-        removed_mobs = local_mob_names - codex_mob_names
-        self.changes['removed_mobs'] = list(removed_mobs)
+    def import_mob_data(self, codex_data: Iterable[Dict], dry_run: bool = False) -> int:
+        """Import mob data with intelligent preservation.
         
-        # Check for changes in existing mobs
-        for mob in codex_data:
-            if mob['name'] in current_mobs:
-                local_mob = current_mobs[mob['name']]
-                
-                # Check respawn time changes
-                if mob.get('respawn_time') != local_mob['respawn_time']:
-                    self.changes['updated_respawn_times'].append({
-                        'name': mob['name'],
-                        'old': local_mob['respawn_time'],
-                        'new': mob.get('respawn_time')
-                    })
-                    
-                # Check level changes
-                if mob.get('level') != local_mob['level']:
-                    self.changes['updated_levels'].append({
-                        'name': mob['name'],
-                        'old': local_mob['level'],
-                        'new': mob.get('level')
-                    })
-                    
-                # Check location changes (only if no triangulation)
-                if (local_mob['map_lat'] is None and local_mob['map_lng'] is None and
-                    (mob.get('location_x') != local_mob['location_x'] or 
-                     mob.get('location_y') != local_mob['location_y'])):
-                    self.changes['updated_locations'].append({
-                        'name': mob['name'],
-                        'old': [local_mob['location_x'], local_mob['location_y']],
-                        'new': [mob.get('location_x'), mob.get('location_y')]
-                    })
-                    
-        return self.changes
+        Records (any iterable, see codex_source.py) are staged in batches, then
+        applied with a single INSERT ... ON CONFLICT DO UPDATE (codex_staging.py)
+        that only writes new or changed rows (see its fingerprints), all in one
+        transaction; an unchanged snapshot causes no writes.
+        Returns the number of records staged.
+        """
+        if not dry_run:
+            require_import_schema(self.conn)
+        count = self.stage(codex_data)
+        self.detect_changes()
         
-    def import_mob_data(self, codex_data: List[Dict], dry_run: bool = False):
-        """Import mob data with intelligent preservation."""
-        current_mobs = self.get_current_mobs()
-        current_items = self.get_special_items()
+        self.log(f"Starting {'DRY RUN' if dry_run else 'IMPORT'} of {count} mobs "
+                 f"({len(self.changes['new_mobs'])} new, {len(self.changed_mobs)} changed, "
+                 f"{self.changes['unchanged']} unchanged)")
         
-        self.log(f"Starting {'DRY RUN' if dry_run else 'IMPORT'} of {len(codex_data)} mobs")
+        cursor = self.conn.cursor()
         
+        # Preserve triangulated coordinates
+        for row in staged_rows(self.conn, "nm.map_lat IS NOT NULL AND nm.map_lng IS NOT NULL"):
+            self.changes['preserved_triangulation'].append(row['name'])
+            self.log(f"Preserving triangulated coords for {row['name']}")
+            
+        for row in self.changed_mobs:
+            fields = [name for name, flag in (('name', row['renamed']),
+                                              ('level', row['level_changed']),
+                                              ('respawn_time', row['respawn_changed']),
+                                              ('location', row['location_changed'] and not row['triangulated']),
+                                              ('codex_url', row['url_changed']),
+                                              ('drops', row['drops_changed'])) if flag]
+            if fields:
+                self.log(f"Updated {row['name']}: {', '.join(fields)}")
+                
+        for mob in self.changes['new_mobs']:
+            self.log(f"Added new mob: {mob['name']} (Level {mob.get('level')})")
+            
         if not dry_run:
-            cursor = self.conn.cursor()
-        
-        for mob in codex_data:
-            if mob['name'] in current_mobs:
-                # Update existing mob
-                local_mob = current_mobs[mob['name']]
+            # One upsert for the whole snapshot; triangulated locations and local columns are kept
+            written = upsert_staged(self.conn, keep_triangulated=True)
+            self.log(f"Wrote {written} named_mobs rows")
+            
+        # Handle special items: custom items are kept, mobs without items get the Codex drops
+        for row in staged_rows(self.conn, "s.special_drops IS NOT NULL"):
+            mob_name = row['name']
+            special_drops = staged_mob(row)['special_drops']
+            if not special_drops:
+                continue
                 
-                # Preserve triangulated coordinates
-                if local_mob['map_lat'] is not None and local_mob['map_lng'] is not None:
-                    self.changes['preserved_triangulation'].append(mob['name'])
-                    self.log(f"Preserving triangulated coords for {mob['name']}")
-                    
-                # Prepare update
-                update_fields = []
-                update_values = []
+            if row['has_items']:
+                self.changes['preserved_items'].append(mob_name)
+                self.log(f"Preserving custom items for {mob_name}")
+                continue
                 
-                if mob.get('level') != local_mob['level']:
-                    update_fields.append('level = ?')
-                    update_values.append(mob.get('level'))
-                    
-                if mob.get('respawn_time') != local_mob['respawn_time']:
-                    update_fields.append('respawn_time = ?')
-                    update_fields.append('respawn_minutes = ?')
-                    update_values.extend([mob.get('respawn_time'), mob.get('respawn_minutes')])
-                    
-                # Only update location if no triangulation exists
-                if local_mob['map_lat'] is None and local_mob['map_lng'] is None:
-                    if (mob.get('location_x') != local_mob['location_x'] or 
-                        mob.get('location_y') != local_mob['location_y']):
-                        update_fields.extend(['location_x = ?', 'location_y = ?', 'location_z = ?'])
-                        update_values.extend([mob.get('location_x'), mob.get('location_y'), mob.get('location_z')])
-                        
-                if mob.get('codex_url') != local_mob['codex_url']:
-                    update_fields.append('codex_url = ?')
-                    update_values.append(mob.get('codex_url'))
-                    
-                if update_fields:
-                    update_fields.append('updated_at = ?')
-                    update_values.append(datetime.now().isoformat())
-                    update_values.append(local_mob['id'])
-                    
-                    if not dry_run:
-                        cursor.execute(f"UPDATE named_mobs SET {', '.join(update_fields)} WHERE id = ?", update_values)
-                    self.log(f"Updated {mob['name']}: {', '.join([f.split(' = ')[0] for f in update_fields[:-1]])}")
-                    
-            else:
-                # New mob
-                if not dry_run:
+            # Import new items (new mobs only have an id outside a dry run)
+            if not dry_run:
+                for order, item in enumerate(special_drops, 1):
                     cursor.execute("""
-                        INSERT INTO named_mobs 
-                        (name, slug, level, level_range, respawn_time, respawn_minutes,
-                         codex_url, location_x, location_y, location_z, type, is_hidden)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+                        INSERT INTO named_mob_items 
+                        (named_mob_id, item_name, item_url, item_rarity, item_type, drop_order, drop_chance)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
                     """, (
-                        mob['name'], mob.get('slug'), mob.get('level'), mob.get('level_range'),
-                        mob.get('respawn_time'), mob.get('respawn_minutes'), mob.get('codex_url'),
-                        mob.get('location_x'), mob.get('location_y'), mob.get('location_z'),
-                        'named_mob'
+                        row['mob_id'], item['name'], item['url'], item['rarity'],
+                        item['type'], order, item.get('drop_chance')
                     ))
-                    mob_id = cursor.lastrowid
-                else:
-                    mob_id = 999  # Dummy for dry run
                     
-                self.log(f"Added new mob: {mob['name']} (Level {mob.get('level')})")
-                
-            # Handle special items
-            if 'special_drops' in mob and mob['special_drops']:
-                mob_name = mob['name']
-                
-                # Check if we have custom items for this mob
-                if mob_name in current_items:
-                    self.changes['preserved_items'].append(mob_name)
-                    self.log(f"Preserving custom items for {mob_name}")
-                else:
-                    # Import new items
-                    if not dry_run:
-                        # Get mob ID
-                        if mob['name'] in current_mobs:
-                            mob_id = current_mobs[mob['name']]['id']
-                        
-                        # Clear existing items and add new ones
-                        cursor.execute("DELETE FROM named_mob_items WHERE named_mob_id = ?", (mob_id,))
-                        
-                        for order, item in enumerate(mob['special_drops'], 1):
-                            cursor.execute("""
-                                INSERT INTO named_mob_items 
-                                (named_mob_id, item_name, item_url, item_rarity, item_type, drop_order, drop_chance)
-                                VALUES (?, ?, ?, ?, ?, ?, ?)
-                            """, (
-                                mob_id, item['name'], item['url'], item['rarity'],
-                                item['type'], order, item.get('drop_chance')
-                            ))
-                    
-                    self.log(f"Updated items for {mob_name}: {len(mob['special_drops'])} items")
+            self.log(f"Updated items for {mob_name}: {len(special_drops)} items")
         
-        if not dry_run:
+        if dry_run:
+            self.conn.rollback()
+        else:
             self.conn.commit()
+        return count
             
     def generate_report(self) -> str:
         """Generate import report."""
@@ -339,6 +208,12 @@ class SmartCodexImporter:
                 lines.append(f"   + {mob['name']} (Level {mob.get('level')}) - {drops_count} drops")
             lines.append("")
             
+        if self.changes['renamed_mobs']:
+            lines.append(f"✏️  RENAMED ({len(self.changes['renamed_mobs'])}):")
+            for change in self.changes['renamed_mobs']:
+                lines.append(f"   ~ {change['old']} → {change['new']} ({change['slug']})")
+            lines.append("")
+            
         if self.changes['updated_respawn_times']:
             lines.append(f"⏱️  RESPAWN TIME CHANGES ({len(self.changes['updated_respawn_times'])}):")
             for change in self.changes['updated_respawn_times']:
@@ -357,6 +232,9 @@ class SmartCodexImporter:
                 lines.append(f"   ~ {change['name']}: {change['old']} → {change['new']}")
             lines.append("")
             
+        lines.append(f"✅ UNCHANGED: {self.changes['unchanged']} mobs (nothing changed, not written)")
+        lines.append("")
+        
         if self.changes['preserved_triangulation']:
             lines.append(f"🎯 PRESERVED TRIANGULATION ({len(self.changes['preserved_triangulation'])}):")
             for mob_name in self.changes['preserved_triangulation']:
@@ -399,6 +277,14 @@ def main():
                        help='Show what would be imported without making changes')
     parser.add_argument('--report-only', action='store_true',
                        help='Generate report of current state only')
+    parser.add_argument('--source', choices=['file', 'api'], default='file',
+                       help='Data source: file (NDJSON/JSON snapshot) or api (live Codex crawl)')
+    parser.add_argument('--input', type=str, default=DEFAULT_SNAPSHOT,
+                       help=f'Snapshot path for the file source (default: {DEFAULT_SNAPSHOT})')
+    parser.add_argument('--no-drops', action='store_true',
+                       help='Live crawl: skip mob pages, import mob data without special drops')
+    parser.add_argument('--archive', action='store_true',
+                       help='Archive the records as a versioned snapshot (always done for --source api)')
     
     args = parser.parse_args()
     
@@ -417,13 +303,10 @@ def main():
             print(f"  With triangulation: {len([m for m in current_mobs.values() if m['map_lat'] is not None])}")
             return
             
-        # Simulate Codex data (in future, fetch from real API)
-        codex_data = importer.simulate_codex_import()
-        
-        # Detect changes
-        changes = importer.detect_changes(codex_data)
-        
-        # Import data
+        # Stream Codex records; changes are detected while importing
+        codex_data = open_source(args.source, args.input, with_drops=not args.no_drops)
+        if args.source == 'api' or args.archive:
+            codex_data = ArchivedSource(codex_data, SnapshotArchive())
         importer.import_mob_data(codex_data, dry_run=args.dry_run)
         
         # Generate and save report
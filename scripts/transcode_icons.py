@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Multi-resolution icon variants for the frontend
+Downloaded item icons are the 64px CDN webp; filter lists and popups show
+them at 16-32px. This build step transcodes every icon into each requested
+size (and webp plus, optionally, AVIF) on a process pool, and writes
+icon-variants.json so the frontend can pick the smallest adequate file:
+
+    {"version": 1, "sizes": [16, 32, 64], "formats": ["webp", "avif"],
+     "icons": {"archmages_insight": {"hash": "<sha256 of the source>", "source_size": 64,
+                                     "variants": [{"size": 16, "format": "webp",
+                                                   "file": "archmages_insight_16.webp",
+                                                   "bytes": 412}, ...]}}}
+
+Icons whose source hash matches the previous manifest (and whose variants
+are all still on disk) are skipped, so a rebuild only transcodes new or
+changed icons. Sizes are never upscaled: sizes above the source collapse
+into one variant at the source resolution, named and listed with that
+actual size.
+
+Requires Pillow (pip install pillow); AVIF needs Pillow >= 11.2 or the
+pillow-avif-plugin package.
+
+Usage:
+    python3 scripts/transcode_icons.py
+    python3 scripts/transcode_icons.py --sizes 16 32 64 --avif --workers 8
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    import pillow_avif  # noqa: F401 - registers the AVIF codec on older Pillow
+except ImportError:
+    pass
+
+DEFAULT_SOURCE_DIR = 'app/frontend-dev/src/assets/icons/items'
+DEFAULT_OUT_DIR = 'app/frontend-dev/src/assets/icon-variants'
+MANIFEST_NAME = 'icon-variants.json'
+DEFAULT_SIZES = (16, 32, 64)
+WEBP_QUALITY = 85
+AVIF_QUALITY = 60
+
+
+def avif_supported() -> bool:
+    """Whether AVIF can be saved, by Pillow itself or the pillow-avif-plugin"""
+    if Image is None:
+        return False
+    Image.init()
+    return 'AVIF' in Image.SAVE
+
+
+def file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _encode(image: 'Image.Image', image_format: str) -> bytes:
+    buffer = io.BytesIO()
+    if image_format == 'avif':
+        image.save(buffer, 'AVIF', quality=AVIF_QUALITY)
+    else:
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=6)
+    return buffer.getvalue()
+
+
+def variant_sizes(sizes: Sequence[int], source_size: int) -> List[int]:
+    """Sizes actually written: never upscaled, so larger sizes become the source size"""
+    return sorted({min(size, source_size) for size in sizes})
+
+
+def transcode_icon(source: str, name: str, out_dir: str, sizes: Sequence[int],
+                   formats: Sequence[str]) -> dict:
+    """Write every size/format variant of one icon (runs in a pool worker)
+
+    Returns {'source_size': px, 'variants': [...]} for the manifest entry.
+    """
+    with Image.open(source) as image:
+        image = image.convert('RGBA')
+    source_size = max(image.size)
+    variants = []
+    for side in variant_sizes(sizes, source_size):
+        scaled = image if source_size == side else image.resize(
+            (max(1, image.width * side // source_size), max(1, image.height * side // source_size)),
+            Image.LANCZOS)
+        for image_format in formats:
+            filename = f"{name}_{side}.{image_format}"
+            content = _encode(scaled, image_format)
+            with open(os.path.join(out_dir, filename), 'wb') as f:
+                f.write(content)
+            variants.append({'size': side, 'format': image_format, 'file': filename, 'bytes': len(content)})
+    return {'source_size': source_size, 'variants': variants}
+
+
+def load_manifest(out_dir: str) -> dict:
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _up_to_date(entry: Optional[dict], source_hash: str, out_dir: str, sizes, formats) -> bool:
+    if not entry or entry.get('hash') != source_hash or not entry.get('source_size'):
+        return False
+    have = {(variant['size'], variant['format']) for variant in entry.get('variants', [])
+            if os.path.exists(os.path.join(out_dir, variant['file']))}
+    return all((size, image_format) in have for size in variant_sizes(sizes, entry['source_size'])
+               for image_format in formats)
+
+
+def transcode_all(source_dir: str, out_dir: str, sizes: Sequence[int] = DEFAULT_SIZES,
+                  formats: Sequence[str] = ('webp',), workers: Optional[int] = None) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    previous = load_manifest(out_dir).get('icons', {})
+    icons = {}
+    jobs = {}
+    for filename in sorted(os.listdir(source_dir)):
+        name, ext = os.path.splitext(filename)
+        if ext.lower() not in ('.webp', '.png', '.jpg', '.jpeg'):
+            continue
+        source = os.path.join(source_dir, filename)
+        source_hash = file_hash(source)
+        if _up_to_date(previous.get(name), source_hash, out_dir, sizes, formats):
+            icons[name] = previous[name]
+        else:
+            jobs[name] = (source, source_hash)
+
+    failed = 0
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {name: pool.submit(transcode_icon, source, name, out_dir, sizes, formats)
+                       for name, (source, _) in jobs.items()}
+            for name, future in futures.items():
+                try:
+                    icons[name] = {'hash': jobs[name][1], **future.result()}
+                except Exception as e:
+                    failed += 1
+                    print(f"  ❌ {name}: {e}")
+
+    manifest = {'version': 1, 'sizes': list(sizes), 'formats': list(formats),
+                'icons': dict(sorted(icons.items()))}
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    print(f"✅ {len(jobs) - failed} icons transcoded, {len(icons) - len(jobs) + failed} unchanged, {failed} failed")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Transcode icons into multi-resolution variants')
+    parser.add_argument('--source-dir', default=DEFAULT_SOURCE_DIR, help='Directory of downloaded icons')
+    parser.add_argument('--out-dir', default=DEFAULT_OUT_DIR, help='Output directory for variants + manifest')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='Output sizes in px')
+    parser.add_argument('--avif', action='store_true', help='Also write AVIF variants')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    if Image is None:
+        print("❌ Pillow is required for transcoding (pip install pillow)")
+        sys.exit(1)
+    if not os.path.isdir(args.source_dir):
+        print(f"❌ Source directory not found: {args.source_dir}")
+        sys.exit(1)
+
+    formats = ['webp']
+    if args.avif:
+        if avif_supported():
+            formats.append('avif')
+        else:
+            print("⚠️  AVIF not supported by this Pillow build (pip install pillow-avif-plugin) - webp only")
+
+    print(f"🖼️  Transcoding {args.source_dir} -> {args.out_dir} ({', '.join(map(str, args.sizes))} px, "
+          f"{'/'.join(formats)})...")
+    manifest = transcode_all(args.source_dir, args.out_dir, sorted(set(args.sizes)), formats, args.workers)
+
+    totals = {}
+    for entry in manifest['icons'].values():
+        for variant in entry['variants']:
+            key = (variant['size'], variant['format'])
+            totals[key] = totals.get(key, 0) + variant['bytes']
+    for (size, image_format), total in sorted(totals.items()):
+        print(f"  - {size}px {image_format}: {total / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
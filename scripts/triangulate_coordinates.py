@@ -2,21 +2,84 @@
 """
 Named Mob Coordinate Triangulation Script
 Uses 3 reference points to recalculate all named mob positions on the interactive map.
+
+With --robust ransac|huber every REF marker is used and misplaced markers are
+rejected automatically (residual above --threshold map units) and reported.
+With --piecewise the accepted markers are triangulated (Delaunay) and each
+triangle gets its own exact affine; the global fit is kept outside the mesh.
+With --tps a thin plate spline is fitted through the accepted markers; its
+coefficients are cached in the coordinate_transforms table, keyed by a hash of
+the control points, and reused while the REF markers are unchanged.
+
+Every applied transform is recorded in coordinate_transforms together with a
+fingerprint of the REF markers, mob codex locations and options it was
+computed from. --auto (cron / after marker edits) compares that fingerprint
+first and exits when nothing changed; otherwise it recomputes and rewrites
+only the mobs that move more than --tolerance map units.
+
+Usage:
+    python3 scripts/triangulate_coordinates.py
+    python3 scripts/triangulate_coordinates.py --robust ransac [--threshold 2.0]
+    python3 scripts/triangulate_coordinates.py --robust ransac --piecewise
+    python3 scripts/triangulate_coordinates.py --robust ransac --tps [--smoothing 0.01]
+    python3 scripts/triangulate_coordinates.py --auto --robust ransac [--tolerance 0.01]
 """
 
+import argparse
+import hashlib
 import sqlite3
 import json
 import sys
 import os
+from itertools import combinations, repeat
 from typing import List, Tuple, Dict, Any
 import numpy as np
 from scipy.optimize import minimize
+from scipy.spatial import Delaunay, QhullError
 import math
 
+ROBUST_METHODS = ('ransac', 'huber')
+# Map units (Leaflet lat/lng) beyond which a REF marker is treated as misplaced
+DEFAULT_INLIER_THRESHOLD = 2.0
+RANSAC_MAX_HYPOTHESES = 2000
+HUBER_K = 1.345
+HUBER_MAX_ITERATIONS = 50
+TPS_METHOD = 'thin plate spline'
+TPS_BATCH_SIZE = 65536  # query points per kernel block (rows x control points floats)
+
+DEFAULT_MOVE_TOLERANCE = 0.01  # Map units a placed mob must move before --auto rewrites it
+
+# Registry of solved transforms; the most recently applied row is what map_lat/map_lng reflect
+TRANSFORMS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS coordinate_transforms (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        method TEXT NOT NULL,
+        control_fingerprint TEXT NOT NULL, -- sha256 of the control points (codex x/y -> map lng/lat) and options
+        params TEXT NOT NULL,              -- solved transform parameters (JSON)
+        source_fingerprint TEXT,           -- sha256 of the REF markers, mob codex locations and options applied
+        applied_at DATETIME,               -- last time named_mobs were placed with this transform
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(method, control_fingerprint)
+    )
+"""
+REGISTRY_COLUMNS = (('source_fingerprint', 'TEXT'), ('applied_at', 'DATETIME'))
+
+
+def control_fingerprint(control_codex: List[List[float]], control_map: List[List[float]], **options) -> str:
+    """Stable hash of a control-point set (and solver options) used as the transform cache key."""
+    payload = json.dumps({'codex': control_codex, 'map': control_map, 'options': options}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def tps_kernel(r: np.ndarray) -> np.ndarray:
+    """Thin-plate radial basis U(r) = r^2 log r, with U(0) = 0."""
+    return r * r * np.log(np.where(r > 0, r, 1.0))
+
 class CoordinateTriangulator:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.reference_points = []
+        self._meshes = {}
         
     def load_reference_points(self) -> List[Dict[str, Any]]:
         """Load ALL reference markers and their corresponding named mobs."""
@@ -81,8 +144,14 @@ class CoordinateTriangulator:
         self.reference_points = reference_points
         return reference_points
     
-    def calculate_transformation_matrix(self) -> Dict[str, float]:
-        """Calculate transformation parameters using least squares method with 3+ points."""
+    def calculate_transformation_matrix(self, robust: str = None,
+                                        threshold: float = DEFAULT_INLIER_THRESHOLD) -> Dict[str, float]:
+        """Calculate transformation parameters using least squares method with 3+ points.
+        
+        robust='ransac' or 'huber' fits over every reference point but rejects
+        misplaced markers (residual above threshold map units); they are listed
+        in the result under 'rejected'.
+        """
         if len(self.reference_points) < 2:
             raise ValueError("Need at least 2 reference points for transformation")
         
@@ -90,6 +159,8 @@ class CoordinateTriangulator:
         codex_points = np.array([[p['codex_x'], p['codex_y']] for p in self.reference_points])
         map_points = np.array([[p['map_lng'], p['map_lat']] for p in self.reference_points])  # Note: lng=x, lat=y
         
+        if robust and len(self.reference_points) >= 4:
+            return self._calculate_robust_transformation(codex_points, map_points, robust, threshold)
         if len(self.reference_points) == 2:
             # Linear transformation with 2 points
             return self._calculate_2point_transformation(codex_points, map_points)
@@ -173,8 +244,283 @@ class CoordinateTriangulator:
             'rmse': rmse
         }
     
+    @staticmethod
+    def _solve_affine(codex_points: np.ndarray, map_points: np.ndarray, weights: np.ndarray = None) -> np.ndarray:
+        """(3, 2) matrix P with [x, y, 1] @ P = [lng, lat], (weighted) least squares."""
+        design = np.column_stack((codex_points, np.ones(len(codex_points))))
+        if weights is not None:
+            root = np.sqrt(weights)[:, None]
+            design, map_points = design * root, map_points * root
+        return np.linalg.lstsq(design, map_points, rcond=None)[0]
+    
+    @staticmethod
+    def _affine_residuals(codex_points: np.ndarray, map_points: np.ndarray, affine: np.ndarray) -> np.ndarray:
+        """Distance in map units between fitted and placed position of every point."""
+        predicted = np.column_stack((codex_points, np.ones(len(codex_points)))) @ affine
+        return np.linalg.norm(predicted - map_points, axis=-1)
+    
+    def _ransac_inliers(self, codex_points: np.ndarray, map_points: np.ndarray, threshold: float) -> np.ndarray:
+        """Inlier mask of the best exact 3-point affine hypothesis (MSAC score).
+        
+        All hypotheses are solved and scored against every point at once:
+        every 3-point subset when there are few markers, random ones otherwise.
+        """
+        n = len(codex_points)
+        if math.comb(n, 3) <= RANSAC_MAX_HYPOTHESES:
+            subsets = np.array(list(combinations(range(n), 3)))
+        else:
+            rng = np.random.default_rng(0)
+            subsets = np.array([rng.choice(n, 3, replace=False) for _ in range(RANSAC_MAX_HYPOTHESES)])
+        
+        # Normalize codex coordinates so the 3x3 systems are well conditioned
+        center, scale = codex_points.mean(axis=0), codex_points.std(axis=0).max()
+        normalized = np.column_stack(((codex_points - center) / scale, np.ones(n)))
+        systems = normalized[subsets]                                    # (k, 3, 3)
+        usable = np.abs(np.linalg.det(systems)) > 1e-6                   # skip collinear triples
+        affines = np.linalg.solve(systems[usable], map_points[subsets[usable]])   # (k, 3, 2)
+        
+        errors = np.linalg.norm(normalized @ affines - map_points, axis=-1)      # (k, n)
+        scores = np.minimum(errors, threshold).sum(axis=1)
+        return errors[np.argmin(scores)] <= threshold
+    
+    def _huber_weights(self, codex_points: np.ndarray, map_points: np.ndarray) -> np.ndarray:
+        """Iteratively reweighted least squares with Huber weights on the point residuals."""
+        weights = np.ones(len(codex_points))
+        affine = self._solve_affine(codex_points, map_points)
+        for _ in range(HUBER_MAX_ITERATIONS):
+            residuals = self._affine_residuals(codex_points, map_points, affine)
+            # Robust residual scale (MAD), floored so exact fits do not divide by zero
+            delta = HUBER_K * max(1.4826 * np.median(residuals), 1e-9)
+            weights = np.minimum(1.0, delta / np.maximum(residuals, 1e-12))
+            previous, affine = affine, self._solve_affine(codex_points, map_points, weights)
+            if np.allclose(affine, previous, rtol=1e-10, atol=1e-12):
+                break
+        return affine
+    
+    def _calculate_robust_transformation(self, codex_points: np.ndarray, map_points: np.ndarray,
+                                         robust: str, threshold: float) -> Dict[str, float]:
+        """Affine fit over all reference points that rejects misplaced markers."""
+        if robust not in ROBUST_METHODS:
+            raise ValueError(f"Unknown robust method: {robust}")
+        
+        if robust == 'ransac':
+            inliers = self._ransac_inliers(codex_points, map_points, threshold)
+            affine = self._solve_affine(codex_points[inliers], map_points[inliers])
+        else:
+            affine = self._huber_weights(codex_points, map_points)
+        
+        residuals = self._affine_residuals(codex_points, map_points, affine)
+        inliers = residuals <= threshold
+        if robust == 'huber' and inliers.sum() >= 3:
+            # Final plain fit over the accepted points only
+            affine = self._solve_affine(codex_points[inliers], map_points[inliers])
+            residuals = self._affine_residuals(codex_points, map_points, affine)
+        
+        (a, c), (b_coeff, d), (tx, ty) = affine
+        return {
+            'a': a,
+            'b': b_coeff,
+            'c': c,
+            'd': d,
+            'tx': tx,
+            'ty': ty,
+            'method': f'robust affine ({robust})',
+            'rmse': float(np.sqrt(np.mean(residuals[inliers] ** 2))) if inliers.any() else 0.0,
+            'threshold': threshold,
+            'inliers': int(inliers.sum()),
+            'rejected': [
+                {'marker_id': ref['marker_id'], 'label': ref['label'], 'mob_name': ref['mob_name'],
+                 'residual': float(residual)}
+                for ref, residual, accepted in zip(self.reference_points, residuals, inliers) if not accepted
+            ],
+        }
+    
+    def calculate_piecewise_transformation(self, global_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Piecewise affine over a Delaunay mesh of the accepted reference points.
+        
+        Each mesh triangle maps its three control points exactly; mobs outside
+        the convex hull of the control points use global_params.
+        """
+        rejected = {r['marker_id'] for r in global_params.get('rejected', [])}
+        control = [ref for ref in self.reference_points if ref['marker_id'] not in rejected]
+        params = {
+            'method': 'piecewise affine (delaunay)',
+            'rmse': 0.0,  # Exact at every control point
+            'global': global_params,
+            'control_codex': [[ref['codex_x'], ref['codex_y']] for ref in control],
+            'control_map': [[ref['map_lng'], ref['map_lat']] for ref in control],
+            'rejected': global_params.get('rejected', []),
+        }
+        if 'threshold' in global_params:
+            params['threshold'] = global_params['threshold']
+        if len(control) < 3:
+            raise ValueError("Need at least 3 accepted reference points for a Delaunay mesh")
+        params['triangles'] = len(self._mesh(params)[0].simplices)
+        return params
+    
+    def _transforms_connection(self) -> sqlite3.Connection:
+        """Connection with the transform registry in place (older tables get the registry columns)."""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(TRANSFORMS_SCHEMA)
+        columns = {col[1] for col in conn.execute("PRAGMA table_info(coordinate_transforms)")}
+        for column, column_type in REGISTRY_COLUMNS:
+            if column not in columns:
+                conn.execute(f"ALTER TABLE coordinate_transforms ADD COLUMN {column} {column_type}")
+        conn.commit()
+        return conn
+    
+    def _cached_transform(self, method: str, fingerprint: str) -> Dict[str, Any]:
+        conn = self._transforms_connection()
+        row = conn.execute("SELECT params FROM coordinate_transforms WHERE method = ? AND control_fingerprint = ?",
+                           (method, fingerprint)).fetchone()
+        conn.close()
+        return json.loads(row[0]) if row else None
+    
+    def _store_transform(self, method: str, fingerprint: str, params: Dict[str, Any]):
+        conn = self._transforms_connection()
+        with conn:
+            conn.execute("""
+                INSERT INTO coordinate_transforms (method, control_fingerprint, params) VALUES (?, ?, ?)
+                ON CONFLICT(method, control_fingerprint) DO UPDATE SET params = excluded.params
+            """, (method, fingerprint, json.dumps(params)))
+        conn.close()
+    
+    def source_fingerprint(self, options: Dict[str, Any]) -> str:
+        """Hash of everything a placement depends on: REF markers, mob codex locations and options.
+        
+        Two plain queries, no name matching, so checking for changes is cheap.
+        """
+        conn = sqlite3.connect(self.db_path)
+        markers = conn.execute("""
+            SELECT id, label, lat, lng FROM markers
+            WHERE label LIKE 'REF %' OR label LIKE '% REF'
+            ORDER BY id
+        """).fetchall()
+        mobs = conn.execute("SELECT id, name, location_x, location_y FROM named_mobs ORDER BY id").fetchall()
+        conn.close()
+        payload = json.dumps({'markers': markers, 'mobs': mobs, 'options': options}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def applied_transform(self) -> Tuple[str, Dict[str, Any]]:
+        """(source fingerprint, params) of the transform named_mobs were last placed with, or (None, None)."""
+        conn = self._transforms_connection()
+        row = conn.execute("""
+            SELECT source_fingerprint, params FROM coordinate_transforms
+            WHERE applied_at IS NOT NULL
+            ORDER BY applied_at DESC, id DESC
+            LIMIT 1
+        """).fetchone()
+        conn.close()
+        return (row[0], json.loads(row[1])) if row else (None, None)
+    
+    def register_transform(self, transform_params: Dict[str, Any], source_fingerprint: str):
+        """Store a transform in the registry as the one named_mobs are now placed with."""
+        params = {key: value for key, value in transform_params.items() if key != 'cached'}
+        fingerprint = params.get('control_fingerprint') or control_fingerprint(
+            [[ref['codex_x'], ref['codex_y']] for ref in self.reference_points],
+            [[ref['map_lng'], ref['map_lat']] for ref in self.reference_points],
+            method=params['method'], rejected=sorted(r['marker_id'] for r in params.get('rejected', [])))
+        conn = self._transforms_connection()
+        with conn:
+            conn.execute("""
+                INSERT INTO coordinate_transforms (method, control_fingerprint, params, source_fingerprint, applied_at)
+                VALUES (?, ?, ?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+                ON CONFLICT(method, control_fingerprint) DO UPDATE SET
+                    params = excluded.params,
+                    source_fingerprint = excluded.source_fingerprint,
+                    applied_at = excluded.applied_at
+            """, (params['method'], fingerprint, json.dumps(params), source_fingerprint))
+        conn.close()
+    
+    def calculate_tps_transformation(self, global_params: Dict[str, Any], smoothing: float = 0.0) -> Dict[str, Any]:
+        """Thin-plate spline through the accepted reference points.
+        
+        The solved coefficients are stored in coordinate_transforms keyed by a
+        fingerprint of the control points, so an unchanged REF marker set only
+        costs a lookup. smoothing > 0 relaxes exact interpolation.
+        """
+        rejected = {r['marker_id'] for r in global_params.get('rejected', [])}
+        control = [ref for ref in self.reference_points if ref['marker_id'] not in rejected]
+        if len(control) < 3:
+            raise ValueError("Need at least 3 accepted reference points for a thin plate spline")
+        control_codex = [[ref['codex_x'], ref['codex_y']] for ref in control]
+        control_map = [[ref['map_lng'], ref['map_lat']] for ref in control]
+        fingerprint = control_fingerprint(control_codex, control_map, smoothing=smoothing)
+        
+        params = self._cached_transform(TPS_METHOD, fingerprint)
+        if params is not None:
+            params['cached'] = True
+        else:
+            codex_points = np.array(control_codex, dtype=np.float64)
+            map_points = np.array(control_map, dtype=np.float64)
+            n = len(codex_points)
+            # Normalized coordinates keep the (n + 3) system well conditioned
+            center, scale = codex_points.mean(axis=0), codex_points.std(axis=0).max()
+            normalized = (codex_points - center) / scale
+            system = np.zeros((n + 3, n + 3))
+            system[:n, :n] = tps_kernel(np.linalg.norm(normalized[:, None] - normalized[None], axis=-1))
+            system[:n, :n] += smoothing * np.eye(n)
+            system[:n, n:] = np.column_stack((np.ones(n), normalized))
+            system[n:, :n] = system[:n, n:].T
+            solution = np.linalg.solve(system, np.vstack((map_points, np.zeros((3, 2)))))
+            
+            params = {
+                'method': TPS_METHOD,
+                'rmse': 0.0,
+                'control_codex': control_codex,
+                'control_map': control_map,
+                'control_fingerprint': fingerprint,
+                'smoothing': smoothing,
+                'center': center.tolist(),
+                'scale': float(scale),
+                'weights': solution[:n].tolist(),   # (n, 2) kernel weights for [lng, lat]
+                'affine': solution[n:].tolist(),    # (3, 2) affine part on [1, x, y]
+            }
+            if smoothing:
+                lat, lng = self.transform_points(codex_points[:, 0], codex_points[:, 1], params)
+                params['rmse'] = float(np.sqrt(np.mean((lng - map_points[:, 0]) ** 2 + (lat - map_points[:, 1]) ** 2)))
+            self._store_transform(TPS_METHOD, fingerprint, params)
+            params['cached'] = False
+        
+        params['rejected'] = global_params.get('rejected', [])
+        if 'threshold' in global_params:
+            params['threshold'] = global_params['threshold']
+        return params
+    
+    def _tps_points(self, points: np.ndarray, transform_params: Dict[str, Any]) -> np.ndarray:
+        """Evaluate a thin plate spline at (m, 2) points in kernel blocks; (m, 2) [lng, lat]."""
+        control = (np.array(transform_params['control_codex']) - transform_params['center']) / transform_params['scale']
+        weights = np.array(transform_params['weights'])
+        affine = np.array(transform_params['affine'])
+        normalized = (points - transform_params['center']) / transform_params['scale']
+        result = np.empty((len(points), 2))
+        for start in range(0, len(points), TPS_BATCH_SIZE):
+            block = normalized[start:start + TPS_BATCH_SIZE]
+            kernel = tps_kernel(np.linalg.norm(block[:, None] - control[None], axis=-1))
+            result[start:start + TPS_BATCH_SIZE] = (kernel @ weights + affine[0]
+                                                    + block @ affine[1:])
+        return result
+    
+    def _mesh(self, transform_params: Dict[str, Any]) -> Tuple[Delaunay, np.ndarray]:
+        """Delaunay mesh of the control points and one (3, 2) affine per triangle (cached)."""
+        key = json.dumps([transform_params['control_codex'], transform_params['control_map']])
+        if key not in self._meshes:
+            codex_points = np.array(transform_params['control_codex'], dtype=np.float64)
+            map_points = np.array(transform_params['control_map'], dtype=np.float64)
+            try:
+                mesh = Delaunay(codex_points)
+            except QhullError as e:
+                raise ValueError(f"Reference points are collinear, no Delaunay mesh: {e}")
+            # Exact affine per triangle: [x, y, 1] @ A = [lng, lat] at its 3 corners
+            corners = np.concatenate((codex_points, np.ones((len(codex_points), 1))), axis=1)[mesh.simplices]
+            self._meshes[key] = (mesh, np.linalg.solve(corners, map_points[mesh.simplices]))
+        return self._meshes[key]
+    
     def transform_coordinates(self, codex_x: float, codex_y: float, transform_params: Dict[str, float]) -> Tuple[float, float]:
         """Transform codex coordinates to map coordinates."""
+        if transform_params['method'].startswith('piecewise') or transform_params['method'] == TPS_METHOD:
+            map_lat, map_lng = self.transform_points([codex_x], [codex_y], transform_params)
+            return float(map_lat[0]), float(map_lng[0])
         if transform_params['method'] == '2-point linear':
             # Simple linear transformation
             map_lng = (codex_x * transform_params['scale_x']) + transform_params['offset_x']
@@ -186,6 +532,37 @@ class CoordinateTriangulator:
         
         return map_lat, map_lng
     
+    def transform_points(self, codex_x: np.ndarray, codex_y: np.ndarray,
+                         transform_params: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """Transform arrays of codex coordinates to map coordinates in one vectorized step."""
+        codex_x = np.asarray(codex_x, dtype=np.float64)
+        codex_y = np.asarray(codex_y, dtype=np.float64)
+        if transform_params['method'].startswith('piecewise'):
+            # Global fit everywhere, replaced by the triangle's affine inside the mesh
+            map_lat, map_lng = self.transform_points(codex_x, codex_y, transform_params['global'])
+            mesh, affines = self._mesh(transform_params)
+            points = np.column_stack((codex_x, codex_y))
+            simplex = mesh.find_simplex(points)
+            inside = simplex >= 0
+            if inside.any():
+                homogeneous = np.column_stack((points[inside], np.ones(inside.sum())))
+                local = np.einsum('ni,nij->nj', homogeneous, affines[simplex[inside]])
+                map_lng[inside], map_lat[inside] = local[:, 0], local[:, 1]
+        elif transform_params['method'] == TPS_METHOD:
+            mapped = self._tps_points(np.column_stack((codex_x, codex_y)), transform_params)
+            map_lng, map_lat = mapped[:, 0], mapped[:, 1]
+        elif transform_params['method'] == '2-point linear':
+            map_lng = codex_x * transform_params['scale_x'] + transform_params['offset_x']
+            map_lat = codex_y * transform_params['scale_y'] + transform_params['offset_y']
+        else:
+            # [lng, lat] = [[a, b], [c, d]] @ [x, y] + [tx, ty] for all points at once
+            matrix = np.array([[transform_params['a'], transform_params['b']],
+                               [transform_params['c'], transform_params['d']]])
+            offset = np.array([transform_params['tx'], transform_params['ty']])
+            map_lng, map_lat = matrix @ np.vstack((codex_x, codex_y)) + offset[:, None]
+        
+        return map_lat, map_lng
+    
     def add_map_coordinate_columns(self):
         """Add map coordinate columns to the named_mobs table."""
         conn = sqlite3.connect(self.db_path)
@@ -223,35 +600,68 @@ class CoordinateTriangulator:
         """)
         
         mobs = cursor.fetchall()
-        updated_count = 0
+        if not mobs:
+            conn.close()
+            print("\n🎯 No named mobs with codex coordinates")
+            return 0
         
-        for mob_id, name, slug, codex_x, codex_y in mobs:
-            # Transform coordinates
-            map_lat, map_lng = self.transform_coordinates(codex_x, codex_y, transform_params)
-            
-            # Update database
-            cursor.execute("""
+        # Transform every mob at once, then write all rows in one transaction
+        ids, names, _, codex_x, codex_y = zip(*mobs)
+        map_lat, map_lng = self.transform_points(codex_x, codex_y, transform_params)
+        
+        for name, x, y, lat, lng in list(zip(names, codex_x, codex_y, map_lat, map_lng))[:5]:  # Show first 5 examples
+            print(f"✅ {name}: ({x:.0f}, {y:.0f}) -> ({lat:.6f}, {lng:.6f})")
+        
+        with conn:
+            cursor.executemany("""
                 UPDATE named_mobs 
                 SET map_lat = ?, map_lng = ?, coordinate_source = ? 
                 WHERE id = ?
-            """, (map_lat, map_lng, transform_params['method'], mob_id))
-            
-            updated_count += 1
-            
-            if updated_count <= 5:  # Show first 5 examples
-                print(f"✅ {name}: ({codex_x:.0f}, {codex_y:.0f}) -> ({map_lat:.6f}, {map_lng:.6f})")
-        
-        conn.commit()
+            """, zip(map_lat.tolist(), map_lng.tolist(), repeat(transform_params['method']), ids))
         conn.close()
+        updated_count = len(ids)
         
         print(f"\n🎯 Updated coordinates for {updated_count} named mobs")
         return updated_count
     
+    def update_moved_coordinates(self, transform_params: Dict[str, Any],
+                                 tolerance: float = DEFAULT_MOVE_TOLERANCE) -> Tuple[int, int]:
+        """Re-place every mob but write only those that move more than tolerance; (written, total)."""
+        conn = sqlite3.connect(self.db_path)
+        mobs = conn.execute("""
+            SELECT id, location_x, location_y, map_lat, map_lng, coordinate_source
+            FROM named_mobs
+            WHERE location_x IS NOT NULL AND location_y IS NOT NULL
+        """).fetchall()
+        if not mobs:
+            conn.close()
+            return 0, 0
+        
+        ids, codex_x, codex_y, old_lat, old_lng, sources = zip(*mobs)
+        map_lat, map_lng = self.transform_points(codex_x, codex_y, transform_params)
+        # Unplaced mobs (NULL -> NaN) never compare within tolerance
+        distance = np.hypot(map_lat - np.array(old_lat, dtype=np.float64),
+                            map_lng - np.array(old_lng, dtype=np.float64))
+        moved = ~(distance <= tolerance) | (np.array(sources, dtype=object) != transform_params['method'])
+        rows = [(lat, lng, transform_params['method'], mob_id)
+                for lat, lng, mob_id, is_moved in zip(map_lat.tolist(), map_lng.tolist(), ids, moved) if is_moved]
+        
+        with conn:
+            conn.executemany("""
+                UPDATE named_mobs 
+                SET map_lat = ?, map_lng = ?, coordinate_source = ? 
+                WHERE id = ?
+            """, rows)
+        conn.close()
+        return len(rows), len(ids)
+    
     def validate_transformation(self, transform_params: Dict[str, float]):
         """Validate the transformation using reference points."""
         print(f"\n🔍 Validation using {transform_params['method']}:")
         print(f"RMSE: {transform_params['rmse']:.6f}")
         
+        # Markers rejected by a robust fit are reported but not averaged
+        rejected = {r['marker_id'] for r in transform_params.get('rejected', [])}
         total_error = 0
         for ref in self.reference_points:
             predicted_lat, predicted_lng = self.transform_coordinates(
@@ -260,15 +670,21 @@ class CoordinateTriangulator:
             
             error_lat = abs(predicted_lat - ref['map_lat'])
             error_lng = abs(predicted_lng - ref['map_lng'])
-            total_error += math.sqrt(error_lat**2 + error_lng**2)
+            if ref['marker_id'] not in rejected:
+                total_error += math.sqrt(error_lat**2 + error_lng**2)
             
-            print(f"  {ref['mob_name']}:")
+            print(f"  {ref['mob_name']}{' (REJECTED)' if ref['marker_id'] in rejected else ''}:")
             print(f"    Expected: ({ref['map_lat']:.6f}, {ref['map_lng']:.6f})")
             print(f"    Predicted: ({predicted_lat:.6f}, {predicted_lng:.6f})")
             print(f"    Error: {math.sqrt(error_lat**2 + error_lng**2):.6f}")
         
-        avg_error = total_error / len(self.reference_points)
+        avg_error = total_error / (len(self.reference_points) - len(rejected))
         print(f"  Average Error: {avg_error:.6f}")
+        if rejected:
+            print(f"  Rejected {len(rejected)} of {len(self.reference_points)} markers "
+                  f"(residual > {transform_params['threshold']} map units):")
+            for r in sorted(transform_params['rejected'], key=lambda r: -r['residual']):
+                print(f"    ❌ {r['label']} (marker {r['marker_id']}): residual {r['residual']:.3f}")
         
         return avg_error
     
@@ -299,7 +715,8 @@ class CoordinateTriangulator:
                 'predicted_lng': predicted_lng,
                 'error_lat': error_lat,
                 'error_lng': error_lng,
-                'total_error': math.sqrt(error_lat**2 + error_lng**2)
+                'total_error': math.sqrt(error_lat**2 + error_lng**2),
+                'rejected': any(r['marker_id'] == ref['marker_id'] for r in transform_params.get('rejected', []))
             })
         
         with open(output_file, 'w') as f:
@@ -307,7 +724,72 @@ class CoordinateTriangulator:
         
         print(f"📊 Transformation report saved to: {output_file}")
 
+def transform_options(args) -> Dict[str, Any]:
+    """Command line options that change the computed placement."""
+    return {'robust': args.robust, 'threshold': args.threshold, 'piecewise': args.piecewise,
+            'tps': args.tps, 'smoothing': args.smoothing}
+
+def calculate_transform(triangulator: CoordinateTriangulator, args) -> Dict[str, Any]:
+    """Transform selected by the command line options."""
+    transform_params = triangulator.calculate_transformation_matrix(args.robust, args.threshold)
+    if args.piecewise:
+        transform_params = triangulator.calculate_piecewise_transformation(transform_params)
+        print(f"✅ Delaunay mesh: {transform_params['triangles']} triangles, "
+              f"{transform_params['global']['method']} outside the hull")
+    elif args.tps:
+        transform_params = triangulator.calculate_tps_transformation(transform_params, args.smoothing)
+        print(f"✅ Thin plate spline over {len(transform_params['control_codex'])} control points "
+              f"({'cached coefficients' if transform_params['cached'] else 'solved and cached'})")
+    print(f"✅ Using {transform_params['method']} transformation")
+    return transform_params
+
+def auto_triangulate(triangulator: CoordinateTriangulator, args):
+    """Recompute only when REF markers (or mob codex locations) changed; write only moved mobs."""
+    fingerprint = triangulator.source_fingerprint(transform_options(args))
+    applied_fingerprint, applied_params = triangulator.applied_transform()
+    if fingerprint == applied_fingerprint:
+        print(f"✅ REF markers unchanged - named mobs already placed with {applied_params['method']}")
+        return
+    
+    print("🔄 REF markers, mob locations or options changed - recalculating...")
+    ref_points = triangulator.load_reference_points()
+    if len(ref_points) < 2:
+        print("❌ Need at least 2 reference points. Please place reference markers first.")
+        sys.exit(1)
+    transform_params = calculate_transform(triangulator, args)
+    
+    avg_error = triangulator.validate_transformation(transform_params)
+    if avg_error > 5.0:  # No prompt in unattended mode: keep the current placement
+        print(f"❌ High validation error ({avg_error:.2f}). Check reference point accuracy - nothing updated.")
+        sys.exit(1)
+    
+    triangulator.add_map_coordinate_columns()
+    written, total = triangulator.update_moved_coordinates(transform_params, args.tolerance)
+    triangulator.register_transform(transform_params, fingerprint)
+    print(f"🎯 Updated {written} of {total} named mobs (moved more than {args.tolerance} map units)")
+
 def main():
+    parser = argparse.ArgumentParser(description='Named Mob Coordinate Triangulation')
+    parser.add_argument('--robust', choices=ROBUST_METHODS,
+                        help='Fit over all REF markers, rejecting misplaced ones (RANSAC or Huber IRLS)')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_INLIER_THRESHOLD,
+                        help=f'Robust mode: residual in map units above which a marker is rejected '
+                             f'(default: {DEFAULT_INLIER_THRESHOLD})')
+    local = parser.add_mutually_exclusive_group()
+    local.add_argument('--piecewise', action='store_true',
+                       help='Piecewise affine over a Delaunay mesh of the REF markers '
+                            '(global fit outside their convex hull)')
+    local.add_argument('--tps', action='store_true',
+                       help='Thin plate spline through the REF markers (coefficients cached in the database)')
+    parser.add_argument('--smoothing', type=float, default=0.0,
+                        help='Thin plate spline regularization (0 = exact interpolation)')
+    parser.add_argument('--auto', action='store_true',
+                        help='Unattended: recompute only if REF markers changed since the last applied '
+                             'transform, and update only mobs that move')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_MOVE_TOLERANCE,
+                        help=f'--auto: map units a mob must move to be rewritten (default: {DEFAULT_MOVE_TOLERANCE})')
+    args = parser.parse_args()
+    
     db_path = 'data/database/db/mydb.sqlite'
     
     if not os.path.exists(db_path):
@@ -319,6 +801,10 @@ def main():
     
     triangulator = CoordinateTriangulator(db_path)
     
+    if args.auto:
+        auto_triangulate(triangulator, args)
+        return
+    
     # Step 1: Load reference points
     print("\n1️⃣ Loading reference points...")
     ref_points = triangulator.load_reference_points()
@@ -331,8 +817,7 @@ def main():
     
     # Step 2: Calculate transformation
     print("\n2️⃣ Calculating coordinate transformation...")
-    transform_params = triangulator.calculate_transformation_matrix()
-    print(f"✅ Using {transform_params['method']} transformation")
+    transform_params = calculate_transform(triangulator, args)
     
     # Step 3: Validate transformation
     print("\n3️⃣ Validating transformation...")
@@ -352,6 +837,7 @@ def main():
     # Step 5: Update all coordinates
     print("\n5️⃣ Updating all named mob coordinates...")
     updated_count = triangulator.update_all_coordinates(transform_params)
+    triangulator.register_transform(transform_params, triangulator.source_fingerprint(transform_options(args)))
     
     # Step 6: Export report
     print("\n6️⃣ Generating report...")